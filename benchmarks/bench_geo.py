@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+import random
+
+import numpy as np
+
+# ey corremos desde la raíz del repo -bynd
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hotwheels_geo as geo
+from hotwheels_osm import calculate_distance
+
+HOME = {"lat": 19.4326, "lng": -99.1332}
+
+def random_points(n, seed=42):
+    # aaa puntos al azar alrededor de cdmx -bynd
+    rng = random.Random(seed)
+    return [
+        {"lat": HOME["lat"] + rng.uniform(-0.3, 0.3), "lng": HOME["lng"] + rng.uniform(-0.3, 0.3)}
+        for _ in range(n)
+    ]
+
+def best_of(fn, repeat=3):
+    # chintrolas mejor tiempo de varias corridas -bynd
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def bench_one_to_many(n):
+    points = random_points(n)
+    lats, lngs = geo.to_arrays(points)
+
+    t_scalar, scalar = best_of(lambda: [calculate_distance(HOME, p) for p in points])
+    t_vector, vector = best_of(lambda: geo.haversine_to_many(HOME["lat"], HOME["lng"], lats, lngs))
+    assert np.allclose(scalar, vector)
+
+    print(f"one-to-many  n={n:>7}: escalar {t_scalar*1000:9.2f} ms | numpy {t_vector*1000:8.2f} ms | x{t_scalar/t_vector:6.1f}")
+
+def bench_radius_filter(n, radius_km=6.0):
+    points = random_points(n)
+    lats, lngs = geo.to_arrays(points)
+
+    t_scalar, scalar = best_of(lambda: [i for i, p in enumerate(points) if calculate_distance(HOME, p) <= radius_km])
+    t_vector, vector = best_of(lambda: geo.within_radius(HOME["lat"], HOME["lng"], radius_km, lats, lngs)[0])
+    assert list(vector) == scalar
+
+    print(f"radio {radius_km}km n={n:>7}: escalar {t_scalar*1000:9.2f} ms | numpy {t_vector*1000:8.2f} ms | x{t_scalar/t_vector:6.1f}")
+
+def bench_matrix(pairs):
+    # fokeis matriz cuadrada con ~pairs celdas -bynd
+    n = int(pairs ** 0.5)
+    points = random_points(n)
+    lats, lngs = geo.to_arrays(points)
+
+    t_scalar, scalar = best_of(lambda: [[calculate_distance(a, b) for b in points] for a in points])
+    t_vector, vector = best_of(lambda: geo.haversine_matrix(lats, lngs))
+    assert np.allclose(scalar, vector)
+
+    print(f"matriz {n}x{n} ({n*n:>7} pares): escalar {t_scalar*1000:9.2f} ms | numpy {t_vector*1000:8.2f} ms | x{t_scalar/t_vector:6.1f}")
+
+if __name__ == "__main__":
+    for size in (10_000, 100_000):
+        bench_one_to_many(size)
+        bench_radius_filter(size)
+        bench_matrix(size)
@@ -0,0 +1,34 @@
+import os
+import sys
+import time
+import random
+
+# ey corremos desde la raíz del repo -bynd
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hotwheels_route as route
+
+HOME = {"lat": 19.4326, "lng": -99.1332}
+
+def random_stores(n, seed):
+    # aaa tiendas al azar en ~7km alrededor de casa -bynd
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"Tienda {i}",
+            "score": rng.randint(20, 95),
+            "location": {"lat": HOME["lat"] + rng.uniform(-0.06, 0.06), "lng": HOME["lng"] + rng.uniform(-0.06, 0.06)}
+        }
+        for i in range(n)
+    ]
+
+if __name__ == "__main__":
+    for k in (10, 25, 50):
+        times = []
+        for seed in range(20):
+            stores = random_stores(200, seed)
+            start = time.perf_counter()
+            route.plan_route(HOME, stores, k=k, return_home=True)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        print(f"k={k:>3}: mediana {times[len(times)//2]*1000:6.2f} ms | peor {times[-1]*1000:6.2f} ms")
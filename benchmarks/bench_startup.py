@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+# ey corremos desde la raíz del repo -bynd
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# aaa lo que abrir el menú o la CLI NO debe importar (se cargan hasta que se usan) -bynd
+FORBIDDEN = ["pandas", "requests", "hotwheels_scrape"]
+
+# chintrolas cada corrida es un proceso nuevo, así medimos el arranque en frío de verdad -bynd
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+def probe(module, importtime=False):
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", PROBE.format(module=module)]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+def slowest_imports(stderr, top=10):
+    # fokeis parseamos la salida de -X importtime: "import time: self | cumulative | nombre" -bynd
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+def check(module, budget_ms, runs, forbidden):
+    # vavavava mejor de varias corridas contra el presupuesto, y nada de módulos pesados -bynd
+    times = []
+    loaded = set()
+    for _ in range(runs):
+        result, _ = probe(module)
+        times.append(result["seconds"] * 1000)
+        loaded.update(result["modules"])
+
+    best = min(times)
+    heavy = [name for name in forbidden if name in loaded]
+    ok = best <= budget_ms and not heavy
+    flag = "✓" if ok else "⚠️ FUERA DE PRESUPUESTO"
+    print(f"{module:<24} mejor {best:7.1f} ms  mediana {statistics.median(times):7.1f} ms  (límite {budget_ms:.0f} ms)  {flag}")
+    if heavy:
+        print(f"  importa al arrancar: {', '.join(heavy)}")
+
+    if not ok:
+        # ey para saber a quién culpar -bynd
+        _, stderr = probe(module, importtime=True)
+        for cumulative, name in slowest_imports(stderr):
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+    return ok, best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Revisa que el arranque en frío no se pase del presupuesto")
+    parser.add_argument("modules", nargs="*", default=["hotwheels_osm", "hotwheels_cli"])
+    parser.add_argument("--budget-ms", type=float, default=200, help="tiempo máximo de import por módulo")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--allow", action="append", default=[], help="módulo pesado permitido (repetible)")
+    parser.add_argument("--output", help="guardar resultados en JSON")
+    args = parser.parse_args(argv)
+
+    forbidden = [name for name in FORBIDDEN if name not in args.allow]
+    results = {}
+    failed = []
+    for module in args.modules:
+        ok, best = check(module, args.budget_ms, args.runs, forbidden)
+        results[module] = {"best_ms": round(best, 2), "ok": ok}
+        if not ok:
+            failed.append(module)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"budget_ms": args.budget_ms, "results": results}, f, indent=2)
+
+    if failed:
+        print(f"\n{len(failed)} fuera de presupuesto: {', '.join(failed)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+import io
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime
+
+# ey corremos desde la raíz del repo -bynd
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rich.console import Console
+
+import hotwheels_database as hwdb
+import hotwheels_osm as hwosm
+import hotwheels_overpass as overpass
+import hotwheels_scoring as scoring
+
+HOME = {"lat": 19.4326, "lng": -99.1332}
+
+# aaa vocabulario para nombres sintéticos que sí pegan en las listas de marcas -bynd
+NAME_PARTS = [
+    "Nissan Skyline GT-R", "Toyota Supra", "Honda Civic Type R", "Mazda RX-7", "Subaru WRX STI",
+    "Porsche 911 GT3", "Ferrari F40", "Lamborghini Countach", "McLaren Senna", "Bugatti Chiron",
+    "'67 Camaro", "Ford Mustang Mach 1", "Dodge Challenger", "Corvette Stingray", "Chevelle SS",
+    "Batmobile", "Bone Shaker", "Twin Mill", "Rodger Dodger", "Deora II", "BMW M3", "Audi RS 6",
+    "Mercedes-Benz 300 SL", "Volkswagen Beetle", "Tesla Cybertruck", "Jeep Wrangler"
+]
+SERIES = ["HW Dream Garage", "HW J-Imports", "HW Exotics", "Muscle Mania", "Batman", "HW Art Cars", "Then and Now"]
+SHOP_TYPES = ["supermarket", "convenience", "chemist", "pharmacy", "department_store"]
+STORE_NAMES = ["Walmart", "Chedraui", "Soriana", "Bodega Aurrera", "Farmacia Guadalajara", "Oxxo", "7-Eleven", "Farmacias del Ahorro"]
+
+def quiet_modules():
+    # chintrolas silenciamos rich para medir solo el trabajo -bynd
+    sink = Console(file=io.StringIO())
+    hwdb.console = sink
+    hwosm.console = sink
+
+def stub_network():
+    # fokeis cualquier intento de red en el benchmark es un error -bynd
+    def no_network(*args, **kwargs):
+        raise RuntimeError("Red deshabilitada durante los benchmarks")
+    overpass.post_query = no_network
+
+def make_hotlist_csv(path, rows, seed=1):
+    # ey CSV con las mismas columnas que el scrape de Fandom -bynd
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Toy #", "Col.#", "Model Name", "Series", "Series #", "Photo"])
+        for i in range(rows):
+            name = rng.choice(NAME_PARTS)
+            roll = rng.random()
+            if roll < 0.01:
+                name += " Super Treasure Hunt"
+            elif roll < 0.03:
+                name += " Treasure Hunt"
+            elif roll < 0.2:
+                name += " (2nd Color)"
+            writer.writerow([f"HX{i:06d}", i % 250 + 1, name, rng.choice(SERIES), f"{rng.randint(1, 5)}/5", ""])
+
+def make_osm_elements(count, seed=2, spread=0.1):
+    # aaa elementos con la forma que regresa Overpass ya proyectado -bynd
+    rng = random.Random(seed)
+    elements = []
+    for i in range(count):
+        lat = HOME["lat"] + rng.uniform(-spread, spread)
+        lng = HOME["lng"] + rng.uniform(-spread, spread)
+        tags = {"shop": rng.choice(SHOP_TYPES), "name": rng.choice(STORE_NAMES)}
+        if i % 5 == 0:
+            elements.append({"type": "way", "id": i, "center": {"lat": lat, "lon": lng}, "tags": tags})
+        else:
+            elements.append({"type": "node", "id": i, "lat": lat, "lon": lng, "tags": tags})
+    return elements
+
+def make_schools(count, seed=3, spread=0.1):
+    rng = random.Random(seed)
+    return [
+        {"type": "node", "id": 10**7 + i, "lat": HOME["lat"] + rng.uniform(-spread, spread),
+         "lon": HOME["lng"] + rng.uniform(-spread, spread), "tags": {"amenity": "school"}}
+        for i in range(count)
+    ]
+
+def make_visit_stats(stores, seed=4, visited=0.3):
+    # fokeis visitas por tienda, día y hora para una parte de las tiendas -bynd
+    rng = random.Random(seed)
+    stats = {}
+    for store in stores:
+        if rng.random() > visited:
+            continue
+        for _ in range(rng.randint(1, 20)):
+            found = int(rng.random() < 0.3)
+            for key in [(store["name"], -1, -1), (store["name"], rng.randrange(7), -1),
+                        (store["name"], -1, rng.randrange(24)), ("", -1, -1)]:
+                n, f = stats.get(key, (0, 0))
+                stats[key] = (n + 1, f + found)
+    return stats
+
+def baseline_tranquility_score(store, weights):
+    # ey BASELINE: el score de antes, tienda por tienda en Python puro -bynd
+    # aaa solo vive aquí para medir contra scoring.rank_stores; la app ya no lo usa -bynd
+    score = 50
+    score += store["nearby_schools"] * weights["nearby_schools"]
+    if store["on_main_avenue"]:
+        score += weights["on_main_avenue"]
+    if store["rating"] > 4.0:
+        score += weights["high_rating"]
+    if store["user_ratings_total"] > 1000:
+        score += weights["many_reviews"]
+    if store["type"] == "pharmacy":
+        score += weights["pharmacy_bonus"]
+    if store["store_vibe"] == "boring":
+        score += weights["boring_vibe"]
+    if store["store_vibe"] == "residential":
+        score += weights["residential"]
+    if store["opening_hour"] <= 7:
+        score += weights["early_opening"]
+    return max(0, min(100, int(score)))
+
+def measure(fn, repeat):
+    # vavavava tiempos de varias corridas -bynd
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+def record(results, name, items, times):
+    best = min(times)
+    results[name] = {
+        "items": items,
+        "repeat": len(times),
+        "best_s": round(best, 6),
+        "median_s": round(statistics.median(times), 6),
+        "per_item_us": round(best / items * 1e6, 4) if items else None
+    }
+    print(f"{name:<32} n={items:>7}  mejor {best*1000:10.2f} ms  ({results[name]['per_item_us']} µs/item)")
+
+def run_suite(hotlist_rows, osm_elements, repeat, workdir):
+    results = {}
+    config = hwosm.load_config() if os.path.exists(hwosm.CONFIG_FILE) else json.loads(json.dumps(hwosm.DEFAULT_CONFIG))
+
+    # q chidoteee hotlist: csv -> json -> clasificación -> búsqueda/stats -bynd
+    csv_path = os.path.join(workdir, "hotlist_bench.csv")
+    make_hotlist_csv(csv_path, hotlist_rows)
+
+    times, cars = measure(lambda: hwdb.csv_to_json(csv_path, 2025), max(1, repeat // 3))
+    record(results, "csv_to_json", hotlist_rows, times)
+
+    times, classified = measure(lambda: [hwdb.classify_car(car) for car in cars], repeat)
+    record(results, "classify_car", len(cars), times)
+
+    times, classified = measure(lambda: hwdb.classify_cars(cars), repeat)
+    record(results, "classify_cars", len(cars), times)
+
+    hotlist = []
+    for car, c in zip(cars, classified):
+        hotlist.append({
+            "id": f"{car['year']}-{car['number']}", "number": f"{car['number']}/250",
+            "name": car["name"], "series": car["series"], "year": car["year"], "brand": c["brand"],
+            "categories": c["category"], "is_jdm": c["is_jdm"], "is_premium": c["is_premium"],
+            "is_muscle": c["is_muscle"], "is_th": car["is_th"], "is_sth": car["is_sth"]
+        })
+    hwdb.HOTLIST_FILE = os.path.join(workdir, "hotlist_bench.json")
+    hwdb.save_hotlist(hotlist)
+
+    # ey carga en frío: snapshot marshal contra JSON + reconstruir el índice -bynd
+    def cold_load(use_snapshot):
+        hwdb._hotlist_index = None
+        if not use_snapshot:
+            os.remove(hwdb.snapshot_path(hwdb.HOTLIST_FILE))
+        return hwdb.get_hotlist_index()
+
+    times, _ = measure(lambda: cold_load(True), repeat)
+    record(results, "load_hotlist_snapshot", len(hotlist), times)
+
+    times, _ = measure(lambda: cold_load(False), max(1, repeat // 3))
+    record(results, "load_hotlist_json", len(hotlist), times)
+
+    queries = ["porsche", "skyline", "camaro", "batmobile", "zzz-no-existe", "gt"]
+    times, _ = measure(lambda: [hwdb.search_hotlist(q) for q in queries], repeat)
+    record(results, "search_hotlist", len(queries), times)
+
+    times, _ = measure(lambda: [hwdb.search_hotlist(q, mode="prefix") for q in queries], repeat)
+    record(results, "search_hotlist_prefix", len(queries), times)
+
+    typos = ["skylin", "lambo", "mc laren", "porshe 911", "cmaro", "zzz-no-existe"]
+    times, _ = measure(lambda: [hwdb.search_hotlist(q, mode="fuzzy") for q in typos], repeat)
+    record(results, "search_hotlist_fuzzy", len(typos), times)
+
+    times, _ = measure(lambda: hwdb.hotlist_stats(hotlist), repeat)
+    record(results, "hotlist_stats", len(hotlist), times)
+
+    # aaa tiendas: análisis con índice de escuelas y con la red stubbeada -bynd
+    elements = make_osm_elements(osm_elements)
+    schools = make_schools(max(100, osm_elements // 10))
+    school_index = hwosm.build_school_index(schools)
+
+    times, features = measure(lambda: [hwosm.analyze_store(e, config, school_index) for e in elements], repeat)
+    record(results, "analyze_store", len(elements), times)
+
+    # ey sin índice analyze_store pide escuelas por tienda, aquí va a un stub fijo -bynd
+    real_fetch = hwosm.fetch_osm_schools
+    hwosm.fetch_osm_schools = lambda location, radius=hwosm.SCHOOL_RADIUS, bboxes=None: schools[:3]
+    try:
+        sample = elements[:5000]
+        times, _ = measure(lambda: [hwosm.analyze_store(e, config) for e in sample], repeat)
+        record(results, "analyze_store_stub_fetch", len(sample), times)
+    finally:
+        hwosm.fetch_osm_schools = real_fetch
+
+    features = [f for f in features if f]
+    weights = config["weights"]
+    times, baseline = measure(lambda: [baseline_tranquility_score(f, weights) for f in features], repeat)
+    record(results, "baseline_score_loop", len(features), times)
+
+    times, ranked = measure(lambda: scoring.rank_stores(features, weights), repeat)
+    record(results, "rank_stores", len(features), times)
+    # chintrolas si el baseline y rank_stores ya no dan lo mismo, la comparación no sirve -bynd
+    if sorted(baseline) != sorted(s["score"] for s in ranked):
+        raise RuntimeError("baseline_tranquility_score y scoring.rank_stores dan scores distintos")
+
+    # ey contadores sintéticos con la misma forma que history.load_stats -bynd
+    stats = make_visit_stats(features)
+    times, _ = measure(lambda: scoring.rank_stores(features, weights, history=stats), repeat)
+    record(results, "rank_stores_history", len(features), times)
+
+    locations = [f["location"] for f in features]
+    times, _ = measure(lambda: [hwosm.calculate_distance(HOME, loc) for loc in locations], repeat)
+    record(results, "calculate_distance", len(locations), times)
+
+    return results
+
+def compare(results, baseline_path, threshold):
+    # chintrolas comparamos contra una corrida anterior -bynd
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    print(f"\nComparando contra {baseline_path} (umbral x{threshold}):")
+    for name, current in results.items():
+        old = baseline.get(name)
+        if not old or not old.get("per_item_us") or not current.get("per_item_us"):
+            continue
+        ratio = current["per_item_us"] / old["per_item_us"]
+        flag = "  ⚠️ REGRESIÓN" if ratio > threshold else ""
+        print(f"  {name:<32} x{ratio:6.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de las funciones calientes de Hot Wheels Scout")
+    parser.add_argument("--hotlist-rows", type=int, default=100_000)
+    parser.add_argument("--osm-elements", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="JSON de una corrida anterior")
+    parser.add_argument("--threshold", type=float, default=1.25, help="razón máxima antes de marcar regresión")
+    args = parser.parse_args(argv)
+
+    quiet_modules()
+    stub_network()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_suite(args.hotlist_rows, args.osm_elements, args.repeat, workdir)
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": {"hotlist_rows": args.hotlist_rows, "osm_elements": args.osm_elements, "repeat": args.repeat},
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✓ Resultados en {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regresiones: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
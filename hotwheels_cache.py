@@ -0,0 +1,210 @@
+import os
+import json
+import math
+import time
+import tempfile
+from datetime import datetime, timedelta
+
+import hotwheels_geo as geo
+import hotwheels_metrics as metrics
+
+# ey precisión 6 = tiles de ~1.2 x 0.6 km, mover 500m solo toca la orilla -bynd
+TILE_PRECISION = 6
+
+# aaa cada tile vale 7 días, igual que el caché viejo -bynd
+TILE_TTL = timedelta(days=7)
+
+# chintrolas máximo de tiles en disco antes de sacar los menos usados -bynd
+MAX_TILES = 4000
+
+# ey v3: elementos proyectados, sin nodos miembro de ways -bynd
+CACHE_VERSION = 3
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_BASE32_INDEX = {c: i for i, c in enumerate(_BASE32)}
+
+def geohash_encode(lat, lng, precision=TILE_PRECISION):
+    # q chidoteee codificamos lat/lng a geohash -bynd
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bit = 0
+    ch = 0
+    even = True
+
+    while len(chars) < precision:
+        rng = lng_range if even else lat_range
+        value = lng if even else lat
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch = (ch << 1) | 1
+            rng[0] = mid
+        else:
+            ch = ch << 1
+            rng[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_BASE32[ch])
+            bit = 0
+            ch = 0
+
+    return "".join(chars)
+
+def geohash_bbox(geohash):
+    # fokeis regresamos (sur, oeste, norte, este) del tile -bynd
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+
+    for c in geohash:
+        bits = _BASE32_INDEX[c]
+        for shift in range(4, -1, -1):
+            rng = lng_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (bits >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+
+    return (lat_range[0], lng_range[0], lat_range[1], lng_range[1])
+
+def tile_size_deg(precision=TILE_PRECISION):
+    # ey alto y ancho de un tile en grados -bynd
+    s, w, n, e = geohash_bbox(geohash_encode(0.0, 0.0, precision))
+    return n - s, e - w
+
+def tiles_for_circle(location, radius_km, precision=TILE_PRECISION):
+    # vavavava todos los tiles que tocan el círculo de búsqueda -bynd
+    lat, lng = location["lat"], location["lng"]
+    tile_h, tile_w = tile_size_deg(precision)
+
+    dlat, dlng = geo.bbox_deltas(lat, radius_km)
+
+    # aaa alineamos al grid de geohash para no saltarnos tiles -bynd
+    i0 = int(math.floor((lat - dlat + 90.0) / tile_h))
+    i1 = int(math.floor((lat + dlat + 90.0) / tile_h))
+    j0 = int(math.floor((lng - dlng + 180.0) / tile_w))
+    j1 = int(math.floor((lng + dlng + 180.0) / tile_w))
+
+    hashes = []
+    for i in range(i0, i1 + 1):
+        row_lat = i * tile_h - 90.0
+        for j in range(j0, j1 + 1):
+            col_lng = j * tile_w - 180.0
+            # chintrolas punto más cercano del tile al centro -bynd
+            near_lat = min(max(lat, row_lat), row_lat + tile_h)
+            near_lng = min(max(lng, col_lng), col_lng + tile_w)
+            if geo.haversine_km(lat, lng, near_lat, near_lng) <= radius_km:
+                hashes.append(geohash_encode(row_lat + tile_h / 2, col_lng + tile_w / 2, precision))
+
+    return hashes
+
+def merge_tiles(hashes):
+    # ey juntamos tiles vecinos de la misma fila en un solo bbox -bynd
+    boxes = sorted(geohash_bbox(h) for h in hashes)
+    merged = []
+
+    for s, w, n, e in boxes:
+        if merged:
+            ps, pw, pn, pe = merged[-1]
+            if ps == s and pn == n and abs(pe - w) < 1e-9:
+                merged[-1] = (ps, pw, pn, e)
+                continue
+        merged.append((s, w, n, e))
+
+    return merged
+
+def new_tile_cache():
+    return {"version": CACHE_VERSION, "tiles": {}}
+
+def load_tile_cache(path):
+    # aaa cargamos el caché de tiles, si es formato viejo empezamos de cero -bynd
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get("version") == CACHE_VERSION:
+                return cache
+        except (OSError, ValueError):
+            pass
+    return new_tile_cache()
+
+def evict_lru(cache, max_tiles=MAX_TILES):
+    # fokeis sacamos vencidos y luego los menos usados si nos pasamos -bynd
+    tiles = cache["tiles"]
+    now = datetime.now()
+
+    for key in [k for k, t in tiles.items() if now - datetime.fromisoformat(t["fetched_at"]) >= TILE_TTL]:
+        del tiles[key]
+
+    if len(tiles) > max_tiles:
+        by_use = sorted(tiles, key=lambda k: tiles[k]["last_used"])
+        for key in by_use[:len(tiles) - max_tiles]:
+            del tiles[key]
+
+def save_tile_cache(cache, path, max_tiles=MAX_TILES):
+    # vavavava guardamos a un temporal y reemplazamos para no corromper -bynd
+    # ey temporal único en la misma carpeta: dos escritores no se pisan el .tmp -bynd
+    evict_lru(cache, max_tiles)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def merge_tile_cache(cache, other):
+    # aaa juntamos tiles de otro caché (ej. lo que otro guardó mientras descargábamos) -bynd
+    # chintrolas de cada tile se queda la descarga más nueva -bynd
+    tiles = cache["tiles"]
+    for key, entry in other["tiles"].items():
+        mine = tiles.get(key)
+        if mine is None or entry["fetched_at"] > mine["fetched_at"]:
+            tiles[key] = entry
+        elif entry["last_used"] > mine["last_used"]:
+            mine["last_used"] = entry["last_used"]
+    return cache
+
+def tile_key(kind, geohash):
+    return f"{kind}:{geohash}"
+
+def lookup_tiles(cache, kind, hashes, ttl=TILE_TTL):
+    # chintrolas separamos tiles vigentes de los que faltan -bynd
+    tiles = cache["tiles"]
+    now = datetime.now()
+    found = {}
+    missing = []
+
+    for h in hashes:
+        entry = tiles.get(tile_key(kind, h))
+        if entry and now - datetime.fromisoformat(entry["fetched_at"]) < ttl:
+            entry["last_used"] = time.time()
+            found[h] = entry["elements"]
+        else:
+            missing.append(h)
+
+    metrics.count("cache_tiles", len(found), kind=kind, result="hit")
+    metrics.count("cache_tiles", len(missing), kind=kind, result="miss")
+    return found, missing
+
+def tile_of(location, precision=TILE_PRECISION):
+    # ey geohash del tile donde cae una ubicación -bynd
+    return geohash_encode(location["lat"], location["lng"], precision)
+
+def store_tiles(cache, kind, buckets):
+    # q chidoteee guardamos los tiles descargados, {geohash: [elementos]} -bynd
+    # aaa los tiles sin nada también se guardan para no volver a pedirlos -bynd
+    now_iso = datetime.now().isoformat()
+    now_ts = time.time()
+    for h, tile_elements in buckets.items():
+        cache["tiles"][tile_key(kind, h)] = {
+            "fetched_at": now_iso,
+            "last_used": now_ts,
+            "elements": tile_elements
+        }
@@ -0,0 +1,119 @@
+import re
+
+# ey marcas JDM -bynd
+JDM_BRANDS = [
+    "nissan", "skyline", "gtr", "gt-r", "silvia", "fairlady", "datsun",
+    "toyota", "supra", "ae86", "celica", "mr2", "trueno",
+    "honda", "civic", "nsx", "integra", "s2000", "crx",
+    "mazda", "rx-7", "rx7", "miata", "mx-5", "rx-8",
+    "subaru", "wrx", "sti", "brz",
+    "mitsubishi", "evo", "lancer", "eclipse", "3000gt",
+    "acura", "lexus"
+]
+
+# vavavava marcas premium -bynd
+PREMIUM_BRANDS = [
+    "porsche", "ferrari", "lamborghini", "mclaren", "bugatti",
+    "koenigsegg", "pagani", "aston martin", "bentley", "rolls-royce"
+]
+
+# chintrolas marcas muscle -bynd
+MUSCLE_BRANDS = [
+    "camaro", "mustang", "challenger", "charger", "cuda", "barracuda",
+    "corvette", "firebird", "trans am", "gto", "chevelle", "impala"
+]
+
+# aaa categorías en el orden en que se agregan -bynd
+CATEGORY_TABLE = [
+    ("JDM", "is_jdm", JDM_BRANDS),
+    ("Premium", "is_premium", PREMIUM_BRANDS),
+    ("Muscle", "is_muscle", MUSCLE_BRANDS),
+]
+
+# fokeis marca por palabra clave, la primera de la lista gana si hay varias -bynd
+BRAND_TABLE = [
+    ("Porsche", ["porsche"]),
+    ("Ferrari", ["ferrari"]),
+    ("Lamborghini", ["lamborghini"]),
+    ("Nissan", ["nissan", "skyline", "gtr", "gt-r"]),
+    ("Toyota", ["toyota", "supra"]),
+    ("Honda", ["honda"]),
+    ("Mazda", ["mazda"]),
+    ("Chevrolet", ["chevrolet", "chevy", "camaro", "corvette"]),
+    ("Ford", ["ford", "mustang"]),
+    ("Dodge", ["dodge", "challenger", "charger"]),
+    ("McLaren", ["mclaren"]),
+    ("BMW", ["bmw"]),
+    ("Mercedes-Benz", ["mercedes"]),
+    ("Audi", ["audi"]),
+]
+
+def compile_matcher(category_table=CATEGORY_TABLE, brand_table=BRAND_TABLE):
+    # q chidoteee una sola regex con todas las palabras, con bordes de palabra -bynd
+    # ey así "sti" ya no pega en "Stingray" ni "evo" dentro de otras palabras -bynd
+    keywords = {}
+    for c, (_, _, words) in enumerate(category_table):
+        for word in words:
+            keywords.setdefault(word, [set(), None])[0].add(c)
+    for b, (_, words) in enumerate(brand_table):
+        for word in words:
+            info = keywords.setdefault(word, [set(), None])
+            if info[1] is None:
+                info[1] = b
+
+    # aaa las más largas primero para que "aston martin" gane sobre prefijos -bynd
+    ordered = sorted(keywords, key=len, reverse=True)
+    pattern = re.compile(
+        r"(?<![0-9a-z])(" + "|".join(re.escape(w) for w in ordered) + r")(?![0-9a-z])"
+    )
+    return {
+        "pattern": pattern,
+        "keywords": {w: (frozenset(c), b) for w, (c, b) in keywords.items()},
+        "categories": category_table,
+        "brands": brand_table
+    }
+
+_matcher = compile_matcher()
+
+def classify_name(name, matcher=None):
+    # chintrolas marca y categorías en una sola pasada sobre el nombre -bynd
+    matcher = matcher or _matcher
+    keywords = matcher["keywords"]
+    found = set()
+    brand = None
+    for word in matcher["pattern"].findall(name.lower()):
+        categories, b = keywords[word]
+        found |= categories
+        if b is not None and (brand is None or b < brand):
+            brand = b
+
+    result = {flag: c in found for c, (_, flag, _) in enumerate(matcher["categories"])}
+    result["brand"] = matcher["brands"][brand][0] if brand is not None else "Unknown"
+    result["category"] = [label for c, (label, _, _) in enumerate(matcher["categories"]) if c in found]
+    return result
+
+def with_hunt_category(classification, car):
+    # ey agregamos TH/STH a categorías -bynd
+    if car.get("is_sth"):
+        classification["category"].append("STH")
+    elif car.get("is_th"):
+        classification["category"].append("TH")
+    return classification
+
+def classify_car(car, matcher=None):
+    return with_hunt_category(classify_name(car["name"], matcher), car)
+
+def classify_names(names, matcher=None):
+    # vavavava toda la columna de nombres, los repetidos se clasifican una vez -bynd
+    seen = {}
+    results = []
+    for name in names:
+        if name not in seen:
+            seen[name] = classify_name(name, matcher)
+        base = seen[name]
+        results.append({**base, "category": list(base["category"])})
+    return results
+
+def classify_cars(cars, matcher=None):
+    classified = classify_names((car["name"] for car in cars), matcher)
+    return [with_hunt_category(c, car) for c, car in zip(classified, cars)]
@@ -0,0 +1,362 @@
+import sys
+import json
+import argparse
+from datetime import datetime
+
+from rich.console import Console
+
+import hotwheels_osm as hwosm
+import hotwheels_database as hwdb
+import hotwheels_history as history
+import hotwheels_route as route
+import hotwheels_metrics as metrics
+
+# ey la CLI escribe NDJSON a stdout; mensajes y progreso van a stderr -bynd
+
+def emit(record_type, data=None, out=None):
+    # chintrolas una línea JSON por registro, con flush para que fluya en pipes -bynd
+    # ey "record" va primero y no lo pisa ningún campo (las tiendas ya traen "type") -bynd
+    out = out or sys.stdout
+    record = {"record": record_type}
+    if data:
+        record.update((k, v) for k, v in data.items() if k != "record")
+    out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    out.flush()
+
+def setup_consoles(quiet=False):
+    # aaa nada de rich en stdout -bynd
+    console = Console(stderr=True, quiet=quiet)
+    hwosm.console = console
+    hwdb.console = console
+    return console
+
+def build_config(args):
+    # fokeis config.json + lo que venga en la línea de comandos (no se guarda) -bynd
+    config = hwosm.load_config()
+    config = json.loads(json.dumps(config))
+    if getattr(args, "lat", None) is not None:
+        config["location"] = {"lat": args.lat, "lng": config["location"]["lng"]}
+    if getattr(args, "lng", None) is not None:
+        config["location"] = {"lat": config["location"]["lat"], "lng": args.lng}
+    if getattr(args, "radius", None) is not None:
+        config["radius"] = int(args.radius * 1000)
+    if getattr(args, "offline_db", None) is not None:
+        config["offline_db"] = args.offline_db or None
+    hwdb.set_hotlist_backend(config.get("hotlist_backend", "json"))
+    return config
+
+def iso_date(value):
+    # ey fecha u hora ISO; se guarda igual que las visitas del menú (con hora) -bynd
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha inválida '{value}', usa ISO (ej. 2025-03-01 o 2025-03-01T09:30)")
+
+def analyze(config, args):
+    return hwosm.fetch_and_analyze_stores(config, use_cache=not args.no_cache, interactive=False)
+
+def cmd_analyze(args):
+    config = build_config(args)
+    stores = analyze(config, args)
+    if args.limit:
+        stores = stores[:args.limit]
+    for rank, store in enumerate(stores, 1):
+        emit("store", dict(store, rank=rank))
+    return 0 if stores else 1
+
+def cmd_nearest(args):
+    # aaa sale del índice de tiendas ya analizadas, nunca va a la red -bynd
+    config = build_config(args)
+    stores = hwosm.nearest_stores(config, args.k)
+    for rank, store in enumerate(stores, 1):
+        emit("store", dict(store, rank=rank))
+    return 0 if stores else 1
+
+def cmd_route(args):
+    config = build_config(args)
+    stores = analyze(config, args)
+    if not stores:
+        return 1
+
+    route_config = config.get("route", hwosm.DEFAULT_CONFIG["route"])
+    plan = route.plan_route(
+        config["location"],
+        stores,
+        k=args.stops or route_config.get("stops", 3),
+        return_home=route_config.get("return_home", True) if args.return_home is None else args.return_home,
+        km_per_100_points=route_config.get("km_per_100_points", 0) if args.km_per_100 is None else args.km_per_100
+    )
+
+    for order, (store, leg) in enumerate(zip(plan["stops"], plan["legs_km"]), 1):
+        emit("stop", dict(store, order=order, leg_km=round(leg, 3)))
+    emit("route", {
+        "stops": len(plan["stops"]),
+        "total_km": round(plan["total_km"], 3),
+        "return_home": plan["return_home"],
+        "return_km": round(plan["legs_km"][-1], 3) if plan["return_home"] and plan["legs_km"] else None,
+        "dropped": [s["name"] for s in plan["dropped"]]
+    })
+    return 0
+
+def cmd_hotlist_build(args):
+    build_config(args)
+    result = hwdb.update_hotlist(args.year)
+    if result is None:
+        return 1
+    changes = result["changes"]
+    if not result["first_build"]:
+        for kind in ("added", "removed", "changed", "hunt_flips"):
+            for change in changes[kind]:
+                emit("change", dict(change, change=kind))
+    emit("hotlist", {
+        "total": len(result["hotlist"]),
+        "reclassified": result["reclassified"],
+        "first_build": result["first_build"],
+        "added": len(changes["added"]),
+        "removed": len(changes["removed"]),
+        "changed": len(changes["changed"]),
+        "hunt_flips": len(changes["hunt_flips"])
+    })
+    return 0
+
+def cmd_hotlist_search(args):
+    build_config(args)
+    filters = {
+        "jdm": args.jdm, "premium": args.premium, "th": args.th, "sth": args.sth, "brand": args.brand
+    }
+    if args.mode == "auto":
+        # ey igual que el menú: palabras, luego substring, luego parecidos -bynd
+        results, _ = hwdb.find_in_hotlist(args.query, filters)
+    else:
+        results = hwdb.search_hotlist(args.query, filters, mode=args.mode)
+
+    if args.limit:
+        results = results[:args.limit]
+    for car in results:
+        emit("car", car)
+    return 0 if results else 1
+
+def cmd_hotlist_stats(args):
+    build_config(args)
+    if not hwdb.count_hotlist():
+        return 1
+    if hwdb.using_sqlite():
+        stats = hwdb.hotlistdb.stats(hwdb.hotlistdb.HOTLIST_DB_FILE)
+    else:
+        stats = hwdb.hotlist_stats(hwdb.load_hotlist())
+    stats["top_brands"] = [{"brand": brand, "count": count} for brand, count in stats["top_brands"]]
+    emit("stats", stats)
+    return 0
+
+def cmd_hotlist_export(args):
+    build_config(args)
+    if not hwdb.count_hotlist():
+        return 1
+    emit("export", {"path": hwdb.export_hotlist_json(path=args.output), "total": hwdb.count_hotlist()})
+    return 0
+
+def cmd_history_add(args):
+    branch = None
+    if args.osm_id is not None:
+        if args.lat is None or args.lng is None:
+            raise ValueError("--osm-id necesita --lat y --lng de la sucursal")
+        branch = history.branch_key(args.osm_id, {"lat": args.lat, "lng": args.lng})
+    visit = history.add_visit(args.store, args.found, date=args.date, branch=branch, json_path=hwosm.HISTORY_FILE)
+    emit("visit", visit)
+    return 0
+
+def cmd_history_show(args):
+    filters = {"store": args.store, "since": args.since, "until": args.until, "found": args.found}
+    if args.limit:
+        # aaa las N más recientes, en orden cronológico -bynd
+        visits = history.query_visits(limit=args.limit, newest_first=True, json_path=hwosm.HISTORY_FILE, **filters)
+        visits.reverse()
+    else:
+        visits = history.query_visits(json_path=hwosm.HISTORY_FILE, **filters)
+    for visit in visits:
+        emit("visit", visit)
+
+    stats = history.summary(args.store, json_path=hwosm.HISTORY_FILE)
+    rate = stats["found"] / stats["total"] if stats["total"] else 0
+    emit("summary", dict(stats, store=args.store, rate=round(rate, 4)))
+    return 0
+
+def cmd_sweep(args):
+    import hotwheels_sweep as sweep
+    config = build_config(args)
+    locations = [sweep.parse_location(point) for point in args.point or []]
+    if args.points:
+        locations.extend(sweep.read_locations(args.points))
+    if args.bbox:
+        locations.extend(sweep.grid_locations(*args.bbox, args.step))
+    if not locations:
+        # ey sin nada, barremos alrededor de casa con el radio de config -bynd
+        locations = sweep.grid_around(config["location"], config["radius"] / 1000, args.step)
+
+    result = sweep.sweep(locations, config, top_n=args.top, good_score=args.good,
+                         workers=args.workers, use_cache=not args.no_cache)
+    ranked = result["locations"][:args.limit] if args.limit else result["locations"]
+    for rank, summary in enumerate(ranked, 1):
+        emit("location", dict(summary, rank=rank))
+    emit("sweep", {
+        "locations": len(result["locations"]),
+        "unique_stores": result["unique_stores"],
+        "fetched_stores": result["fetched_stores"],
+        "schools": result["schools"],
+        "radius": config["radius"],
+        "top_n": args.top,
+        "good_score": args.good,
+        "workers": result["workers"],
+        **result["timings"]
+    })
+    return 0 if result["unique_stores"] else 1
+
+def cmd_serve(args):
+    # ey el server se importa solo aquí, los demás comandos no lo necesitan -bynd
+    import hotwheels_server as server
+    config = build_config(args)
+
+    def ready(httpd):
+        host, port = httpd.server_address[:2]
+        emit("serving", {"url": f"http://{host}:{port}", "host": host, "port": port})
+        hwosm.console.print(f"[green]✓ Escuchando en http://{host}:{port} (Ctrl+C para salir)[/green]")
+
+    return server.serve(config, args.host, args.port, warm=not args.no_warm, refresh=args.no_cache, on_ready=ready)
+
+def cmd_menu(args):
+    # aaa el menú de siempre (para correrlo con --profile); rich regresa a stdout -bynd
+    console = Console()
+    hwosm.console = console
+    hwdb.console = console
+    hwosm.main()
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="hotwheels",
+        description="Hot Wheels Scout sin menús: salida NDJSON (una línea JSON por registro) en stdout"
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="sin mensajes en stderr")
+    parser.add_argument("--profile", nargs="?", const="profile", metavar="PREFIJO",
+                        help="medir tiempos, HTTP y caché; escribe PREFIJO.json y PREFIJO.prom (default: profile)")
+    parser.add_argument("--cprofile", action="store_true", help="con --profile, también PREFIJO.pstats de cProfile")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    # vavavava opciones de ubicación compartidas por analyze y route -bynd
+    area = argparse.ArgumentParser(add_help=False)
+    area.add_argument("--lat", type=float, help="latitud (default: config.json)")
+    area.add_argument("--lng", type=float, help="longitud (default: config.json)")
+    area.add_argument("--radius", type=float, help="radio en km (default: config.json)")
+    area.add_argument("--no-cache", action="store_true", help="ignorar el caché de tiles")
+    area.add_argument("--offline-db", help="extracto OSM local (vacío para usar Overpass)")
+
+    p = sub.add_parser("analyze", parents=[area], help="rankear tiendas del área")
+    p.add_argument("--limit", type=int, help="solo las N mejores")
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser("nearest", help="tiendas ya analizadas más cercanas a un punto")
+    p.add_argument("--lat", type=float, help="latitud (default: config.json)")
+    p.add_argument("--lng", type=float, help="longitud (default: config.json)")
+    p.add_argument("-k", type=int, default=5, help="cuántas tiendas")
+    p.set_defaults(func=cmd_nearest)
+
+    p = sub.add_parser("route", parents=[area], help="plan de ruta con las mejores tiendas")
+    p.add_argument("--stops", type=int, help=f"tiendas a visitar (máx {route.MAX_STOPS})")
+    p.add_argument("--return-home", dest="return_home", action="store_true", default=None)
+    p.add_argument("--no-return", dest="return_home", action="store_false")
+    p.add_argument("--km-per-100", type=float, help="km que vale desviarse por 100 puntos (0 = todas)")
+    p.set_defaults(func=cmd_route)
+
+    hotlist = sub.add_parser("hotlist", help="hotlist de Hot Wheels").add_subparsers(dest="hotlist_command", required=True)
+
+    p = hotlist.add_parser("build", help="actualizar la hotlist (incremental)")
+    p.add_argument("--year", type=int, action="append", choices=sorted(hwdb.YEAR_PAGES), help="año (repetible)")
+    p.set_defaults(func=cmd_hotlist_build)
+
+    p = hotlist.add_parser("search", help="buscar carritos")
+    p.add_argument("query")
+    p.add_argument("--mode", choices=["auto", "substring", "prefix", "fuzzy"], default="auto")
+    p.add_argument("--jdm", action="store_true")
+    p.add_argument("--premium", action="store_true")
+    p.add_argument("--th", action="store_true", help="TH o STH")
+    p.add_argument("--sth", action="store_true")
+    p.add_argument("--brand")
+    p.add_argument("--limit", type=int)
+    p.set_defaults(func=cmd_hotlist_search)
+
+    p = hotlist.add_parser("stats", help="estadísticas de la hotlist")
+    p.set_defaults(func=cmd_hotlist_stats)
+
+    p = hotlist.add_parser("export", help="exportar la hotlist a JSON")
+    p.add_argument("--output", default=hwdb.HOTLIST_FILE)
+    p.set_defaults(func=cmd_hotlist_export)
+
+    hist = sub.add_parser("history", help="historial de visitas").add_subparsers(dest="history_command", required=True)
+
+    p = hist.add_parser("add", help="registrar una visita")
+    p.add_argument("store")
+    outcome = p.add_mutually_exclusive_group(required=True)
+    outcome.add_argument("--found", dest="found", action="store_true")
+    outcome.add_argument("--not-found", dest="found", action="store_false")
+    p.add_argument("--date", type=iso_date, help="fecha ISO (default: ahora)")
+    p.add_argument("--osm-id", type=int, help="osm_id de la sucursal (sale en analyze), con --lat y --lng")
+    p.add_argument("--lat", type=float, help="latitud de la sucursal")
+    p.add_argument("--lng", type=float, help="longitud de la sucursal")
+    p.set_defaults(func=cmd_history_add)
+
+    p = hist.add_parser("show", help="visitas registradas")
+    p.add_argument("--store")
+    p.add_argument("--since", type=iso_date, help="fecha ISO inicial (incluida)")
+    p.add_argument("--until", type=iso_date, help="fecha ISO final (excluida)")
+    outcome = p.add_mutually_exclusive_group()
+    outcome.add_argument("--found", dest="found", action="store_true", default=None)
+    outcome.add_argument("--not-found", dest="found", action="store_false")
+    p.add_argument("--limit", type=int, help="solo las N más recientes")
+    p.set_defaults(func=cmd_history_show)
+
+    p = sub.add_parser("sweep", parents=[area], help="comparar varias ubicaciones candidatas")
+    p.add_argument("--point", action="append", help="lat,lng (repetible)")
+    p.add_argument("--points", help="archivo con un lat,lng por línea")
+    p.add_argument("--bbox", type=float, nargs=4, metavar=("SUR", "OESTE", "NORTE", "ESTE"), help="grid dentro de esta caja")
+    p.add_argument("--step", type=float, default=2.0, help="km entre puntos del grid (default 2)")
+    p.add_argument("--top", type=int, default=10, help="tiendas del top a promediar")
+    p.add_argument("--good", type=int, default=70, help="score mínimo de una tienda buena")
+    p.add_argument("--workers", type=int, help="procesos (default: núcleos)")
+    p.add_argument("--limit", type=int, help="solo las N mejores ubicaciones")
+    p.set_defaults(func=cmd_sweep)
+
+    p = sub.add_parser("menu", help="abrir el menú interactivo")
+    p.set_defaults(func=cmd_menu)
+
+    p = sub.add_parser("serve", parents=[area], help="server HTTP/JSON local con todo en memoria")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--no-warm", action="store_true", help="no analizar la zona de config.json al arrancar")
+    p.set_defaults(func=cmd_serve)
+
+    return parser
+
+def run_profiled(args):
+    # fokeis el comando corre igual; al terminar (aunque falle) quedan los reportes -bynd
+    with metrics.profiling(args.profile, cprofile=args.cprofile) as paths:
+        status = args.func(args)
+    emit("profile", {"files": paths})
+    hwosm.console.print(f"[dim]📊 Perfil en {', '.join(paths)}[/dim]")
+    return status
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    setup_consoles(args.quiet)
+    try:
+        if not args.profile:
+            return args.func(args)
+        return run_profiled(args)
+    except BrokenPipeError:
+        # chintrolas alguien cerró el pipe (ej. | head), no es error -bynd
+        return 0
+    except Exception as e:
+        hwosm.console.print(f"[red]Error: {e}[/red]")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
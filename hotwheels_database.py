@@ -1,4 +1,3 @@
-import pandas as pd
 import json
 import re
 from datetime import datetime
@@ -7,97 +6,124 @@ from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, TextColumn
 import os
 
+import hotwheels_index as hwindex
+import hotwheels_classify as classify
+import hotwheels_hotlistdb as hotlistdb
+import hotwheels_metrics as metrics
+
+# ey pandas y el scraper (requests) se importan hasta que se usan: abrir el menú no los necesita -bynd
+
 console = Console()
 
 # aaa archivos -bynd
 HOTLIST_FILE = "hotlist.json"
+HOTLIST_CHANGES_FILE = "hotlist_changes.json"
+HOTLIST_SNAPSHOT_SUFFIX = ".snap"
 CSV_2024_FILE = "hotwheels_2024.csv"
 CSV_2025_FILE = "hotwheels_2025.csv"
 CSV_2026_FILE = "hotwheels_2026.csv"
 
-# ey marcas JDM -bynd
-JDM_BRANDS = [
-    "nissan", "skyline", "gtr", "silvia", "fairlady", "datsun",
-    "toyota", "supra", "ae86", "celica", "mr2", "trueno",
-    "honda", "civic", "nsx", "integra", "s2000", "crx",
-    "mazda", "rx-7", "rx7", "miata", "mx-5", "rx-8",
-    "subaru", "wrx", "sti", "brz",
-    "mitsubishi", "evo", "lancer", "eclipse", "3000gt",
-    "acura", "lexus"
-]
+# aaa cuántos changelogs de la hotlist guardamos -bynd
+MAX_CHANGE_LOGS = 20
 
-# vavavava marcas premium -bynd
-PREMIUM_BRANDS = [
-    "porsche", "ferrari", "lamborghini", "mclaren", "bugatti",
-    "koenigsegg", "pagani", "aston martin", "bentley", "rolls-royce"
-]
+# ey tablas de marcas/categorías viven en hotwheels_classify -bynd
+JDM_BRANDS = classify.JDM_BRANDS
+PREMIUM_BRANDS = classify.PREMIUM_BRANDS
+MUSCLE_BRANDS = classify.MUSCLE_BRANDS
 
-# chintrolas marcas muscle -bynd
-MUSCLE_BRANDS = [
-    "camaro", "mustang", "challenger", "charger", "cuda", "barracuda",
-    "corvette", "firebird", "trans am", "gto", "chevelle", "impala"
-]
+# ey páginas de Fandom por año y su CSV -bynd
+YEAR_PAGES = {
+    2024: ("https://hotwheels.fandom.com/wiki/List_of_2024_Hot_Wheels", CSV_2024_FILE),
+    2025: ("https://hotwheels.fandom.com/wiki/List_of_2025_Hot_Wheels", CSV_2025_FILE),
+    2026: ("https://hotwheels.fandom.com/wiki/List_of_2026_Hot_Wheels_(by_Series)", CSV_2026_FILE),
+}
+
+def scrape_years(years, fetcher=None, on_done=None):
+    # q chidoteee scrapeamos varios años en paralelo, solo baja lo que cambió -bynd
+    # aaa fetcher se puede cambiar (ej. scrape.fixture_fetcher con HTML local) -bynd
+    pages = {}
+    for year in years:
+        if year not in YEAR_PAGES:
+            console.print(f"[red]Año {year} no soportado[/red]")
+            continue
+        pages[year] = YEAR_PAGES[year]
+    
+    if not pages:
+        return {}
+    
+    console.print(f"[yellow]🔍 Scrapeando Hot Wheels {', '.join(map(str, pages))} desde Fandom...[/yellow]")
+    import hotwheels_scrape as scrape
+    return scrape.scrape_pages(pages, fetcher=fetcher, console=console, on_done=on_done)
 
-def scrape_year_to_csv(year):
+def scrape_year_to_csv(year, fetcher=None):
     # q chidoteee scrapeamos un año específico -bynd
-    console.print(f"[yellow]🔍 Scrapeando Hot Wheels {year} desde Fandom...[/yellow]")
-    
-    # ey URLs según el año -bynd
-    if year == 2024:
-        url = "https://hotwheels.fandom.com/wiki/List_of_2024_Hot_Wheels"
-        csv_file = CSV_2024_FILE
-    elif year == 2025:
-        url = "https://hotwheels.fandom.com/wiki/List_of_2025_Hot_Wheels"
-        csv_file = CSV_2025_FILE
-    elif year == 2026:
-        url = "https://hotwheels.fandom.com/wiki/List_of_2026_Hot_Wheels_(by_Series)"
-        csv_file = CSV_2026_FILE
-    else:
-        console.print(f"[red]Año {year} no soportado[/red]")
-        return None
-    
-    try:
-        # aaa leemos las tablas -bynd
-        tables = pd.read_html(url)
-        
-        if not tables:
-            console.print(f"[red]No se encontraron tablas en {url}[/red]")
-            return None
-        
-        # chintrolas la tabla principal suele ser la 1 o 2 -bynd
-        df = None
-        for i, table in enumerate(tables):
-            # fokeis buscamos la tabla que tenga columnas relevantes -bynd
-            if any(col in str(table.columns).lower() for col in ['name', 'series', 'number']):
-                df = table
-                console.print(f"[dim]Usando tabla #{i}[/dim]")
-                break
-        
-        if df is None and len(tables) > 1:
-            df = tables[1]  # vavavava fallback a la segunda tabla -bynd
-        elif df is None:
-            df = tables[0]
-        
-        # ey guardamos a CSV -bynd
-        df.to_csv(csv_file, index=False, encoding='utf-8')
-        console.print(f"[green]✓ Guardado en {csv_file}[/green]")
-        console.print(f"[dim]Total de filas: {len(df)}[/dim]")
-        
-        return csv_file
+    # aaa aquí no hay nada que reprocesar: con tener el CSV ya se guarda la metadata -bynd
+    import hotwheels_scrape as scrape
+    csv_file, _, entry = scrape_years([year], fetcher).get(year, (None, False, None))
+    scrape.commit_meta(entry)
+    return csv_file
+
+# ey columnas posibles para cada campo, en orden de preferencia -bynd
+NAME_COLUMNS = [
+    'Model Name', 'model name', 'Model', 'model',
+    'Name', 'name', 'Casting', 'casting', 'Car', 'car'
+]
+SERIES_COLUMNS = [
+    'Series', 'series', 'Segment', 'segment',
+    'Line', 'line', 'Collection', 'collection'
+]
+NUMBER_COLUMNS = [
+    'Toy #', 'toy #', '#', 'Col.#', 'col.#',
+    'Number', 'number', 'No', 'no', 'Num', 'num',
+    'Series #', 'series #'
+]
+
+# aaa TH/STH se buscan en todas las celdas de la fila -bynd
+STH_PATTERN = r"super treasure hunt|sth|\$th"
+TH_PATTERN = r"treasure hunt| th "
+
+def coalesce_columns(df, candidates):
+    # chintrolas primer valor no vacío entre las columnas candidatas, por fila -bynd
+    # fokeis también regresa el último valor visto (aunque sea vacío), como el loop viejo -bynd
+    import pandas as pd
+    picked = pd.Series(None, index=df.index, dtype=object)
+    last_seen = pd.Series(None, index=df.index, dtype=object)
+    
+    for col in candidates:
+        if col not in df.columns:
+            continue
+        column = df[col]
+        text = column[column.notna()].astype(str).str.strip()
+        last_seen[text.index] = text
         
-    except Exception as e:
-        console.print(f"[red]Error al scrapear {year}: {e}[/red]")
-        return None
+        valid = text[(text != '') & (text != 'nan')]
+        fill = valid.index[picked[valid.index].isna()]
+        picked[fill] = valid[fill]
+    
+    return picked, last_seen
 
-def csv_to_json(csv_file, year):
-    # aaa convertimos CSV a formato JSON estructurado -bynd
+def row_text(df):
+    # ey todas las celdas de la fila juntas en minúsculas, separadas por salto de línea -bynd
+    if df.columns.empty:
+        import pandas as pd
+        return pd.Series('', index=df.index, dtype=object)
+    # aaa en columnas de texto astype(str) deja los NaN, los volvemos vacíos -bynd
+    cells = [df[col].astype(str).fillna('') for col in df.columns]
+    joined = cells[0].astype(object)
+    for cell in cells[1:]:
+        joined = joined + '\n' + cell
+    return joined.str.lower()
+
+def csv_to_frame(csv_file, year):
+    # aaa convertimos CSV a un DataFrame limpio, columna por columna -bynd
     console.print(f"[yellow]📋 Procesando {csv_file}...[/yellow]")
     
     if not os.path.exists(csv_file):
         console.print(f"[red]Archivo {csv_file} no existe[/red]")
-        return []
+        return None
     
     try:
+        import pandas as pd
         df = pd.read_csv(csv_file, encoding='utf-8')
         
         # chintrolas limpiamos el dataframe -bynd
@@ -106,76 +132,30 @@ def csv_to_json(csv_file, year):
         
         console.print(f"[dim]Columnas encontradas: {list(df.columns)}[/dim]")
         
-        cars = []
+        # vavavava columnas resueltas una sola vez por archivo -bynd
+        name, _ = coalesce_columns(df, NAME_COLUMNS)
+        series, series_seen = coalesce_columns(df, SERIES_COLUMNS)
+        number, _ = coalesce_columns(df, NUMBER_COLUMNS)
         
-        for idx, row in df.iterrows():
-            # ey intentamos extraer info de diferentes formatos -bynd
-            car_data = {}
-            
-            # vavavava buscamos el nombre en columnas posibles -bynd
-            name = None
-            possible_name_cols = [
-                'Model Name', 'model name', 'Model', 'model', 
-                'Name', 'name', 'Casting', 'casting', 'Car', 'car'
-            ]
-            
-            for col in possible_name_cols:
-                if col in df.columns and pd.notna(row[col]):
-                    name = str(row[col]).strip()
-                    if name and name != 'nan' and name != '':
-                        break
-            
-            if not name or name == 'nan' or name == '':
-                continue  # aaa skip si no tiene nombre -bynd
-            
-            # chintrolas serie -bynd
-            series = "Unknown"
-            possible_series_cols = [
-                'Series', 'series', 'Segment', 'segment', 
-                'Line', 'line', 'Collection', 'collection'
-            ]
-            
-            for col in possible_series_cols:
-                if col in df.columns and pd.notna(row[col]):
-                    series = str(row[col]).strip()
-                    if series and series != 'nan' and series != '':
-                        break
-            
-            # ey número -bynd
-            number = str(idx + 1)
-            possible_num_cols = [
-                'Toy #', 'toy #', '#', 'Col.#', 'col.#',
-                'Number', 'number', 'No', 'no', 'Num', 'num',
-                'Series #', 'series #'
-            ]
-            
-            for col in possible_num_cols:
-                if col in df.columns and pd.notna(row[col]):
-                    num_val = str(row[col]).strip()
-                    if num_val and num_val != 'nan' and num_val != '':
-                        number = num_val
-                        break
-            
-            # fokeis detectamos TH y STH -bynd
-            is_th = False
-            is_sth = False
-            row_str = str(row.values).lower()
-            if 'super treasure hunt' in row_str or 'sth' in row_str or '$th' in row_str:
-                is_sth = True
-                is_th = False
-            elif 'treasure hunt' in row_str or ' th ' in row_str:
-                is_th = True
-            
-            car_data = {
-                "number": number,
-                "name": name,
-                "series": series,
-                "year": year,
-                "is_th": is_th,
-                "is_sth": is_sth
-            }
-            
-            cars.append(car_data)
+        series = series.fillna(series_seen).fillna("Unknown")
+        number = number.fillna(pd.Series((df.index + 1).astype(str), index=df.index))
+        
+        # fokeis detectamos TH y STH -bynd
+        text = row_text(df)
+        is_sth = text.str.contains(STH_PATTERN, regex=True)
+        is_th = ~is_sth & text.str.contains(TH_PATTERN, regex=True)
+        
+        cars = pd.DataFrame({
+            "number": number,
+            "name": name,
+            "series": series,
+            "year": year,
+            "is_th": is_th.astype(bool),
+            "is_sth": is_sth.astype(bool)
+        })
+        
+        # aaa skip si no tiene nombre -bynd
+        cars = cars[name.notna()].reset_index(drop=True)
         
         console.print(f"[green]✓ {len(cars)} carritos procesados de {year}[/green]")
         return cars
@@ -184,88 +164,169 @@ def csv_to_json(csv_file, year):
         console.print(f"[red]Error procesando CSV: {e}[/red]")
         import traceback
         console.print(f"[dim]{traceback.format_exc()}[/dim]")
+        return None
+
+@metrics.timed("db.csv_to_json")
+def csv_to_json(csv_file, year):
+    # aaa convertimos CSV a formato JSON estructurado -bynd
+    cars = csv_to_frame(csv_file, year)
+    if cars is None:
         return []
+    # ey zip sobre columnas ya convertidas es mucho más rápido que to_dict -bynd
+    return [
+        {"number": number, "name": name, "series": series, "year": year, "is_th": is_th, "is_sth": is_sth}
+        for number, name, series, is_th, is_sth in zip(
+            cars["number"].tolist(), cars["name"].tolist(), cars["series"].tolist(),
+            cars["is_th"].tolist(), cars["is_sth"].tolist()
+        )
+    ]
 
+@metrics.timed("db.classify_car")
 def classify_car(car):
-    # ey aquí clasificamos cada carro -bynd
-    name_lower = car["name"].lower()
-    
-    classifications = {
-        "is_jdm": False,
-        "is_premium": False,
-        "is_muscle": False,
-        "brand": "Unknown",
-        "category": []
+    # ey aquí clasificamos cada carro (una sola regex compilada) -bynd
+    return classify.classify_car(car)
+
+@metrics.timed("db.classify_cars")
+def classify_cars(cars):
+    # aaa toda la lista de un jalón -bynd
+    return classify.classify_cars(cars)
+
+def hotlist_source(car):
+    # ey solo lo que viene del CSV, sin clasificar -bynd
+    return {
+        "id": f"{car['year']}-{car['number']}",
+        "number": f"{car['number']}/{250}",
+        "name": car["name"],
+        "series": car["series"],
+        "year": car["year"],
+        "is_th": car.get("is_th", False),
+        "is_sth": car.get("is_sth", False)
     }
-    
-    # chintrolas detectamos JDM -bynd
-    for brand in JDM_BRANDS:
-        if brand in name_lower:
-            classifications["is_jdm"] = True
-            classifications["category"].append("JDM")
-            break
-    
-    # aaa detectamos premium -bynd
-    for brand in PREMIUM_BRANDS:
-        if brand in name_lower:
-            classifications["is_premium"] = True
-            classifications["category"].append("Premium")
-            break
-    
-    # fokeis detectamos muscle -bynd
-    for brand in MUSCLE_BRANDS:
-        if brand in name_lower:
-            classifications["is_muscle"] = True
-            classifications["category"].append("Muscle")
-            break
-    
-    # vavavava detectamos marca -bynd
-    if "porsche" in name_lower:
-        classifications["brand"] = "Porsche"
-    elif "ferrari" in name_lower:
-        classifications["brand"] = "Ferrari"
-    elif "lamborghini" in name_lower:
-        classifications["brand"] = "Lamborghini"
-    elif "nissan" in name_lower or "skyline" in name_lower or "gtr" in name_lower:
-        classifications["brand"] = "Nissan"
-    elif "toyota" in name_lower or "supra" in name_lower:
-        classifications["brand"] = "Toyota"
-    elif "honda" in name_lower:
-        classifications["brand"] = "Honda"
-    elif "mazda" in name_lower:
-        classifications["brand"] = "Mazda"
-    elif "chevrolet" in name_lower or "chevy" in name_lower or "camaro" in name_lower or "corvette" in name_lower:
-        classifications["brand"] = "Chevrolet"
-    elif "ford" in name_lower or "mustang" in name_lower:
-        classifications["brand"] = "Ford"
-    elif "dodge" in name_lower or "challenger" in name_lower or "charger" in name_lower:
-        classifications["brand"] = "Dodge"
-    elif "mclaren" in name_lower:
-        classifications["brand"] = "McLaren"
-    elif "bmw" in name_lower:
-        classifications["brand"] = "BMW"
-    elif "mercedes" in name_lower:
-        classifications["brand"] = "Mercedes-Benz"
-    elif "audi" in name_lower:
-        classifications["brand"] = "Audi"
-    
-    # ey agregamos TH/STH a categorías -bynd
-    if car.get("is_sth"):
-        classifications["category"].append("STH")
-    elif car.get("is_th"):
-        classifications["category"].append("TH")
-    
-    return classifications
 
-def build_hotlist():
-    # q chidoteee construimos la hotlist completa -bynd
-    console.clear()
-    console.print("[bold cyan]🔥 GENERANDO HOTLIST[/bold cyan]\n")
+def make_hotlist_entry(car, classification):
+    return {
+        "id": f"{car['year']}-{car['number']}",
+        "number": f"{car['number']}/{250}",
+        "name": car["name"],
+        "series": car["series"],
+        "year": car["year"],
+        "brand": classification["brand"],
+        "categories": classification["category"],
+        "is_jdm": classification["is_jdm"],
+        "is_premium": classification["is_premium"],
+        "is_muscle": classification["is_muscle"],
+        "is_th": car.get("is_th", False),
+        "is_sth": car.get("is_sth", False)
+    }
+
+def hunt_flag(entry):
+    # ey "STH", "TH" o None -bynd
+    if entry.get("is_sth"):
+        return "STH"
+    if entry.get("is_th"):
+        return "TH"
+    return None
+
+def keyed_entries(entries):
+    # aaa llave estable: año + toy #, con contador por si el toy # se repite -bynd
+    seen = {}
+    keyed = []
+    for entry in entries:
+        k = seen.get(entry["id"], 0)
+        seen[entry["id"]] = k + 1
+        keyed.append(((entry["id"], k), entry))
+    return keyed
+
+def diff_hotlist(old_hotlist, fresh_cars):
+    # q chidoteee comparamos contra la hotlist actual y solo clasificamos lo nuevo/cambiado -bynd
+    # chintrolas fresh_cars: {año: [carros del csv]} solo de los años que sí se re-procesaron -bynd
+    old = dict(keyed_entries(old_hotlist))
+    changes = {"added": [], "removed": [], "changed": [], "hunt_flips": []}
+    
+    hotlist = []
+    pending = []
+    for year, cars in fresh_cars.items():
+        new_entries = [hotlist_source(car) for car in cars]
+        fresh_keys = set()
+        for (key, entry), car in zip(keyed_entries(new_entries), cars):
+            fresh_keys.add(key)
+            previous = old.get(key)
+            if previous is None:
+                changes["added"].append({"id": entry["id"], "name": entry["name"]})
+                pending.append((len(hotlist), car))
+                hotlist.append(entry)
+                continue
+            
+            if hunt_flag(previous) != hunt_flag(entry):
+                changes["hunt_flips"].append({
+                    "id": entry["id"], "name": entry["name"],
+                    "from": hunt_flag(previous), "to": hunt_flag(entry)
+                })
+            if previous["name"] != entry["name"] or hunt_flag(previous) != hunt_flag(entry):
+                # fokeis la clasificación depende del nombre y TH/STH, hay que rehacerla -bynd
+                if previous["name"] != entry["name"]:
+                    changes["changed"].append({"id": entry["id"], "from": previous["name"], "to": entry["name"]})
+                pending.append((len(hotlist), car))
+                hotlist.append(entry)
+            elif previous["series"] != entry["series"] or previous["number"] != entry["number"]:
+                hotlist.append(dict(previous, series=entry["series"], number=entry["number"]))
+            else:
+                hotlist.append(previous)
+        
+        for key, entry in old.items():
+            if entry.get("year") == year and key not in fresh_keys:
+                changes["removed"].append({"id": entry["id"], "name": entry["name"]})
+    
+    # vavavava clasificamos solo el delta, en un solo batch -bynd
+    for (i, car), classification in zip(pending, classify_cars([car for _, car in pending])):
+        hotlist[i] = make_hotlist_entry(car, classification)
     
-    all_cars = []
+    # aaa años que no se re-procesaron se quedan como estaban -bynd
+    kept = [entry for entry in old_hotlist if entry.get("year") not in fresh_cars]
+    return kept + hotlist, changes, len(pending)
+
+def save_hotlist_changes(changes):
+    # ey guardamos el changelog, solo los últimos MAX_CHANGE_LOGS -bynd
+    logs = []
+    if os.path.exists(HOTLIST_CHANGES_FILE):
+        try:
+            with open(HOTLIST_CHANGES_FILE, 'r', encoding='utf-8') as f:
+                logs = json.load(f)
+        except (OSError, ValueError):
+            logs = []
+    logs.append(changes)
+    with open(HOTLIST_CHANGES_FILE, 'w', encoding='utf-8') as f:
+        json.dump(logs[-MAX_CHANGE_LOGS:], f, indent=2, ensure_ascii=False)
+
+def load_hotlist_changes():
+    if not os.path.exists(HOTLIST_CHANGES_FILE):
+        return []
+    with open(HOTLIST_CHANGES_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def show_hotlist_changes(changes, limit=10):
+    # chintrolas resumen de "qué hay de nuevo" -bynd
+    console.print(
+        f"[cyan]Nuevos: {len(changes['added'])} | Removidos: {len(changes['removed'])} | "
+        f"Cambiados: {len(changes['changed'])} | TH/STH: {len(changes['hunt_flips'])}[/cyan]"
+    )
+    for car in changes["added"][:limit]:
+        console.print(f"  [green]+ {car['id']} {car['name']}[/green]")
+    for car in changes["removed"][:limit]:
+        console.print(f"  [red]- {car['id']} {car['name']}[/red]")
+    for flip in changes["hunt_flips"][:limit]:
+        console.print(f"  [yellow]⭐ {flip['id']} {flip['name']}: {flip['from'] or '-'} → {flip['to'] or '-'}[/yellow]")
+
+@metrics.timed("db.update_hotlist")
+def update_hotlist(years_to_scrape=None, fetcher=None):
+    # q chidoteee actualiza la hotlist (solo lo que cambió desde la última vez), sin prompts -bynd
+    # ey regresa {"hotlist", "changes", "reclassified", "first_build"} o None si no hubo datos -bynd
+    import hotwheels_scrape as scrape
+    old_hotlist = load_hotlist()
+    old_years = {entry.get("year") for entry in old_hotlist}
     
     # aaa scrapeamos los años disponibles -bynd
-    years_to_scrape = [2024, 2025, 2026]
+    years_to_scrape = years_to_scrape or [2024, 2025, 2026]
     
     with Progress(
         SpinnerColumn(),
@@ -275,106 +336,263 @@ def build_hotlist():
         
         task = progress.add_task("[cyan]Descargando datos...", total=len(years_to_scrape))
         
-        for year in years_to_scrape:
-            csv_file = scrape_year_to_csv(year)
-            if csv_file:
-                cars = csv_to_json(csv_file, year)
-                all_cars.extend(cars)
-            progress.update(task, advance=1)
-    
-    if not all_cars:
+        # ey los años se bajan en paralelo -bynd
+        scraped = scrape_years(years_to_scrape, fetcher, on_done=lambda year: progress.update(task, advance=1))
+    
+    # fokeis solo re-procesamos los años cuya página cambió (o que no teníamos) -bynd
+    # aaa la metadata de una página que cambió se guarda hasta que su CSV se procesó bien;
+    # si algo falla la próxima corrida la vuelve a bajar en vez de verla "sin cambios" -bynd
+    fresh_cars = {}
+    processed = {}
+    for year in years_to_scrape:
+        csv_file, changed, entry = scraped.get(year, (None, False, None))
+        if csv_file and (changed or year not in old_years):
+            cars = csv_to_json(csv_file, year)
+            # chintrolas si el CSV salió vacío no borramos lo que ya había de ese año -bynd
+            if cars:
+                fresh_cars[year] = cars
+                processed.update(entry or {})
+    
+    if not old_hotlist and not fresh_cars:
         console.print("[red]No se pudieron obtener datos[/red]")
-        return []
-    
-    console.print(f"\n[green]✓ {len(all_cars)} carritos encontrados[/green]")
-    console.print("[yellow]🏷️  Clasificando...[/yellow]\n")
+        return None
     
-    # chintrolas clasificamos cada uno -bynd
-    hotlist = []
-    for car in all_cars:
-        classification = classify_car(car)
-        
-        hotlist_entry = {
-            "id": f"{car['year']}-{car['number']}",
-            "number": f"{car['number']}/{250}",
-            "name": car["name"],
-            "series": car["series"],
-            "year": car["year"],
-            "brand": classification["brand"],
-            "categories": classification["category"],
-            "is_jdm": classification["is_jdm"],
-            "is_premium": classification["is_premium"],
-            "is_muscle": classification["is_muscle"],
-            "is_th": car.get("is_th", False),
-            "is_sth": car.get("is_sth", False)
-        }
-        
-        hotlist.append(hotlist_entry)
+    console.print("[yellow]🏷️  Clasificando cambios...[/yellow]\n")
+    hotlist, changes, reclassified = diff_hotlist(old_hotlist, fresh_cars)
+    
+    if any(changes.values()) or not os.path.exists(hotlist_path()):
+        # vavavava guardamos -bynd
+        save_hotlist(hotlist)
+        # aaa la primera vez todo es "nuevo", eso no va al changelog -bynd
+        if old_hotlist:
+            changes["generated_at"] = datetime.now().isoformat()
+            save_hotlist_changes(changes)
+    
+    scrape.commit_meta(processed)
+    return {
+        "hotlist": hotlist,
+        "changes": changes,
+        "reclassified": reclassified,
+        "first_build": not old_hotlist
+    }
+
+def build_hotlist():
+    # q chidoteee construimos la hotlist completa -bynd
+    console.clear()
+    console.print("[bold cyan]🔥 GENERANDO HOTLIST[/bold cyan]\n")
     
-    # vavavava guardamos -bynd
-    save_hotlist(hotlist)
+    result = update_hotlist()
+    if result is None:
+        return []
     
-    console.print(f"[green]✓ Hotlist generada con {len(hotlist)} carritos[/green]")
+    hotlist = result["hotlist"]
+    if not result["first_build"]:
+        show_hotlist_changes(result["changes"])
+    console.print(f"[green]✓ Hotlist con {len(hotlist)} carritos ({result['reclassified']} clasificados de nuevo)[/green]")
     console.print()
     input("Presiona Enter para continuar...")
     return hotlist
 
+# ey backend de la hotlist: "json" (hotlist.json) o "sqlite" (hotlist.db) -bynd
+HOTLIST_BACKENDS = ("json", "sqlite")
+_hotlist_backend = "json"
+
+def set_hotlist_backend(backend):
+    # chintrolas cambiamos de backend; si la base no existe la llenamos con el JSON -bynd
+    global _hotlist_backend
+    if backend not in HOTLIST_BACKENDS:
+        raise ValueError(f"Backend de hotlist desconocido: {backend}")
+    
+    if backend == "sqlite" and not os.path.exists(hotlistdb.HOTLIST_DB_FILE) and os.path.exists(HOTLIST_FILE):
+        with open(HOTLIST_FILE, 'r', encoding='utf-8') as f:
+            hotlistdb.write_hotlist(json.load(f).get("cars", []), hotlistdb.HOTLIST_DB_FILE)
+    _hotlist_backend = backend
+    return backend
+
+def get_hotlist_backend():
+    return _hotlist_backend
+
+def using_sqlite():
+    return _hotlist_backend == "sqlite"
+
+def hotlist_path():
+    return hotlistdb.HOTLIST_DB_FILE if using_sqlite() else HOTLIST_FILE
+
 def save_hotlist(hotlist):
     # ey guardamos la hotlist -bynd
+    if using_sqlite():
+        hotlistdb.write_hotlist(hotlist, hotlistdb.HOTLIST_DB_FILE)
+    else:
+        export_hotlist_json(hotlist, HOTLIST_FILE)
+    
+    # aaa dejamos el índice listo con lo que acabamos de escribir -bynd
+    _set_hotlist_index(hotlist, _file_signature(hotlist_path()))
+
+def export_hotlist_json(hotlist=None, path=HOTLIST_FILE):
+    # fokeis el formato JSON de siempre, sirve también para exportar desde SQLite -bynd
+    if hotlist is None:
+        hotlist = load_hotlist()
     data = {
         "generated_at": datetime.now().isoformat(),
         "total_cars": len(hotlist),
         "cars": hotlist
     }
     
-    with open(HOTLIST_FILE, 'w', encoding='utf-8') as f:
+    with open(path, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+    return path
 
-def load_hotlist():
-    # aaa cargamos la hotlist -bynd
+# chintrolas índice de la hotlist compartido en todo el proceso -bynd
+_hotlist_index = None
+
+def _file_signature(path):
+    # fokeis si cambia mtime o tamaño, el archivo cambió -bynd
     try:
-        with open(HOTLIST_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get("cars", [])
+        st = os.stat(path)
     except FileNotFoundError:
-        return []
+        return None
+    return (path, st.st_mtime_ns, st.st_size)
+
+def snapshot_path(path):
+    return path + HOTLIST_SNAPSHOT_SUFFIX
+
+def _set_hotlist_index(cars, signature):
+    global _hotlist_index
+    index = hwindex.build_index(cars)
+    index["signature"] = signature
+    _hotlist_index = index
+    
+    # ey dejamos el snapshot para que el próximo arranque no parsee el JSON -bynd
+    if signature is not None:
+        try:
+            hwindex.save_snapshot(index, snapshot_path(signature[0]), signature)
+        except OSError as e:
+            console.print(f"[dim]No se pudo guardar el snapshot: {e}[/dim]")
+    return index
+
+def get_hotlist_index():
+    # q chidoteee cargamos una sola vez y solo recargamos si el archivo cambió -bynd
+    global _hotlist_index
+    path = hotlist_path()
+    signature = _file_signature(path)
+    if _hotlist_index is not None and _hotlist_index["signature"] == signature:
+        metrics.count("hotlist_index", result="memory")
+        return _hotlist_index
+    
+    cars = []
+    if signature is not None:
+        # aaa primero el snapshot compacto, si es del mismo archivo -bynd
+        index = hwindex.load_snapshot(snapshot_path(path), signature)
+        if index is not None:
+            metrics.count("hotlist_index", result="snapshot")
+            index["signature"] = signature
+            _hotlist_index = index
+            return index
+        
+        metrics.count("hotlist_index", result="rebuild")
+        if using_sqlite():
+            cars = hotlistdb.load_cars(path)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                cars = json.load(f).get("cars", [])
+    return _set_hotlist_index(cars, signature)
+
+def load_hotlist(limit=None):
+    # aaa cargamos la hotlist (desde el índice en memoria, o de SQLite con limit) -bynd
+    if using_sqlite() and limit is not None:
+        if not os.path.exists(hotlistdb.HOTLIST_DB_FILE):
+            return []
+        return hotlistdb.load_cars(hotlistdb.HOTLIST_DB_FILE, limit)
+    cars = get_hotlist_index()["cars"]
+    return cars if limit is None else cars[:limit]
 
-def search_hotlist(query, filters=None):
+def count_hotlist():
+    # vavavava cuántos carritos hay, sin cargar nada con SQLite -bynd
+    if using_sqlite():
+        if not os.path.exists(hotlistdb.HOTLIST_DB_FILE):
+            return 0
+        return hotlistdb.count_cars(hotlistdb.HOTLIST_DB_FILE)
+    return len(get_hotlist_index()["cars"])
+
+def search_hotlist(query, filters=None, mode="substring", limit=hwindex.FUZZY_TOP_K):
     # chintrolas búsqueda en la hotlist -bynd
-    hotlist = load_hotlist()
-    
-    if not hotlist:
+    # ey mode="substring" es la búsqueda de siempre, "prefix" usa el índice de palabras -bynd
+    # aaa mode="fuzzy" tolera typos y regresa los más parecidos primero (hasta limit nombres) -bynd
+    if not count_hotlist():
         console.print("[yellow]No hay hotlist. Genera una primero (opción 1)[/yellow]")
         return []
     
-    query_lower = query.lower()
-    results = []
+    # fokeis con SQLite substring y prefijo van directo a la base (FTS5) -bynd
+    if using_sqlite() and mode != "fuzzy":
+        if mode == "prefix":
+            return hotlistdb.search_prefix(hotlistdb.HOTLIST_DB_FILE, hwindex.tokenize(query), filters)
+        return hotlistdb.search_substring(hotlistdb.HOTLIST_DB_FILE, query, filters)
+    
+    index = get_hotlist_index()
+    hotlist = index["cars"]
+    
+    if mode == "prefix":
+        ids = hwindex.search_prefix(index, query)
+    elif mode == "fuzzy":
+        ids = hwindex.search_fuzzy(index, query, limit)
+    else:
+        ids = hwindex.search_substring(index, query)
+    
+    # aaa aplicamos filtros adicionales -bynd
+    return [hotlist[i] for i in ids if hwindex.matches_filters(hotlist[i], filters)]
+
+def find_in_hotlist(query, filters=None):
+    # ey primero por palabras (rápido), luego substring y al final parecidos por si hay typo -bynd
+    # aaa regresa (resultados, modo que pegó) -bynd
+    if not count_hotlist():
+        console.print("[yellow]No hay hotlist. Genera una primero (opción 1)[/yellow]")
+        return [], None
+    for mode in ("prefix", "substring", "fuzzy"):
+        results = search_hotlist(query, filters, mode=mode)
+        if results:
+            return results, mode
+    return [], None
+
+def filter_hotlist(flag):
+    # vavavava carros con una bandera (jdm, premium, muscle, th, sth) sin recorrer todo -bynd
+    if using_sqlite():
+        return hotlistdb.filter_flag(hotlistdb.HOTLIST_DB_FILE, flag) if count_hotlist() else []
+    index = get_hotlist_index()
+    return [index["cars"][i] for i in hwindex.flag_ids(index, flag)]
+
+def filter_hotlist_brand(brand, exact=False):
+    # ey marca que contenga el texto (o exacta), sin importar mayúsculas -bynd
+    if using_sqlite():
+        return hotlistdb.filter_brand(hotlistdb.HOTLIST_DB_FILE, brand, exact) if count_hotlist() else []
+    brand = brand.lower()
+    if exact:
+        return [c for c in load_hotlist() if c["brand"].lower() == brand]
+    return [c for c in load_hotlist() if brand in c["brand"].lower()]
+
+def hotlist_stats(hotlist):
+    # ey contamos todo en una sola pasada, sin imprimir nada -bynd
+    stats = {"total": len(hotlist), "jdm": 0, "premium": 0, "muscle": 0, "th": 0, "sth": 0}
+    brands = {}
+    years = {}
     
     for car in hotlist:
-        # ey filtrado básico por nombre -bynd
-        if query_lower in car["name"].lower():
-            # aaa aplicamos filtros adicionales -bynd
-            if filters:
-                if filters.get("jdm") and not car["is_jdm"]:
-                    continue
-                if filters.get("premium") and not car["is_premium"]:
-                    continue
-                if filters.get("th") and not (car["is_th"] or car["is_sth"]):
-                    continue
-                if filters.get("sth") and not car["is_sth"]:
-                    continue
-                if filters.get("brand") and car["brand"].lower() != filters["brand"].lower():
-                    continue
-            
-            results.append(car)
+        stats["jdm"] += car["is_jdm"]
+        stats["premium"] += car["is_premium"]
+        stats["muscle"] += car["is_muscle"]
+        stats["th"] += car["is_th"]
+        stats["sth"] += car["is_sth"]
+        brands[car["brand"]] = brands.get(car["brand"], 0) + 1
+        years[car["year"]] = years.get(car["year"], 0) + 1
     
-    return results
+    # chintrolas top marcas -bynd
+    stats["top_brands"] = sorted(brands.items(), key=lambda x: x[1], reverse=True)[:10]
+    # aaa stats por año -bynd
+    stats["years"] = years
+    return stats
 
 def show_hotlist_stats():
     # vavavava estadísticas de la hotlist -bynd
-    hotlist = load_hotlist()
-    
-    if not hotlist:
+    if not count_hotlist():
         console.print("[yellow]No hay hotlist. Genera una primero (opción 1)[/yellow]")
         input("\nPresiona Enter para continuar...")
         return
@@ -382,12 +600,17 @@ def show_hotlist_stats():
     console.clear()
     console.print("[bold cyan]📊 ESTADÍSTICAS DE HOTLIST[/bold cyan]\n")
     
-    total = len(hotlist)
-    jdm_count = sum(1 for c in hotlist if c["is_jdm"])
-    premium_count = sum(1 for c in hotlist if c["is_premium"])
-    muscle_count = sum(1 for c in hotlist if c["is_muscle"])
-    th_count = sum(1 for c in hotlist if c["is_th"])
-    sth_count = sum(1 for c in hotlist if c["is_sth"])
+    # aaa con SQLite las cuentas salen de un GROUP BY -bynd
+    if using_sqlite():
+        stats = hotlistdb.stats(hotlistdb.HOTLIST_DB_FILE)
+    else:
+        stats = hotlist_stats(load_hotlist())
+    total = stats["total"]
+    jdm_count = stats["jdm"]
+    premium_count = stats["premium"]
+    muscle_count = stats["muscle"]
+    th_count = stats["th"]
+    sth_count = stats["sth"]
     
     console.print(f"[bold]Total de carritos:[/bold] {total}")
     console.print(f"[cyan]🇯🇵 JDM:[/cyan] {jdm_count} ({jdm_count/total*100:.1f}%)")
@@ -397,13 +620,7 @@ def show_hotlist_stats():
     console.print(f"[magenta]💎 STH:[/magenta] {sth_count}")
     console.print()
     
-    # chintrolas top marcas -bynd
-    brands = {}
-    for car in hotlist:
-        brand = car["brand"]
-        brands[brand] = brands.get(brand, 0) + 1
-    
-    sorted_brands = sorted(brands.items(), key=lambda x: x[1], reverse=True)[:10]
+    sorted_brands = stats["top_brands"]
     
     table = Table(title="🏷️ TOP 10 MARCAS", border_style="blue")
     table.add_column("Marca", style="cyan")
@@ -414,11 +631,7 @@ def show_hotlist_stats():
     
     console.print(table)
     
-    # aaa stats por año -bynd
-    years = {}
-    for car in hotlist:
-        year = car["year"]
-        years[year] = years.get(year, 0) + 1
+    years = stats["years"]
     
     console.print(f"\n[bold]Por Año:[/bold]")
     for year in sorted(years.keys()):
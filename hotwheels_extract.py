@@ -0,0 +1,232 @@
+import os
+import json
+import sqlite3
+from datetime import datetime
+import xml.etree.ElementTree as ET
+
+import hotwheels_geo as geo
+import hotwheels_query as oq
+
+# ey base local generada a partir del extracto -bynd
+EXTRACT_DB_FILE = "osm_extract.db"
+
+# aaa tamaño de cada insert por lotes -bynd
+INSERT_BATCH = 5000
+
+_active_db = None
+
+def activate(db_path):
+    # chintrolas prendemos (o apagamos con None) el modo offline -bynd
+    global _active_db
+    _active_db = db_path if db_path and os.path.exists(db_path) else None
+    return _active_db
+
+def active_db():
+    return _active_db
+
+def classify_tags(tags, shop_types):
+    # fokeis a qué tipo de consulta pertenece el elemento, o None -bynd
+    if tags.get("amenity") == "school":
+        return "schools"
+    if tags.get("shop") in shop_types:
+        return "stores"
+    return None
+
+def _slim(osm_type, osm_id, lat, lon, tags, kind):
+    # ey mismo formato que las respuestas de Overpass ya proyectadas -bynd
+    element = {"type": osm_type, "id": osm_id, "tags": tags}
+    if osm_type == "node":
+        element["lat"], element["lon"] = lat, lon
+    else:
+        element["center"] = {"lat": lat, "lon": lon}
+    keep = oq.SCHOOL_TAGS if kind == "schools" else oq.STORE_TAGS
+    return oq.project_element(element, keep)
+
+def _way_center(refs, coords):
+    # vavavava centro del bbox del way, igual que `out center` -bynd
+    points = [coords[r] for r in refs if r in coords]
+    if not points:
+        return None
+    lats = [p[0] for p in points]
+    lons = [p[1] for p in points]
+    return (min(lats) + max(lats)) / 2, (min(lons) + max(lons)) / 2
+
+def _iter_xml(path):
+    # aaa iterparse que va soltando memoria conforme avanza -bynd
+    context = ET.iterparse(path, events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event == "end" and elem.tag in ("node", "way", "relation"):
+            yield elem
+            root.clear()
+
+def _xml_tags(elem):
+    return {t.get("k"): t.get("v") for t in elem.iter("tag")}
+
+def parse_osm_xml(path, shop_types):
+    # q chidoteee dos pasadas: 1) nodos y ways que sirven, 2) coords de sus nodos -bynd
+    matched_ways = []
+    needed = set()
+
+    for elem in _iter_xml(path):
+        if elem.tag == "relation":
+            break
+        tags = _xml_tags(elem)
+        kind = classify_tags(tags, shop_types)
+        if not kind:
+            continue
+        osm_id = int(elem.get("id"))
+        if elem.tag == "node":
+            yield kind, _slim("node", osm_id, float(elem.get("lat")), float(elem.get("lon")), tags, kind)
+        else:
+            refs = [int(nd.get("ref")) for nd in elem.iter("nd")]
+            matched_ways.append((osm_id, refs, tags, kind))
+            needed.update(refs)
+
+    if not matched_ways:
+        return
+
+    # chintrolas segunda pasada solo por las coords que necesitamos -bynd
+    coords = {}
+    for elem in _iter_xml(path):
+        if elem.tag != "node":
+            break
+        node_id = int(elem.get("id"))
+        if node_id in needed:
+            coords[node_id] = (float(elem.get("lat")), float(elem.get("lon")))
+
+    for osm_id, refs, tags, kind in matched_ways:
+        center = _way_center(refs, coords)
+        if center:
+            yield kind, _slim("way", osm_id, center[0], center[1], tags, kind)
+
+def parse_osm_pbf(path, shop_types):
+    # ey PBF necesita pyosmium (pip install osmium) -bynd
+    try:
+        import osmium
+    except ImportError:
+        raise RuntimeError("Para leer .osm.pbf instala pyosmium: pip install osmium")
+
+    found = []
+
+    class _Handler(osmium.SimpleHandler):
+        def node(self, n):
+            tags = {t.k: t.v for t in n.tags}
+            kind = classify_tags(tags, shop_types)
+            if kind and n.location.valid():
+                found.append((kind, _slim("node", n.id, n.location.lat, n.location.lon, tags, kind)))
+
+        def way(self, w):
+            tags = {t.k: t.v for t in w.tags}
+            kind = classify_tags(tags, shop_types)
+            if not kind:
+                return
+            points = [(nd.lat, nd.lon) for nd in w.nodes if nd.location.valid()]
+            if points:
+                lats = [p[0] for p in points]
+                lons = [p[1] for p in points]
+                found.append((kind, _slim(
+                    "way", w.id, (min(lats) + max(lats)) / 2, (min(lons) + max(lons)) / 2, tags, kind
+                )))
+
+    # aaa locations=True para que los ways traigan coords de sus nodos -bynd
+    _Handler().apply_file(path, locations=True)
+    return found
+
+def _create_schema(conn):
+    conn.executescript("""
+        CREATE TABLE elements (
+            rowid INTEGER PRIMARY KEY,
+            osm_type TEXT NOT NULL,
+            osm_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            shop TEXT,
+            lat REAL NOT NULL,
+            lon REAL NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX idx_elements_kind ON elements(kind, shop);
+        CREATE VIRTUAL TABLE elements_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon);
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+    """)
+
+def build_extract_db(osm_path, shop_types, db_path=EXTRACT_DB_FILE):
+    # fokeis armamos la base local con índice R-tree -bynd
+    if osm_path.endswith(".pbf"):
+        parsed = parse_osm_pbf(osm_path, shop_types)
+    else:
+        parsed = parse_osm_xml(osm_path, shop_types)
+
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    counts = {"stores": 0, "schools": 0}
+    try:
+        _create_schema(conn)
+        rows = []
+        rowid = 0
+        for kind, element in parsed:
+            rowid += 1
+            location = element.get("center") or element
+            rows.append((rowid, element["type"], element["id"], kind, element["tags"].get("shop"),
+                         location["lat"], location["lon"], json.dumps(element, ensure_ascii=False)))
+            counts[kind] += 1
+            if len(rows) >= INSERT_BATCH:
+                _insert_rows(conn, rows)
+                rows = []
+        _insert_rows(conn, rows)
+
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("source", os.path.abspath(osm_path)),
+            ("built_at", datetime.now().isoformat()),
+            ("shop_types", json.dumps(list(shop_types))),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, db_path)
+    return counts
+
+def _insert_rows(conn, rows):
+    if not rows:
+        return
+    conn.executemany("INSERT INTO elements VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.executemany(
+        "INSERT INTO elements_rtree VALUES (?, ?, ?, ?, ?)",
+        [(r[0], r[5], r[5], r[6], r[6]) for r in rows]
+    )
+
+def query_area(db_path, kind, location, radius, shop_types=None):
+    # q chidoteee elementos dentro del radio (metros), sin red -bynd
+    radius_km = radius / 1000
+    lat, lng = location["lat"], location["lng"]
+    dlat, dlng = geo.bbox_deltas(lat, radius_km)
+
+    sql = """
+        SELECT e.data, e.lat, e.lon
+        FROM elements_rtree r JOIN elements e ON e.rowid = r.id
+        WHERE r.min_lat >= ? AND r.max_lat <= ? AND r.min_lon >= ? AND r.max_lon <= ?
+          AND e.kind = ?
+    """
+    params = [lat - dlat, lat + dlat, lng - dlng, lng + dlng, kind]
+    if shop_types:
+        sql += f" AND e.shop IN ({','.join('?' * len(shop_types))})"
+        params.extend(shop_types)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+    if not rows:
+        return []
+
+    # chintrolas el R-tree da la caja, la haversine recorta al círculo -bynd
+    lats = [r[1] for r in rows]
+    lngs = [r[2] for r in rows]
+    inside, _ = geo.within_radius(lat, lng, radius_km, lats, lngs)
+    return [json.loads(rows[i][0]) for i in inside]
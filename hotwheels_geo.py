@@ -0,0 +1,129 @@
+import math
+
+import numpy as np
+
+# ey radio de la tierra en km -bynd
+EARTH_RADIUS_KM = 6371
+
+# aaa tamaño de celda del grid espacial en km -bynd
+GRID_CELL_KM = 1.0
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    # chintrolas distancia haversine entre dos puntos en km -bynd
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lng2 - lng1)
+
+    a = (math.sin(dlat / 2) ** 2 +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
+         math.sin(dlon / 2) ** 2)
+
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c
+
+def bbox_deltas(lat, radius_km):
+    # ey medio alto y medio ancho (grados) de la caja que contiene al círculo -bynd
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    # aaa usamos la orilla más cercana al polo para no quedarnos cortos -bynd
+    edge_lat = min(abs(lat) + dlat, 89.9)
+    dlng = dlat / math.cos(math.radians(edge_lat))
+    return dlat, dlng
+
+def cell_size_deg(ref_lat, cell_km):
+    # fokeis convertimos km a grados (lat, lng) alrededor de una latitud -bynd
+    lat_deg = cell_km / 111.32
+    cos_lat = max(math.cos(math.radians(ref_lat)), 0.01)
+    lng_deg = cell_km / (111.32 * cos_lat)
+    return lat_deg, lng_deg
+
+def build_grid_index(points, cell_km=GRID_CELL_KM):
+    # q chidoteee armamos un grid uniforme con los puntos -bynd
+    # points es una lista de {"lat", "lng"} -bynd
+    points = [p for p in points if p]
+    ref_lat = sum(p["lat"] for p in points) / len(points) if points else 0.0
+    lat_deg, lng_deg = cell_size_deg(ref_lat, cell_km)
+
+    cells = {}
+    for p in points:
+        key = (int(math.floor(p["lat"] / lat_deg)), int(math.floor(p["lng"] / lng_deg)))
+        cells.setdefault(key, []).append((p["lat"], p["lng"]))
+
+    return {
+        "cell_km": cell_km,
+        "lat_deg": lat_deg,
+        "lng_deg": lng_deg,
+        "cells": cells,
+        "size": len(points)
+    }
+
+def grid_count_within(index, location, radius_km):
+    # vavavava contamos puntos del grid dentro de radius_km -bynd
+    lat, lng = location["lat"], location["lng"]
+    lat_deg, lng_deg = index["lat_deg"], index["lng_deg"]
+
+    # ey cuántas celdas hay que revisar alrededor -bynd
+    dlat, dlng = bbox_deltas(lat, radius_km)
+    lat_span = int(math.ceil(dlat / lat_deg))
+    lng_span = int(math.ceil(dlng / lng_deg))
+
+    ci = int(math.floor(lat / lat_deg))
+    cj = int(math.floor(lng / lng_deg))
+    cells = index["cells"]
+
+    count = 0
+    for i in range(ci - lat_span, ci + lat_span + 1):
+        for j in range(cj - lng_span, cj + lng_span + 1):
+            for plat, plng in cells.get((i, j), ()):
+                if haversine_km(lat, lng, plat, plng) <= radius_km:
+                    count += 1
+
+    return count
+
+def to_arrays(locations):
+    # ey lista de {"lat", "lng"} a dos arrays float64 -bynd
+    lats = np.fromiter((loc["lat"] for loc in locations), dtype=np.float64, count=len(locations))
+    lngs = np.fromiter((loc["lng"] for loc in locations), dtype=np.float64, count=len(locations))
+    return lats, lngs
+
+def haversine_to_many(lat, lng, lats, lngs):
+    # q chidoteee distancias de un punto a muchos, vectorizado -bynd
+    lat1 = np.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(lngs, dtype=np.float64) - lng)
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+def haversine_matrix(lats_a, lngs_a, lats_b=None, lngs_b=None):
+    # chintrolas matriz de distancias muchos a muchos (n x m) en km -bynd
+    if lats_b is None:
+        lats_b, lngs_b = lats_a, lngs_a
+
+    lat1 = np.radians(np.asarray(lats_a, dtype=np.float64))[:, None]
+    lng1 = np.radians(np.asarray(lngs_a, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(lats_b, dtype=np.float64))[None, :]
+    lng2 = np.radians(np.asarray(lngs_b, dtype=np.float64))[None, :]
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    # aaa por redondeo a puede salirse poquito de [0, 1] -bynd
+    np.clip(a, 0.0, 1.0, out=a)
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+def bbox_mask(lat, lng, radius_km, lats, lngs):
+    # fokeis prefiltro barato: caja que contiene al círculo -bynd
+    dlat, dlng = bbox_deltas(lat, radius_km)
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    return (
+        (lats >= lat - dlat) & (lats <= lat + dlat) &
+        (lngs >= lng - dlng) & (lngs <= lng + dlng)
+    )
+
+def within_radius(lat, lng, radius_km, lats, lngs):
+    # vavavava índices dentro del radio y sus distancias -bynd
+    # ey la haversine solo corre sobre los que pasan la caja -bynd
+    candidates = np.flatnonzero(bbox_mask(lat, lng, radius_km, lats, lngs))
+    distances = haversine_to_many(lat, lng, np.asarray(lats)[candidates], np.asarray(lngs)[candidates])
+    inside = distances <= radius_km
+    return candidates[inside], distances[inside]
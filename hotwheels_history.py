@@ -0,0 +1,228 @@
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+# ey historial de visitas en SQLite (append-only, con índices) -bynd
+HISTORY_DB_FILE = "history.db"
+
+# aaa contadores agregados: -1 = todos los días / todas las horas, "" = todas las tiendas -bynd
+ALL = -1
+ALL_STORES = ""
+
+# ey cubeta (cadena, ALL, NO_BRANCH): solo visitas sin sucursal, es el prior de toda la cadena -bynd
+NO_BRANCH = -2
+
+# chintrolas sube cuando cambian las cubetas de visit_stats, así se reconstruyen una vez -bynd
+STATS_VERSION = "2"
+
+_ready = set()
+_ready_lock = threading.Lock()
+
+def _create_schema(conn):
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS visits (
+            id INTEGER PRIMARY KEY,
+            store TEXT NOT NULL,
+            date TEXT NOT NULL,
+            found_hotwheels INTEGER NOT NULL,
+            branch TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_visits_store ON visits(store, date);
+        CREATE INDEX IF NOT EXISTS idx_visits_date ON visits(date);
+        CREATE INDEX IF NOT EXISTS idx_visits_found ON visits(found_hotwheels, date);
+        CREATE TABLE IF NOT EXISTS visit_stats (
+            store TEXT NOT NULL,
+            weekday INTEGER NOT NULL,
+            hour INTEGER NOT NULL,
+            visits INTEGER NOT NULL,
+            found INTEGER NOT NULL,
+            PRIMARY KEY (store, weekday, hour)
+        );
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """)
+
+def branch_key(osm_id, location):
+    # ey sucursal = id de OSM + ubicación (~11 m); el nombre solo es la cadena (OXXO, Walmart...) -bynd
+    if osm_id is None or not location:
+        return None
+    return f"osm:{osm_id}@{location['lat']:.4f},{location['lng']:.4f}"
+
+def store_branch(store):
+    return branch_key(store.get("osm_id"), store.get("location"))
+
+def stat_keys(store, date, branch=None):
+    # chintrolas cubetas que toca una visita: global y sucursal x día/hora, y el total por nombre -bynd
+    # aaa visitas viejas sin sucursal van a la cubeta de la cadena (es el prior de sus sucursales) -bynd
+    # ey las que sí traen sucursal no la tocan: una visita a un OXXO no mueve a los otros -bynd
+    keys = [(store, ALL, ALL), (ALL_STORES, ALL, ALL)]
+    keys.append((branch, ALL, ALL) if branch else (store, ALL, NO_BRANCH))
+    try:
+        when = datetime.fromisoformat(date)
+    except (TypeError, ValueError):
+        # aaa fecha rara en un history.json viejo: solo cuenta para los totales -bynd
+        return keys
+    weekday, hour = when.weekday(), when.hour
+    keys += [(ALL_STORES, weekday, ALL), (ALL_STORES, ALL, hour)]
+    if branch:
+        keys += [(branch, weekday, ALL), (branch, ALL, hour)]
+    return keys
+
+def _bump_stats(conn, counts):
+    # fokeis counts: {(tienda, día, hora): [visitas, encontrados]} -bynd
+    conn.executemany("""
+        INSERT INTO visit_stats VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (store, weekday, hour)
+        DO UPDATE SET visits = visits + excluded.visits, found = found + excluded.found
+    """, [(*key, n, f) for key, (n, f) in counts.items()])
+
+def rebuild_stats(conn):
+    # vavavava una sola vez para historiales que ya existían (o con cubetas de otra versión) -bynd
+    # ey no hace commit: corre dentro de la transacción de connect -bynd
+    counts = {}
+    for store, date, found, branch in conn.execute("SELECT store, date, found_hotwheels, branch FROM visits"):
+        for key in stat_keys(store, date, branch):
+            c = counts.setdefault(key, [0, 0])
+            c[0] += 1
+            c[1] += found
+    conn.execute("DELETE FROM visit_stats")
+    _bump_stats(conn, counts)
+    conn.execute("INSERT OR REPLACE INTO meta VALUES ('stats_built', ?)", (STATS_VERSION,))
+
+def migrate_json(conn, json_path):
+    # aaa una sola vez: pasamos history.json a la base (el JSON se queda como respaldo) -bynd
+    # ey igual que rebuild_stats, la revisión y los INSERT van en la transacción de connect -bynd
+    if not json_path or not os.path.exists(json_path):
+        return 0
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_from'").fetchone():
+        return 0
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        visits = json.load(f)
+
+    conn.executemany(
+        "INSERT INTO visits (store, date, found_hotwheels) VALUES (?, ?, ?)",
+        [(v["store"], v["date"], int(bool(v["found_hotwheels"]))) for v in visits]
+    )
+    conn.execute("INSERT INTO meta VALUES ('migrated_from', ?)", (os.path.abspath(json_path),))
+    return len(visits)
+
+def _prepare(conn, json_path):
+    # fokeis todo en una transacción IMMEDIATE: otro proceso no puede migrar al mismo tiempo -bynd
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(visits)")}
+        if "branch" not in columns:
+            conn.execute("ALTER TABLE visits ADD COLUMN branch TEXT")
+        migrate_json(conn, json_path)
+        built = conn.execute("SELECT value FROM meta WHERE key = 'stats_built'").fetchone()
+        if not built or built[0] != STATS_VERSION:
+            rebuild_stats(conn)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+def connect(db_path=HISTORY_DB_FILE, json_path=None):
+    # chintrolas WAL + synchronous FULL: cada visita queda en disco al hacer commit -bynd
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")
+
+    # fokeis el esquema y la migración solo se revisan una vez por proceso -bynd
+    key = os.path.abspath(db_path)
+    if key not in _ready:
+        with _ready_lock:
+            if key not in _ready:
+                _create_schema(conn)
+                _prepare(conn, json_path)
+                _ready.add(key)
+    return conn
+
+def _row_to_visit(row):
+    return {"store": row[0], "date": row[1], "found_hotwheels": bool(row[2]), "branch": row[3]}
+
+def add_visit(store, found_hotwheels, date=None, branch=None, db_path=HISTORY_DB_FILE, json_path=None):
+    # vavavava O(1): un INSERT y sus contadores en la misma transacción, sin leer nada -bynd
+    # aaa branch (ver branch_key) separa sucursales de la misma cadena -bynd
+    visit = {
+        "store": store,
+        "date": date or datetime.now().isoformat(),
+        "found_hotwheels": bool(found_hotwheels),
+        "branch": branch
+    }
+    conn = connect(db_path, json_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO visits (store, date, found_hotwheels, branch) VALUES (?, ?, ?, ?)",
+                (visit["store"], visit["date"], int(visit["found_hotwheels"]), visit["branch"])
+            )
+            found = int(visit["found_hotwheels"])
+            keys = stat_keys(visit["store"], visit["date"], visit["branch"])
+            _bump_stats(conn, {key: (1, found) for key in keys})
+    finally:
+        conn.close()
+    return visit
+
+def query_visits(store=None, since=None, until=None, found=None, limit=None, newest_first=False,
+                 db_path=HISTORY_DB_FILE, json_path=None):
+    # q chidoteee filtros por tienda, rango de fechas (ISO) y resultado, todos con índice -bynd
+    clauses = []
+    params = []
+    if store is not None:
+        clauses.append("store = ?")
+        params.append(store)
+    if since is not None:
+        clauses.append("date >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("date < ?")
+        params.append(until)
+    if found is not None:
+        clauses.append("found_hotwheels = ?")
+        params.append(int(bool(found)))
+
+    sql = "SELECT store, date, found_hotwheels, branch FROM visits"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    # chintrolas orden de inserción, igual que la lista de history.json -bynd
+    sql += " ORDER BY id DESC" if newest_first else " ORDER BY id"
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+
+    conn = connect(db_path, json_path)
+    try:
+        return [_row_to_visit(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+def recent_visits(limit=20, db_path=HISTORY_DB_FILE, json_path=None):
+    # ey las últimas N en orden cronológico -bynd
+    visits = query_visits(limit=limit, newest_first=True, db_path=db_path, json_path=json_path)
+    return visits[::-1]
+
+def summary(store=None, db_path=HISTORY_DB_FILE, json_path=None):
+    # aaa total y encontrados sin traer filas -bynd
+    sql = "SELECT COUNT(*), TOTAL(found_hotwheels) FROM visits"
+    params = []
+    if store is not None:
+        sql += " WHERE store = ?"
+        params.append(store)
+
+    conn = connect(db_path, json_path)
+    try:
+        total, found = conn.execute(sql, params).fetchone()
+    finally:
+        conn.close()
+    return {"total": total, "found": int(found)}
+
+def load_stats(db_path=HISTORY_DB_FILE, json_path=None):
+    # ey todos los contadores: {(tienda, día, hora): (visitas, encontrados)} -bynd
+    conn = connect(db_path, json_path)
+    try:
+        rows = conn.execute("SELECT store, weekday, hour, visits, found FROM visit_stats").fetchall()
+    finally:
+        conn.close()
+    return {(store, weekday, hour): (visits, found) for store, weekday, hour, visits, found in rows}
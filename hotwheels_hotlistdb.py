@@ -0,0 +1,178 @@
+import os
+import json
+import sqlite3
+from datetime import datetime
+
+# ey base SQLite de la hotlist (opcional, en vez de hotlist.json) -bynd
+HOTLIST_DB_FILE = "hotlist.db"
+
+# aaa banderas con índice parcial (casi todas son pocas filas) -bynd
+FLAG_COLUMNS = ("is_jdm", "is_premium", "is_muscle", "is_th", "is_sth")
+
+COLUMNS = ("id", "number", "name", "series", "year", "brand", "categories") + FLAG_COLUMNS
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    # chintrolas lower() de SQLite solo sabe ASCII, usamos el de Python -bynd
+    conn.create_function("py_lower", 1, lambda s: s.lower() if s is not None else None, deterministic=True)
+    return conn
+
+def _create_schema(conn):
+    flag_indexes = "\n".join(
+        f"CREATE INDEX idx_cars_{flag[3:]} ON cars(pos) WHERE {flag};" for flag in FLAG_COLUMNS
+    )
+    conn.executescript(f"""
+        CREATE TABLE cars (
+            pos INTEGER PRIMARY KEY,
+            id TEXT NOT NULL,
+            number TEXT NOT NULL,
+            name TEXT NOT NULL,
+            series TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            brand TEXT NOT NULL,
+            categories TEXT NOT NULL,
+            is_jdm INTEGER NOT NULL,
+            is_premium INTEGER NOT NULL,
+            is_muscle INTEGER NOT NULL,
+            is_th INTEGER NOT NULL,
+            is_sth INTEGER NOT NULL
+        );
+        CREATE INDEX idx_cars_year ON cars(year);
+        CREATE INDEX idx_cars_brand ON cars(brand COLLATE NOCASE);
+        {flag_indexes}
+        CREATE VIRTUAL TABLE cars_fts USING fts5(
+            name, series, brand, content='cars', content_rowid='pos'
+        );
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+    """)
+
+def write_hotlist(cars, db_path=HOTLIST_DB_FILE):
+    # fokeis reescribimos la base completa en un tmp y la cambiamos de golpe -bynd
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = connect(tmp_path)
+    try:
+        _create_schema(conn)
+        conn.executemany(
+            f"INSERT INTO cars VALUES ({','.join('?' * (len(COLUMNS) + 1))})",
+            (
+                (pos, car["id"], car["number"], car["name"], car["series"], car["year"], car["brand"],
+                 json.dumps(car["categories"], ensure_ascii=False),
+                 *(int(bool(car[flag])) for flag in FLAG_COLUMNS))
+                for pos, car in enumerate(cars)
+            )
+        )
+        conn.execute("INSERT INTO cars_fts(cars_fts) VALUES ('rebuild')")
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("generated_at", datetime.now().isoformat()),
+            ("total_cars", str(len(cars))),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, db_path)
+
+def _row_to_car(row):
+    # vavavava mismo formato que las entradas de hotlist.json -bynd
+    car = dict(zip(COLUMNS, row))
+    car["categories"] = json.loads(car["categories"])
+    for flag in FLAG_COLUMNS:
+        car[flag] = bool(car[flag])
+    return car
+
+def _select(db_path, where="", params=(), limit=None):
+    sql = f"SELECT {', '.join(COLUMNS)} FROM cars"
+    if where:
+        sql += f" WHERE {where}"
+    sql += " ORDER BY pos"
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+
+    conn = connect(db_path)
+    try:
+        return [_row_to_car(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+def load_cars(db_path=HOTLIST_DB_FILE, limit=None):
+    return _select(db_path, limit=limit)
+
+def count_cars(db_path=HOTLIST_DB_FILE):
+    conn = connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM cars").fetchone()[0]
+    finally:
+        conn.close()
+
+def filter_clauses(filters):
+    # q chidoteee los mismos filtros de search_hotlist, en SQL -bynd
+    clauses = []
+    params = []
+    if not filters:
+        return clauses, params
+    if filters.get("jdm"):
+        clauses.append("is_jdm")
+    if filters.get("premium"):
+        clauses.append("is_premium")
+    if filters.get("th"):
+        clauses.append("(is_th OR is_sth)")
+    if filters.get("sth"):
+        clauses.append("is_sth")
+    if filters.get("brand"):
+        # ey NOCASE igual que el índice, así SQLite usa idx_cars_brand (las marcas son ASCII) -bynd
+        clauses.append("brand = ? COLLATE NOCASE")
+        params.append(filters["brand"])
+    return clauses, params
+
+def _search(db_path, clause, params, filters):
+    clauses, extra = filter_clauses(filters)
+    where = " AND ".join([clause] + clauses)
+    return _select(db_path, where, list(params) + extra)
+
+def search_substring(db_path, query, filters=None):
+    # ey substring en el nombre, igual que la búsqueda en JSON -bynd
+    return _search(db_path, "instr(py_lower(name), ?) > 0", [query.lower()], filters)
+
+def search_prefix(db_path, words, filters=None):
+    # aaa cada palabra como prefijo en FTS5 (nombre, serie, marca) -bynd
+    if not words:
+        return []
+    match = " AND ".join('"' + word.replace('"', '""') + '"*' for word in words)
+    return _search(db_path, "pos IN (SELECT rowid FROM cars_fts WHERE cars_fts MATCH ?)", [match], filters)
+
+def filter_flag(db_path, flag):
+    # chintrolas "th" incluye STH como en la hotlist -bynd
+    if flag == "th":
+        return _select(db_path, "is_th OR is_sth")
+    return _select(db_path, f"is_{flag}")
+
+def filter_brand(db_path, brand, exact=False):
+    # aaa marca exacta va por índice; el substring sí tiene que revisar todas -bynd
+    if exact:
+        return _select(db_path, "brand = ? COLLATE NOCASE", [brand])
+    return _select(db_path, "instr(py_lower(brand), ?) > 0", [brand.lower()])
+
+def stats(db_path=HOTLIST_DB_FILE):
+    # fokeis mismo resultado que hotlist_stats pero con GROUP BY -bynd
+    conn = connect(db_path)
+    try:
+        total, jdm, premium, muscle, th, sth = conn.execute(
+            "SELECT COUNT(*), TOTAL(is_jdm), TOTAL(is_premium), TOTAL(is_muscle), TOTAL(is_th), TOTAL(is_sth) FROM cars"
+        ).fetchone()
+        # vavavava empates en el orden en que aparece la marca, igual que el sort estable -bynd
+        top_brands = conn.execute(
+            "SELECT brand, COUNT(*) AS n FROM cars GROUP BY brand ORDER BY n DESC, MIN(pos) LIMIT 10"
+        ).fetchall()
+        years = conn.execute("SELECT year, COUNT(*) FROM cars GROUP BY year ORDER BY MIN(pos)").fetchall()
+    finally:
+        conn.close()
+
+    return {
+        "total": total, "jdm": int(jdm), "premium": int(premium), "muscle": int(muscle),
+        "th": int(th), "sth": int(sth),
+        "top_brands": [tuple(row) for row in top_brands],
+        "years": dict(years)
+    }
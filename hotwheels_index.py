@@ -0,0 +1,198 @@
+import gc
+import os
+import re
+import sys
+import heapq
+import marshal
+from bisect import bisect_left
+from collections import Counter
+
+# ey separamos en palabras: letras y números, lo demás es separador -bynd
+TOKEN_RE = re.compile(r"[0-9a-záéíóúüñ]+")
+
+# aaa banderas con lista precalculada para filtrar sin recorrer todo -bynd
+FLAG_FIELDS = ("is_jdm", "is_premium", "is_muscle", "is_th", "is_sth")
+
+# chintrolas búsqueda difusa: top-K y similitud mínima (fracción de trigramas del query) -bynd
+FUZZY_TOP_K = 20
+FUZZY_MIN_SIMILARITY = 0.5
+
+# fokeis súbele si cambia la forma del índice, así los snapshots viejos se ignoran -bynd
+SNAPSHOT_VERSION = 1
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+def trigrams(text):
+    # fokeis trigramas por palabra y de todo junto, así "mc laren" pega con "McLaren" -bynd
+    words = tokenize(text)
+    grams = set()
+    for word in words + ["".join(words)]:
+        padded = f"${word}$"
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    grams.discard("$$")
+    return grams
+
+def build_trigram_index(names_lower):
+    # q chidoteee trigramas sobre nombres distintos, los repetidos comparten entrada -bynd
+    name_ids = {}
+    for i, name in enumerate(names_lower):
+        name_ids.setdefault(name, []).append(i)
+
+    names = list(name_ids)
+    postings = {}
+    sizes = []
+    for n, name in enumerate(names):
+        grams = trigrams(name)
+        sizes.append(len(grams))
+        for gram in grams:
+            postings.setdefault(gram, []).append(n)
+
+    return {
+        "names": names,
+        "ids": [name_ids[name] for name in names],
+        "sizes": sizes,
+        "postings": postings
+    }
+
+def build_index(cars):
+    # q chidoteee índice invertido por palabra sobre nombre, serie y marca -bynd
+    names_lower = []
+    postings = {}
+    flags = {field: [] for field in FLAG_FIELDS}
+
+    for i, car in enumerate(cars):
+        names_lower.append(car["name"].lower())
+        words = set(tokenize(car["name"]))
+        words.update(tokenize(car.get("series", "")))
+        words.update(tokenize(car.get("brand", "")))
+        for word in words:
+            postings.setdefault(word, []).append(i)
+        for field in FLAG_FIELDS:
+            if car.get(field):
+                flags[field].append(i)
+
+    return {
+        "cars": cars,
+        "names_lower": names_lower,
+        "postings": postings,
+        # chintrolas palabras ordenadas para buscar prefijos con bisect -bynd
+        "vocabulary": sorted(postings),
+        "flags": flags,
+        "trigrams": build_trigram_index(names_lower)
+    }
+
+def prefix_ids(index, prefix):
+    # fokeis ids de todas las palabras que empiezan con prefix -bynd
+    vocabulary = index["vocabulary"]
+    postings = index["postings"]
+    ids = set()
+    i = bisect_left(vocabulary, prefix)
+    while i < len(vocabulary) and vocabulary[i].startswith(prefix):
+        ids.update(postings[vocabulary[i]])
+        i += 1
+    return ids
+
+def search_prefix(index, query):
+    # vavavava cada palabra del query tiene que ser prefijo de alguna palabra del carro -bynd
+    words = tokenize(query)
+    if not words:
+        return []
+
+    # ey empezamos por la palabra más específica (menos resultados) -bynd
+    sets = sorted((prefix_ids(index, w) for w in words), key=len)
+    ids = sets[0]
+    for other in sets[1:]:
+        ids = ids & other
+        if not ids:
+            return []
+    return sorted(ids)
+
+def search_substring(index, query):
+    # aaa semántica original: substring en el nombre -bynd
+    query_lower = query.lower()
+    return [i for i, name in enumerate(index["names_lower"]) if query_lower in name]
+
+def search_fuzzy(index, query, limit=FUZZY_TOP_K, min_similarity=FUZZY_MIN_SIMILARITY):
+    # vavavava nombres parecidos aunque tengan typos, ordenados por similitud -bynd
+    grams = trigrams(query)
+    if not grams:
+        return []
+
+    tri = index["trigrams"]
+    common = Counter()
+    for gram in grams:
+        common.update(tri["postings"].get(gram, ()))
+
+    # ey score: qué tanto del query aparece, y de desempate qué tanto sobra del nombre -bynd
+    query_lower = query.lower()
+    needed = min_similarity * len(grams)
+    candidates = (
+        (hits / len(grams) + (query_lower in tri["names"][n]),
+         hits / (len(grams) + tri["sizes"][n] - hits),
+         -n)
+        for n, hits in common.items() if hits >= needed
+    )
+
+    ids = []
+    for _, _, neg_n in heapq.nlargest(limit, candidates):
+        ids.extend(tri["ids"][-neg_n])
+    return ids
+
+def matches_filters(car, filters):
+    # chintrolas mismos filtros que search_hotlist -bynd
+    if not filters:
+        return True
+    if filters.get("jdm") and not car["is_jdm"]:
+        return False
+    if filters.get("premium") and not car["is_premium"]:
+        return False
+    if filters.get("th") and not (car["is_th"] or car["is_sth"]):
+        return False
+    if filters.get("sth") and not car["is_sth"]:
+        return False
+    if filters.get("brand") and car["brand"].lower() != filters["brand"].lower():
+        return False
+    return True
+
+def flag_ids(index, flag):
+    # ey ids con una bandera, "th" incluye STH como en la hotlist -bynd
+    flags = index["flags"]
+    if flag == "th":
+        return sorted(set(flags["is_th"]) | set(flags["is_sth"]))
+    return flags[f"is_{flag}"]
+
+def save_snapshot(index, path, source):
+    # q chidoteee el índice ya armado en marshal: cargarlo no parsea JSON ni reconstruye nada -bynd
+    # aaa source es la firma del archivo de donde salió, si cambia el snapshot ya no sirve -bynd
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "python": list(sys.version_info[:2]),
+        "source": list(source),
+        "index": {key: value for key, value in index.items() if key != "signature"}
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        marshal.dump(data, f)
+    os.replace(tmp_path, path)
+
+def load_snapshot(path, source):
+    # chintrolas None si no existe, está roto o es de otro archivo / otra versión -bynd
+    # aaa leemos todo de una y sin GC: son cientos de miles de objetos que no tienen ciclos -bynd
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(path, "rb") as f:
+            data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    if not isinstance(data, dict):
+        return None
+    if data.get("version") != SNAPSHOT_VERSION or data.get("python") != list(sys.version_info[:2]):
+        return None
+    if data.get("source") != list(source):
+        return None
+    return data.get("index")
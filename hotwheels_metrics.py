@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import inspect
+import functools
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# ey métricas en memoria: tiempos por etapa y contadores (HTTP, caché) -bynd
+# aaa apagadas por default; prendidas con --profile. Apagadas cuestan un if por llamada -bynd
+_enabled = False
+_lock = threading.Lock()
+
+# chintrolas {nombre: [llamadas, segundos totales, segundo más lento]} -bynd
+TIMERS = {}
+# chintrolas {(nombre, ((label, valor), ...)): cuenta} -bynd
+COUNTERS = {}
+
+PROMETHEUS_PREFIX = "hotwheels"
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+def enabled():
+    return _enabled
+
+def reset():
+    with _lock:
+        TIMERS.clear()
+        COUNTERS.clear()
+
+def observe(name, seconds):
+    if not _enabled:
+        return
+    with _lock:
+        entry = TIMERS.get(name)
+        if entry is None:
+            TIMERS[name] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2] = seconds
+
+def count(name, n=1, **labels):
+    if not _enabled:
+        return
+    key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+    with _lock:
+        COUNTERS[key] = COUNTERS.get(key, 0) + n
+
+def drain():
+    # aaa saca y limpia lo acumulado en este proceso (ej. un worker de un pool) -bynd
+    with _lock:
+        snapshot = ({name: list(entry) for name, entry in TIMERS.items()}, dict(COUNTERS))
+        TIMERS.clear()
+        COUNTERS.clear()
+    return snapshot
+
+def merge(snapshot):
+    # chintrolas suma lo que regresó drain() de otro proceso; los segundos son de CPU sumados, no de reloj -bynd
+    timers, counters = snapshot
+    with _lock:
+        for name, (calls, total, slowest) in timers.items():
+            entry = TIMERS.get(name)
+            if entry is None:
+                TIMERS[name] = [calls, total, slowest]
+            else:
+                entry[0] += calls
+                entry[1] += total
+                entry[2] = max(entry[2], slowest)
+        for key, value in counters.items():
+            COUNTERS[key] = COUNTERS.get(key, 0) + value
+
+@contextmanager
+def timer(name):
+    # fokeis with metrics.timer("etapa"): ... -bynd
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+def timed(name):
+    # q chidoteee decorador; en generadores solo cuenta el tiempo dentro de cada next -bynd
+    # ey así no se mezcla el tiempo del que va consumiendo los elementos -bynd
+    def decorate(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return (yield from fn(*args, **kwargs))
+                start = time.perf_counter()
+                gen = fn(*args, **kwargs)
+                spent = time.perf_counter() - start
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        try:
+                            item = next(gen)
+                        except StopIteration as stop:
+                            return stop.value
+                        finally:
+                            spent += time.perf_counter() - start
+                        yield item
+                finally:
+                    gen.close()
+                    observe(name, spent)
+            return gen_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+def summary():
+    # aaa todo en un dict listo para JSON -bynd
+    with _lock:
+        timers = {
+            name: {"calls": calls, "total_s": round(total, 6), "mean_ms": round(total / calls * 1000, 4),
+                   "max_ms": round(slowest * 1000, 4)}
+            for name, (calls, total, slowest) in sorted(TIMERS.items(), key=lambda item: -item[1][1])
+        }
+        counters = {}
+        for (name, labels), value in sorted(COUNTERS.items()):
+            label = ",".join(f"{k}={v}" for k, v in labels)
+            counters[f"{name}{{{label}}}" if label else name] = value
+    return {"created_at": datetime.now().isoformat(), "timers": timers, "counters": counters}
+
+def _metric_name(name):
+    return f"{PROMETHEUS_PREFIX}_" + "".join(c if c.isalnum() else "_" for c in name)
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    inside = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + inside + "}"
+
+def to_prometheus():
+    # vavavava formato de texto de Prometheus (para node_exporter textfile o pushgateway) -bynd
+    lines = []
+    with _lock:
+        timers = sorted(TIMERS.items())
+        counters = sorted(COUNTERS.items())
+
+    if timers:
+        for metric, kind, index in (("stage_calls_total", "counter", 0), ("stage_seconds_total", "counter", 1),
+                                    ("stage_seconds_max", "gauge", 2)):
+            full = f"{PROMETHEUS_PREFIX}_{metric}"
+            lines.append(f"# TYPE {full} {kind}")
+            for name, entry in timers:
+                lines.append(f"{full}{_labels([('stage', name)])} {entry[index]:.6g}")
+
+    declared = set()
+    for (name, labels), value in counters:
+        full = _metric_name(name) + "_total"
+        if full not in declared:
+            declared.add(full)
+            lines.append(f"# TYPE {full} counter")
+        lines.append(f"{full}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+def _write_atomic(path, text):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def write_reports(prefix):
+    # chintrolas prefix.json + prefix.prom; regresa las rutas escritas -bynd
+    json_path, prom_path = prefix + ".json", prefix + ".prom"
+    _write_atomic(json_path, json.dumps(summary(), indent=2, ensure_ascii=False))
+    _write_atomic(prom_path, to_prometheus())
+    return [json_path, prom_path]
+
+@contextmanager
+def profiling(prefix, cprofile=False):
+    # fokeis prende métricas (y cProfile si se pide) y al salir escribe los reportes -bynd
+    # aaa el .pstats se abre con snakeviz o se convierte a flame graph con flameprof -bynd
+    reset()
+    enable()
+    profiler = None
+    if cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    paths = []
+    start = time.perf_counter()
+    try:
+        yield paths
+    finally:
+        observe("total", time.perf_counter() - start)
+        if profiler is not None:
+            profiler.disable()
+        enable(False)
+        paths.extend(write_reports(prefix))
+        if profiler is not None:
+            profiler.dump_stats(prefix + ".pstats")
+            paths.append(prefix + ".pstats")
@@ -1,25 +1,43 @@
 import os
 import json
-import math
-import requests
-from datetime import datetime, timedelta
+import itertools
+import threading
+from datetime import datetime
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.prompt import Prompt, Confirm, IntPrompt
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.text import Text
-import time
 
 # aaa importamos el módulo de database -bynd
 import hotwheels_database as hwdb
+import hotwheels_geo as geo
+import hotwheels_cache as tilecache
+import hotwheels_overpass as overpass
+import hotwheels_query as oq
+import hotwheels_extract as extract
+import hotwheels_route as route
+import hotwheels_scoring as scoring
+import hotwheels_history as history
+import hotwheels_storeindex as storeindex
+import hotwheels_metrics as metrics
 
 console = Console()
 
 # ey archivos de configuración -bynd
 CONFIG_FILE = "config.json"
 CACHE_FILE = "cache.json"
-HISTORY_FILE = "history.json"
+HISTORY_FILE = "history.json"  # ey solo para migrar a history.db -bynd
+
+# ey elementos por lote al analizar mientras se descarga -bynd
+AREA_BATCH_SIZE = 256
+
+# aaa tipos de tienda que buscamos -bynd
+STORE_SHOP_TYPES = ["supermarket", "convenience", "chemist", "pharmacy", "department_store"]
+
+# aaa radio para contar escuelas cercanas a cada tienda (metros) -bynd
+SCHOOL_RADIUS = 1000
 
 # chintrolas configuración por defecto -bynd
 DEFAULT_CONFIG = {
@@ -33,8 +51,23 @@ DEFAULT_CONFIG = {
         "pharmacy_bonus": 20,
         "boring_vibe": 15,
         "early_opening": 10,
-        "residential": 12
-    }
+        "residential": 12,
+        "store_history": 30  # aaa puntos por 100% arriba de la tasa de éxito promedio -bynd
+    },
+    # aaa plan de ruta: km_per_100_points = km que vale manejar por 100 puntos (0 = todas) -bynd
+    "route": {
+        "stops": 3,
+        "return_home": True,
+        "km_per_100_points": 0
+    },
+    # ey límites del cliente de Overpass -bynd
+    "overpass": {
+        "max_workers": 2,
+        "rate_per_sec": 1.0,
+        "burst": 2
+    },
+    # aaa dónde vive la hotlist: "json" o "sqlite" -bynd
+    "hotlist_backend": "json"
 }
 
 def load_config():
@@ -49,124 +82,189 @@ def save_config(config):
     with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
         json.dump(config, f, indent=2, ensure_ascii=False)
 
+@metrics.timed("cache.load")
 def load_cache():
-    # aaa cargamos el caché si existe -bynd
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-            cache = json.load(f)
-            # verificamos si el caché no es muy viejo (7 días) -bynd
-            cache_date = datetime.fromisoformat(cache.get("timestamp", "2000-01-01"))
-            if datetime.now() - cache_date < timedelta(days=7):
-                return cache
-    return {"timestamp": datetime.now().isoformat(), "stores": [], "schools": []}
+    # aaa cargamos el caché de tiles (vacío si no existe o es viejo) -bynd
+    return tilecache.load_tile_cache(CACHE_FILE)
 
+# ey varios análisis a la vez (el server) leen, cambian y guardan el mismo cache.json -bynd
+_cache_lock = threading.Lock()
+
+@metrics.timed("cache.save")
 def save_cache(cache):
-    # vavavava guardamos el caché -bynd
-    cache["timestamp"] = datetime.now().isoformat()
-    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(cache, f, indent=2, ensure_ascii=False)
-
-def load_history():
-    # fokeis cargamos historial de visitas -bynd
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
-
-def save_history(history):
-    # ey guardamos historial -bynd
-    with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(history, f, indent=2, ensure_ascii=False)
-
-def add_visit_to_history(store_name, found_hotwheels):
-    # aaa agregamos visita al historial -bynd
-    history = load_history()
-    history.append({
-        "store": store_name,
-        "date": datetime.now().isoformat(),
-        "found_hotwheels": found_hotwheels
-    })
-    save_history(history)
-
-def fetch_osm_places(location, radius, amenity_types):
+    # vavavava guardamos el caché, sacando tiles vencidos o poco usados -bynd
+    # aaa releemos lo que haya en disco y lo juntamos, así nadie borra tiles ni zonas de otro -bynd
+    with _cache_lock:
+        disk = tilecache.load_tile_cache(CACHE_FILE)
+        tilecache.merge_tile_cache(cache, disk)
+        if disk.get("analysis"):
+            index = storeindex.merge(load_store_index(cache), load_store_index(disk))
+            cache["analysis"] = storeindex.to_cache(index)
+        tilecache.save_tile_cache(cache, CACHE_FILE)
+
+def load_history(**filters):
+    # fokeis visitas desde history.db (filtros: store, since, until, found, limit) -bynd
+    return history.query_visits(json_path=HISTORY_FILE, **filters)
+
+def add_visit_to_history(store_name, found_hotwheels, branch=None):
+    # aaa agregamos visita al historial (un solo INSERT) -bynd
+    return history.add_visit(store_name, found_hotwheels, branch=branch, json_path=HISTORY_FILE)
+
+@metrics.timed("osm.rank")
+def rank_with_history(stores, config):
+    # ey score con features + lo que ha pasado en cada tienda (history.db) -bynd
+    try:
+        stats = history.load_stats(json_path=HISTORY_FILE)
+    except Exception as e:
+        console.print(f"[dim]Sin historial para el score: {e}[/dim]")
+        stats = None
+    return scoring.rank_stores(stores, config["weights"], history=stats)
+
+@metrics.timed("osm.fetch_osm_places")
+def fetch_osm_places(location, radius, amenity_types, bboxes=None):
     # q chidoteee buscamos lugares con Overpass API -bynd
     # ey esta es la API gratis de OpenStreetMap -bynd
+    if extract.active_db():
+        return extract.query_area(extract.active_db(), "stores", location, radius, amenity_types)
     
-    url = "https://overpass-api.de/api/interpreter"
-    
-    # aaa armamos la query de Overpass QL -bynd
-    lat, lng = location['lat'], location['lng']
-    
-    # chintrolas construimos filtros para cada tipo -bynd
-    filters = []
-    for amenity in amenity_types:
-        filters.append(f'node["shop"="{amenity}"](around:{radius},{lat},{lng});')
-        filters.append(f'way["shop"="{amenity}"](around:{radius},{lat},{lng});')
-    
-    query = f"""
-    [out:json][timeout:25];
-    (
-      {' '.join(filters)}
-    );
-    out body;
-    >;
-    out skel qt;
-    """
+    query = oq.places_query(amenity_types, oq.area_clauses(location, radius, bboxes))
     
     try:
-        response = requests.post(url, data={"data": query}, timeout=30)
-        response.raise_for_status()
-        return response.json().get("elements", [])
+        return overpass.query_elements(query, label="stores")
     except Exception as e:
         console.print(f"[red]Error al buscar lugares: {e}[/red]")
         return []
 
-def fetch_osm_schools(location, radius=1000):
+@metrics.timed("osm.fetch_osm_schools")
+def fetch_osm_schools(location, radius=SCHOOL_RADIUS, bboxes=None):
     # vavavava buscamos escuelas cercanas -bynd
-    url = "https://overpass-api.de/api/interpreter"
-    
-    lat, lng = location['lat'], location['lng']
+    if extract.active_db():
+        return extract.query_area(extract.active_db(), "schools", location, radius)
     
-    query = f"""
-    [out:json][timeout:25];
-    (
-      node["amenity"="school"](around:{radius},{lat},{lng});
-      way["amenity"="school"](around:{radius},{lat},{lng});
-    );
-    out body;
-    """
+    query = oq.schools_query(oq.area_clauses(location, radius, bboxes))
     
     try:
-        response = requests.post(url, data={"data": query}, timeout=30)
-        response.raise_for_status()
-        return response.json().get("elements", [])
+        return overpass.query_elements(query, label="schools")
     except Exception as e:
         console.print(f"[red]Error al buscar escuelas: {e}[/red]")
         return []
 
-def count_nearby_schools(location, radius=1000):
+def build_area_query(kind, bboxes):
+    # aaa query de Overpass para los tiles que faltan -bynd
+    areas = oq.area_clauses(bboxes=bboxes)
+    if kind == "schools":
+        return oq.schools_query(areas)
+    return oq.places_query(STORE_SHOP_TYPES, areas)
+
+def area_tags(kind):
+    return oq.SCHOOL_TAGS if kind == "schools" else oq.STORE_TAGS
+
+@metrics.timed("osm.tiles")
+def iter_tile_elements(kind, hashes, cache, refresh=False):
+    # q chidoteee elementos de esos tiles: primero los de caché, luego los que faltan en una sola query -bynd
+    # ey puede repetir elementos que caen en varios tiles, el que llama los filtra -bynd
+    if refresh:
+        found, missing = {}, hashes
+    else:
+        found, missing = tilecache.lookup_tiles(cache, kind, hashes)
+    
+    for tile_elements in found.values():
+        yield from tile_elements
+    
+    if missing:
+        console.print(f"[dim]📦 {kind}: {len(found)} tiles en caché, {len(missing)} por descargar[/dim]")
+        query = build_area_query(kind, tilecache.merge_tiles(missing))
+        keep = area_tags(kind)
+        buckets = {h: [] for h in missing}
+        
+        for element in overpass.stream_elements(query, label=kind):
+            # ey en disco solo guardamos id, ubicación y los tags que usamos -bynd
+            element = oq.project_element(element, keep)
+            element_location = get_element_location(element)
+            if not element_location:
+                continue
+            tile = tilecache.tile_of(element_location)
+            if tile not in buckets:
+                continue
+            buckets[tile].append(element)
+            yield element
+        
+        # fokeis solo guardamos tiles si la descarga terminó completa -bynd
+        tilecache.store_tiles(cache, kind, buckets)
+        
+        stats = overpass.get_query_stats()[-1]
+        console.print(
+            f"[dim]📶 {kind}: {stats['request_bytes']/1024:.1f} KB enviados, "
+            f"{stats['response_bytes']/1024:.1f} KB recibidos, {stats['elements']} elementos[/dim]"
+        )
+    else:
+        console.print(f"[dim]📦 {kind}: usando {len(found)} tiles en caché...[/dim]")
+
+def iter_area_batches(kind, location, radius, cache, refresh=False, batch_size=AREA_BATCH_SIZE, hashes=None):
+    # q chidoteee armamos el área con tiles en caché + solo los que faltan -bynd
+    # ey va regresando lotes conforme llegan, sin esperar toda la descarga -bynd
+    # aaa hashes opcional para pedir solo una parte de los tiles del círculo -bynd
+    radius_km = radius / 1000
+    if hashes is None:
+        hashes = tilecache.tiles_for_circle(location, radius_km)
+    
+    seen = set()
+    
+    def trim(elements):
+        # chintrolas quitamos repetidos y recortamos al círculo, por lote -bynd
+        unique = []
+        locations = []
+        for element in elements:
+            key = (element.get("type"), element.get("id"))
+            if key in seen:
+                continue
+            seen.add(key)
+            unique.append(element)
+            locations.append(get_element_location(element))
+        if not unique:
+            return []
+        lats, lngs = geo.to_arrays(locations)
+        inside, _ = geo.within_radius(location["lat"], location["lng"], radius_km, lats, lngs)
+        return [unique[i] for i in inside]
+    
+    pending = []
+    for element in iter_tile_elements(kind, hashes, cache, refresh):
+        pending.append(element)
+        if len(pending) >= batch_size:
+            batch = trim(pending)
+            pending = []
+            if batch:
+                yield batch
+    
+    batch = trim(pending)
+    if batch:
+        yield batch
+
+def fetch_area_elements(kind, location, radius, cache, refresh=False):
+    # vavavava versión lista completa, None si falló la descarga -bynd
+    try:
+        return [e for batch in iter_area_batches(kind, location, radius, cache, refresh) for e in batch]
+    except Exception as e:
+        console.print(f"[red]Error al descargar {kind}: {e}[/red]")
+        return None
+
+def build_school_index(schools):
+    # chintrolas indexamos las escuelas en un grid para contar sin red -bynd
+    return geo.build_grid_index([get_element_location(s) for s in schools])
+
+def count_nearby_schools(location, radius=SCHOOL_RADIUS, school_index=None):
     # ey contamos cuántas escuelas hay cerca -bynd
+    if school_index is not None:
+        return geo.grid_count_within(school_index, location, radius / 1000)
+
+    # aaa sin índice hacemos la consulta individual -bynd
     schools = fetch_osm_schools(location, radius)
     return len(schools)
 
 def calculate_distance(loc1, loc2):
     # chintrolas calculamos distancia entre dos puntos -bynd
     # usando fórmula de haversine -bynd
-    lat1, lon1 = loc1["lat"], loc1["lng"]
-    lat2, lon2 = loc2["lat"], loc2["lng"]
-    
-    R = 6371  # radio de la tierra en km -bynd
-    
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    
-    a = (math.sin(dlat / 2) ** 2 + 
-         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * 
-         math.sin(dlon / 2) ** 2)
-    
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    
-    return R * c
+    return geo.haversine_km(loc1["lat"], loc1["lng"], loc2["lat"], loc2["lng"])
 
 def get_element_location(element):
     # aaa extraemos ubicación de un elemento OSM -bynd
@@ -181,15 +279,20 @@ def get_element_name(element):
     tags = element.get('tags', {})
     return tags.get('name', tags.get('brand', 'Sin nombre'))
 
-def analyze_store(store, config):
+@metrics.timed("osm.analyze_store")
+def analyze_store(store, config, school_index=None, distance_km=None):
     # aaa analizamos una tienda específica -bynd
     location = get_element_location(store)
     
     if not location:
         return None
     
+    # ey la distancia puede venir ya calculada en lote -bynd
+    if distance_km is None:
+        distance_km = calculate_distance(config["location"], location)
+    
     # contamos escuelas cercanas -bynd
-    nearby_schools = count_nearby_schools(location)
+    nearby_schools = count_nearby_schools(location, school_index=school_index)
     
     # chintrolas inferimos tipo de tienda -bynd
     tags = store.get('tags', {})
@@ -230,41 +333,9 @@ def analyze_store(store, config):
         "on_main_avenue": reviews > 500,
         "opening_hour": 8,
         "store_vibe": store_vibe,
-        "distance_km": calculate_distance(config["location"], location)
+        "distance_km": float(distance_km)
     }
 
-def calculate_tranquility_score(store, weights):
-    # ey aquí calculamos el score de tranquilidad -bynd
-    score = 50  # empezamos en 50 base -bynd
-    
-    # penalizaciones -bynd
-    score += store["nearby_schools"] * weights["nearby_schools"]
-    
-    if store["on_main_avenue"]:
-        score += weights["on_main_avenue"]
-    
-    if store["rating"] > 4.0:
-        score += weights["high_rating"]
-    
-    if store["user_ratings_total"] > 1000:
-        score += weights["many_reviews"]
-    
-    # bonificaciones -bynd
-    if store["type"] == "pharmacy":
-        score += weights["pharmacy_bonus"]
-    
-    if store["store_vibe"] == "boring":
-        score += weights["boring_vibe"]
-    
-    if store["store_vibe"] == "residential":
-        score += weights["residential"]
-    
-    if store["opening_hour"] <= 7:
-        score += weights["early_opening"]
-    
-    # aaa mantenemos el score entre 0 y 100 -bynd
-    return max(0, min(100, int(score)))
-
 def show_header():
     # q chidoteee el header -bynd
     header = Text()
@@ -289,59 +360,163 @@ def show_main_menu():
     console.print("[12] 🚪 Salir")
     console.print()
 
-def fetch_and_analyze_stores(config, use_cache=True):
-    # chintrolas función principal para buscar y analizar -bynd
-    
-    # ey primero intentamos usar caché -bynd
-    if use_cache:
-        cache = load_cache()
-        if cache["stores"]:
-            console.print("[dim]📦 Usando datos en caché...[/dim]")
-            return cache["stores"]
+@metrics.timed("osm.extract_features")
+def extract_features(store_batches, school_index, config, index=None):
+    # aaa features crudos de cada tienda, sin score -bynd
+    # ey consume lotes conforme llegan del stream -bynd
+    # chintrolas las que ya están en el índice no se vuelven a analizar -bynd
+    home = config["location"]
+    features = []
     
-    console.print("[yellow]🔍 Buscando tiendas en OpenStreetMap...[/yellow]")
-    console.print("[dim]💚 100% Gratis, sin API key necesaria[/dim]\n")
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console
+    ) as progress:
+        
+        task = progress.add_task("[cyan]Analizando tiendas...", total=None)
+        
+        for batch in store_batches:
+            # chintrolas distancias del lote a casa de un jalón -bynd
+            locations = [get_element_location(store) for store in batch]
+            lats, lngs = geo.to_arrays(locations)
+            distances = geo.haversine_to_many(home["lat"], home["lng"], lats, lngs)
+            
+            for store, location, distance_km in zip(batch, locations, distances):
+                known = storeindex.get_store(index, store.get("id"), location) if index else None
+                if known:
+                    features.append(dict(known, distance_km=float(distance_km)))
+                    continue
+                analyzed = analyze_store(store, config, school_index, distance_km)
+                if analyzed:
+                    features.append(analyzed)
+            
+            progress.update(task, description=f"[cyan]Analizando tiendas... {len(features)}")
+    
+    return features
+
+def load_store_index(cache):
+    return storeindex.from_cache(cache.get("analysis"))
+
+def covered_features(config):
+    # q chidoteee si la zona cabe en algo ya analizado sale del índice, sin red -bynd
+    if extract.activate(config.get("offline_db")):
+        return None
+    index = load_store_index(load_cache())
+    if not storeindex.covers(index, config["location"], config["radius"]):
+        return None
+    return storeindex.query_radius(index, config["location"], config["radius"] / 1000)
+
+def nearest_stores(config, k):
+    # fokeis las k tiendas analizadas más cercanas a la ubicación, con su score -bynd
+    index = load_store_index(load_cache())
+    stores = rank_with_history(storeindex.query_nearest(index, config["location"], k), config)
+    return sorted(stores, key=lambda store: store["distance_km"])
+
+@metrics.timed("osm.offline")
+def offline_features(config, db_path, interactive=True):
+    # fokeis mismo flujo pero consultando el extracto local -bynd
+    console.print("[yellow]🗺️  Buscando tiendas en el extracto local...[/yellow]")
     
-    # aaa definimos tipos de tiendas que buscamos -bynd
-    amenity_types = ["supermarket", "convenience", "chemist", "pharmacy", "department_store"]
+    stores = extract.query_area(db_path, "stores", config["location"], config["radius"], STORE_SHOP_TYPES)
+    schools = extract.query_area(db_path, "schools", config["location"], config["radius"] + SCHOOL_RADIUS)
+    console.print(f"[green]✓[/green] {len(schools)} escuelas en el área")
     
-    console.print("[cyan]Consultando Overpass API...[/cyan]")
-    stores_data = fetch_osm_places(config["location"], config["radius"], amenity_types)
+    features = extract_features([stores], build_school_index(schools), config) if stores else []
     
-    if not stores_data:
+    if not features:
         console.print("[red]No se encontraron tiendas. Intenta aumentar el radio.[/red]")
-        input("\nPresiona Enter para continuar...")
+        if interactive:
+            input("\nPresiona Enter para continuar...")
         return []
     
-    console.print(f"[green]✓[/green] {len(stores_data)} lugares encontrados")
-    console.print("[yellow]🏫 Analizando escuelas cercanas...[/yellow]")
+    console.print(f"[green]✓[/green] {len(features)} tiendas analizadas")
+    return features
+
+@metrics.timed("osm.fetch_store_features")
+def fetch_store_features(config, use_cache=True, interactive=True):
+    # ey el flujo es: descargar (tiles) -> features, sin score -bynd
+    # aaa interactive=False no espera Enter (para la CLI y el server) -bynd
+    
+    # aaa con extracto local no hay red ni caché, todo sale de la base -bynd
+    offline_db = extract.activate(config.get("offline_db"))
+    if offline_db:
+        return offline_features(config, offline_db, interactive)
+    
+    # ey el caché va por tiles, así que sirve aunque cambie ubicación o radio -bynd
+    cache = load_cache()
+    refresh = not use_cache
+    location, radius = config["location"], config["radius"]
+    
+    # aaa tiendas ya analizadas en índice espacial; con refresh empezamos de cero -bynd
+    index = load_store_index(cache) if use_cache else storeindex.new_index(location["lat"])
+    if storeindex.covers(index, location, radius):
+        metrics.count("store_index", result="covered")
+        console.print("[dim]📦 Zona ya analizada, usando el índice de tiendas...[/dim]")
+        return storeindex.query_radius(index, location, radius / 1000)
+    
+    # chintrolas tiles que caen completos en zonas ya analizadas salen del índice -bynd
+    hashes = tilecache.tiles_for_circle(location, radius / 1000)
+    covered = {h for h in hashes if storeindex.tile_covered(index, h)}
+    pending = [h for h in hashes if h not in covered]
+    known = storeindex.query_radius(
+        index, location, radius / 1000,
+        keep=lambda store: tilecache.tile_of(store["location"]) in covered
+    ) if covered else []
+    metrics.count("store_index", result="partial" if covered else "miss")
+    if covered:
+        console.print(f"[dim]📦 {len(known)} tiendas del índice, {len(pending)} de {len(hashes)} tiles por revisar[/dim]")
     
-    # aaa analizamos cada tienda -bynd
-    analyzed_stores = []
+    console.print("[yellow]🔍 Buscando tiendas en OpenStreetMap...[/yellow]")
+    console.print("[dim]💚 100% Gratis, sin API key necesaria[/dim]\n")
     
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console
-    ) as progress:
-        
-        task = progress.add_task("[cyan]Analizando tiendas...", total=len(stores_data))
+    overpass.configure(config.get("overpass"))
+    
+    # ey escuelas del área (radio + 1km) en paralelo con las tiendas -bynd
+    schools_future = overpass.submit(
+        fetch_area_elements, "schools", location,
+        radius + SCHOOL_RADIUS, cache, refresh
+    )
+    store_batches = iter_area_batches("stores", location, radius, cache, refresh, hashes=pending)
+    
+    try:
+        # aaa el primer lote arranca la descarga mientras llegan las escuelas -bynd
+        first_batch = next(store_batches, [])
+        schools = schools_future.result()
+        school_index = build_school_index(schools or [])
+        console.print(f"[green]✓[/green] {len(schools or [])} escuelas en el área")
         
-        for store in stores_data:
-            analyzed = analyze_store(store, config)
-            if analyzed:  # fokeis algunos elementos pueden no tener ubicación -bynd
-                analyzed["score"] = calculate_tranquility_score(analyzed, config["weights"])
-                analyzed_stores.append(analyzed)
-            progress.update(task, advance=1)
-            time.sleep(0.1)  # ey respetamos la API -bynd
+        features = known + extract_features(itertools.chain([first_batch], store_batches), school_index, config, index)
+    except Exception as e:
+        console.print(f"[red]Error al buscar lugares: {e}[/red]")
+        features = []
+        schools = None
+    
+    if not features:
+        save_cache(cache)
+        console.print("[red]No se encontraron tiendas. Intenta aumentar el radio.[/red]")
+        if interactive:
+            input("\nPresiona Enter para continuar...")
+        return []
     
-    # vavavava ordenamos por score -bynd
-    analyzed_stores.sort(key=lambda x: x["score"], reverse=True)
+    console.print(f"[green]✓[/green] {len(features)} tiendas analizadas")
     
-    # guardamos en caché -bynd
-    save_cache({"stores": analyzed_stores})
+    # vavavava guardamos features crudos en el índice, el score se calcula al vuelo -bynd
+    # fokeis si fallaron las escuelas no marcamos la zona como analizada -bynd
+    if schools is not None:
+        storeindex.add_stores(index, features)
+        storeindex.add_area(index, location, radius)
+        cache["analysis"] = storeindex.to_cache(index)
+    save_cache(cache)
     
-    return analyzed_stores
+    return features
+
+def fetch_and_analyze_stores(config, use_cache=True, interactive=True):
+    # chintrolas función principal para buscar y analizar: features -> score -bynd
+    features = fetch_store_features(config, use_cache, interactive)
+    if not features:
+        return []
+    return rank_with_history(features, config)
 
 def analyze_stores(config):
     # ey función principal de análisis -bynd
@@ -374,8 +549,9 @@ def analyze_stores(config):
             reason
         )
     
-    console.print(table)
-    console.print()
+    with metrics.timer("render.top"):
+        console.print(table)
+        console.print()
     
     # fokeis alerta si hoy no vale la pena -bynd
     if scored_stores[0]["score"] < 60:
@@ -409,6 +585,7 @@ def get_main_reason(store):
     
     return ", ".join(reasons[:2]) if reasons else "Varias razones"
 
+@metrics.timed("render.ranking")
 def show_full_ranking(scored_stores):
     # vavavava ranking completo -bynd
     console.clear()
@@ -427,6 +604,7 @@ def show_full_ranking(scored_stores):
     table.add_column("Dist", justify="center")
     table.add_column("Escuelas", justify="center")
     table.add_column("Rating", justify="center")
+    table.add_column("Éxito", justify="center")
     
     for i, store in enumerate(scored_stores, 1):
         score_color = "green" if store["score"] >= 70 else "yellow" if store["score"] >= 50 else "red"
@@ -437,7 +615,8 @@ def show_full_ranking(scored_stores):
             f"[{score_color}]{store['score']}[/{score_color}]",
             f"{store['distance_km']:.1f}km",
             f"{'⚠️' if store['nearby_schools'] > 2 else ''}{store['nearby_schools']}",
-            f"{store['rating']}⭐"
+            f"{store['rating']}⭐",
+            f"{store['hit_rate']*100:.0f}%" if "hit_rate" in store else "-"
         )
     
     console.print(table)
@@ -449,18 +628,18 @@ def view_hotlist():
     console.clear()
     show_header()
     
-    hotlist = hwdb.load_hotlist()
+    total = hwdb.count_hotlist()
     
-    if not hotlist:
+    if not total:
         console.print("[yellow]No hay hotlist generada[/yellow]")
         if Confirm.ask("¿Quieres generar la hotlist ahora?"):
-            hotlist = hwdb.build_hotlist()
+            total = len(hwdb.build_hotlist())
         else:
             input("\nPresiona Enter para continuar...")
             return
     
     console.print("[bold cyan]🔥 HOTLIST - QUÉ BUSCAR EN LAS TIENDAS[/bold cyan]\n")
-    console.print(f"[dim]Total: {len(hotlist)} carritos[/dim]\n")
+    console.print(f"[dim]Total: {total} carritos[/dim]\n")
     
     # aaa filtros disponibles -bynd
     console.print("[yellow]Filtros:[/yellow]")
@@ -474,19 +653,24 @@ def view_hotlist():
     
     filter_choice = Prompt.ask("Filtro", choices=["1", "2", "3", "4", "5", "6"])
     
-    filtered_list = hotlist
+    # ey "ver todo" solo trae los que se muestran -bynd
+    filtered_list = hwdb.load_hotlist(limit=50)
+    filtered_total = total
     
     if filter_choice == "2":
-        filtered_list = [c for c in hotlist if c["is_jdm"]]
+        filtered_list = hwdb.filter_hotlist("jdm")
     elif filter_choice == "3":
-        filtered_list = [c for c in hotlist if c["is_premium"]]
+        filtered_list = hwdb.filter_hotlist("premium")
     elif filter_choice == "4":
-        filtered_list = [c for c in hotlist if c["is_th"] or c["is_sth"]]
+        filtered_list = hwdb.filter_hotlist("th")
     elif filter_choice == "5":
-        filtered_list = [c for c in hotlist if c["is_sth"]]
+        filtered_list = hwdb.filter_hotlist("sth")
     elif filter_choice == "6":
         brand = Prompt.ask("Nombre de marca")
-        filtered_list = [c for c in hotlist if brand.lower() in c["brand"].lower()]
+        filtered_list = hwdb.filter_hotlist_brand(brand)
+    
+    if filter_choice != "1":
+        filtered_total = len(filtered_list)
     
     if not filtered_list:
         console.print("[red]No se encontraron resultados con ese filtro[/red]")
@@ -494,7 +678,7 @@ def view_hotlist():
         return
     
     # chintrolas mostramos la tabla -bynd
-    table = Table(title=f"🔥 HOTLIST ({len(filtered_list)} resultados)", border_style="cyan")
+    table = Table(title=f"🔥 HOTLIST ({filtered_total} resultados)", border_style="cyan")
     table.add_column("#", style="cyan", justify="center", width=8)
     table.add_column("Serie", style="blue", width=18)
     table.add_column("Nombre", style="magenta", width=35)
@@ -520,8 +704,8 @@ def view_hotlist():
     
     console.print(table)
     
-    if len(filtered_list) > 50:
-        console.print(f"\n[dim]Mostrando primeros 50 de {len(filtered_list)}[/dim]")
+    if filtered_total > 50:
+        console.print(f"\n[dim]Mostrando primeros 50 de {filtered_total}[/dim]")
     
     console.print()
     input("Presiona Enter para continuar...")
@@ -531,9 +715,7 @@ def search_in_hotlist():
     console.clear()
     show_header()
     
-    hotlist = hwdb.load_hotlist()
-    
-    if not hotlist:
+    if not hwdb.count_hotlist():
         console.print("[yellow]No hay hotlist. Genera una primero (opción 3)[/yellow]")
         input("\nPresiona Enter para continuar...")
         return
@@ -542,14 +724,19 @@ def search_in_hotlist():
     
     query = Prompt.ask("Buscar (nombre o marca)")
     
-    results = hwdb.search_hotlist(query)
+    # ey palabras, substring y si no, parecidos por si hay typo -bynd
+    results, mode = hwdb.find_in_hotlist(query)
+    fuzzy = mode == "fuzzy"
     
     if not results:
         console.print(f"\n[red]No se encontró '{query}'[/red]")
         input("\nPresiona Enter para continuar...")
         return
     
-    console.print(f"\n[green]✓ {len(results)} resultados[/green]\n")
+    if fuzzy:
+        console.print(f"\n[yellow]No hubo coincidencia exacta, {len(results)} resultados parecidos a '{query}'[/yellow]\n")
+    else:
+        console.print(f"\n[green]✓ {len(results)} resultados[/green]\n")
     
     for car in results[:20]:
         console.print(hwdb.format_hotlist_entry(car))
@@ -560,7 +747,7 @@ def search_in_hotlist():
     console.print()
     input("Presiona Enter para continuar...")
 
-def show_route_plan(scored_stores):
+def show_route_plan(scored_stores, config):
     # ey aquí armamos el plan óptimo -bynd
     console.clear()
     show_header()
@@ -573,9 +760,23 @@ def show_route_plan(scored_stores):
     now = datetime.now()
     day_name = now.strftime("%A")
     
-    # aaa solo mostramos top 3 para no hacer ruta muy larga -bynd
-    best_stores = scored_stores[:3]
+    route_config = config.get("route", DEFAULT_CONFIG["route"])
+    
+    # aaa cuántas de las mejores tiendas metemos a la ruta -bynd
+    stops = IntPrompt.ask(
+        f"¿Cuántas tiendas visitar? (máx {route.MAX_STOPS})",
+        default=route_config.get("stops", 3)
+    )
+    
+    plan = route.plan_route(
+        config["location"],
+        scored_stores,
+        k=stops,
+        return_home=route_config.get("return_home", True),
+        km_per_100_points=route_config.get("km_per_100_points", 0)
+    )
     
+    console.print()
     console.print(Panel(
         f"[bold cyan]PLAN DE RUTA ÓPTIMO[/bold cyan]\n"
         f"📅 Día: {day_name}\n"
@@ -584,17 +785,22 @@ def show_route_plan(scored_stores):
     ))
     console.print()
     
-    total_distance = sum(store["distance_km"] for store in best_stores)
-    
-    for i, store in enumerate(best_stores, 1):
+    for i, (store, leg) in enumerate(zip(plan["stops"], plan["legs_km"]), 1):
         console.print(f"[bold yellow]{i}️⃣  {store['name']}[/bold yellow]")
         console.print(f"   Score: [green]{store['score']}[/green]")
-        console.print(f"   Distancia: {store['distance_km']:.1f} km")
+        console.print(f"   Tramo: {leg:.1f} km (a {store['distance_km']:.1f} km de casa)")
         console.print(f"   Motivo: {get_main_reason(store)}")
         console.print(f"   Abre: {store['opening_hour']}:00 AM")
         console.print()
     
-    console.print(f"[bold]Distancia total aproximada: {total_distance:.1f} km[/bold]")
+    if plan["return_home"]:
+        console.print(f"🏠 Regreso a casa: {plan['legs_km'][-1]:.1f} km")
+    
+    if plan["dropped"]:
+        names = ", ".join(s["name"] for s in plan["dropped"])
+        console.print(f"[dim]Se quedaron fuera por desvío: {names}[/dim]")
+    
+    console.print(f"[bold]Distancia total de la ruta: {plan['total_km']:.1f} km[/bold]")
     console.print("[dim]💡 Tip: Visita en este orden para optimizar ruta[/dim]")
     console.print()
     input("Presiona Enter para continuar...")
@@ -619,14 +825,16 @@ def register_visit(scored_stores):
     
     choice = IntPrompt.ask("Número de tienda", default=0)
     
+    branch = None
     if choice > 0 and choice <= min(10, len(scored_stores)):
         store_name = scored_stores[choice - 1]["name"]
+        branch = history.store_branch(scored_stores[choice - 1])
     else:
         store_name = Prompt.ask("Nombre de la tienda")
     
     found = Confirm.ask("¿Encontraste Hot Wheels?")
     
-    add_visit_to_history(store_name, found)
+    add_visit_to_history(store_name, found, branch)
     
     emoji = "🎉" if found else "😿"
     console.print(f"\n[green]{emoji} Visita registrada[/green]")
@@ -637,9 +845,10 @@ def show_history():
     console.clear()
     show_header()
     
-    history = load_history()
+    # ey solo las últimas 20 y el resumen, no todo el historial -bynd
+    stats = history.summary(json_path=HISTORY_FILE)
     
-    if not history:
+    if not stats["total"]:
         console.print("[yellow]No hay visitas registradas aún[/yellow]")
         input("\nPresiona Enter para continuar...")
         return
@@ -649,7 +858,7 @@ def show_history():
     table.add_column("Tienda", style="magenta")
     table.add_column("Resultado", justify="center")
     
-    for visit in history[-20:]:  # aaa últimas 20 visitas -bynd
+    for visit in history.recent_visits(20, json_path=HISTORY_FILE):  # aaa últimas 20 visitas -bynd
         date = datetime.fromisoformat(visit["date"]).strftime("%Y-%m-%d %H:%M")
         result = "[green]✓ Encontró[/green]" if visit["found_hotwheels"] else "[red]✗ No encontró[/red]"
         table.add_row(date, visit["store"], result)
@@ -658,8 +867,8 @@ def show_history():
     console.print()
     
     # vavavava estadísticas -bynd
-    total = len(history)
-    found = sum(1 for v in history if v["found_hotwheels"])
+    total = stats["total"]
+    found = stats["found"]
     rate = (found / total * 100) if total > 0 else 0
     
     console.print(f"[bold]Estadísticas:[/bold]")
@@ -697,7 +906,7 @@ def adjust_weights(config):
     console.print()
     
     if Confirm.ask("¿Quieres ajustar algún peso?"):
-        choice = IntPrompt.ask("¿Cuál? (1-8)", choices=[str(i) for i in range(1, 9)])
+        choice = IntPrompt.ask(f"¿Cuál? (1-{len(weight_keys)})", choices=[str(i) for i in range(1, len(weight_keys) + 1)])
         key = weight_keys[choice - 1]
         
         current = weights[key]
@@ -718,18 +927,24 @@ def show_settings(config):
     
     console.print("[bold yellow]🔧 CONFIGURACIÓN[/bold yellow]\n")
     
-    console.print("[green]✓ Usando OpenStreetMap (Gratis)[/green]")
+    if config.get("offline_db"):
+        console.print(f"[green]✓ Usando extracto local: {config['offline_db']}[/green]")
+    else:
+        console.print("[green]✓ Usando OpenStreetMap (Gratis)[/green]")
     console.print(f"Ubicación: {config['location']['lat']:.4f}, {config['location']['lng']:.4f}")
     console.print(f"Radio: {config['radius']/1000:.1f} km")
+    console.print(f"Hotlist: {hwdb.get_hotlist_backend()}")
     console.print()
     
     console.print("[1] Cambiar ubicación")
     console.print("[2] Cambiar radio de búsqueda")
     console.print("[3] Actualizar Hotlist")
-    console.print("[4] Volver")
+    console.print("[4] Modo offline (extracto .osm / .osm.pbf)")
+    console.print("[5] Guardar hotlist en SQLite / JSON")
+    console.print("[6] Volver")
     console.print()
     
-    choice = Prompt.ask("Opción", choices=["1", "2", "3", "4"])
+    choice = Prompt.ask("Opción", choices=["1", "2", "3", "4", "5", "6"])
     
     if choice == "1":
         console.print("\n[yellow]Ingresa nueva ubicación:[/yellow]")
@@ -748,7 +963,37 @@ def show_settings(config):
     elif choice == "3":
         hwdb.build_hotlist()
     
-    if choice != "4":
+    elif choice == "4":
+        # aaa vacío = regresar a Overpass -bynd
+        osm_path = Prompt.ask("Ruta del extracto (vacío para usar Overpass)", default="")
+        if not osm_path:
+            config["offline_db"] = None
+            save_config(config)
+            console.print("[green]✓ Usando Overpass otra vez[/green]")
+        elif not os.path.exists(osm_path):
+            console.print(f"[red]No existe {osm_path}[/red]")
+        else:
+            console.print("[yellow]🗺️  Indexando extracto, puede tardar...[/yellow]")
+            try:
+                counts = extract.build_extract_db(osm_path, STORE_SHOP_TYPES)
+                config["offline_db"] = extract.EXTRACT_DB_FILE
+                save_config(config)
+                console.print(f"[green]✓ {counts['stores']} tiendas y {counts['schools']} escuelas indexadas[/green]")
+            except Exception as e:
+                console.print(f"[red]Error al indexar extracto: {e}[/red]")
+    
+    elif choice == "5":
+        # chintrolas al regresar a JSON exportamos lo que haya en SQLite -bynd
+        if hwdb.using_sqlite():
+            if hwdb.count_hotlist():
+                hwdb.export_hotlist_json()
+            config["hotlist_backend"] = hwdb.set_hotlist_backend("json")
+        else:
+            config["hotlist_backend"] = hwdb.set_hotlist_backend("sqlite")
+        save_config(config)
+        console.print(f"[green]✓ Hotlist guardada en {hwdb.hotlist_path()}[/green]")
+    
+    if choice != "6":
         input("\nPresiona Enter para continuar...")
 
 def clear_cache():
@@ -766,6 +1011,7 @@ def clear_cache():
 def main():
     # vavavava función principal -bynd
     config = load_config()
+    hwdb.set_hotlist_backend(config.get("hotlist_backend", "json"))
     scored_stores = []
     
     while True:
@@ -793,14 +1039,24 @@ def main():
             search_in_hotlist()
         elif choice == "6":
             adjust_weights(config)
+            # ey con los pesos nuevos el ranking se recalcula al instante -bynd
+            scored_stores = rank_with_history(scored_stores, config)
         elif choice == "7":
-            show_route_plan(scored_stores)
+            show_route_plan(scored_stores, config)
         elif choice == "8":
             register_visit(scored_stores)
+            # aaa la visita ya cuenta en el score de esa tienda -bynd
+            scored_stores = rank_with_history(scored_stores, config)
         elif choice == "9":
             show_history()
         elif choice == "10":
+            area = (dict(config["location"]), config["radius"])
             show_settings(config)
+            # aaa si la zona nueva ya estaba analizada el ranking se actualiza sin red -bynd
+            if scored_stores and (config["location"], config["radius"]) != area:
+                features = covered_features(config)
+                if features:
+                    scored_stores = rank_with_history(features, config)
         elif choice == "11":
             clear_cache()
         elif choice == "12":
@@ -808,4 +1064,9 @@ def main():
             break
 
 if __name__ == "__main__":
+    # ey con argumentos corre la CLI (NDJSON), sin argumentos el menú de siempre -bynd
+    import sys
+    if len(sys.argv) > 1:
+        import hotwheels_cli
+        sys.exit(hotwheels_cli.main())
     main()
\ No newline at end of file
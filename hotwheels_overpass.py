@@ -0,0 +1,336 @@
+import codecs
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+import hotwheels_metrics as metrics
+
+# ey la API gratis de OpenStreetMap -bynd
+OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+
+# aaa overpass-api.de da ~2 slots por IP, no nos pasamos -bynd
+DEFAULT_CLIENT_CONFIG = {
+    "max_workers": 2,       # consultas simultáneas -bynd
+    "rate_per_sec": 1.0,    # tokens por segundo del bucket -bynd
+    "burst": 2,             # capacidad del bucket -bynd
+    "max_retries": 4,
+    "backoff_base": 1.0,    # segundos, se duplica en cada intento -bynd
+    "backoff_max": 60.0,
+    "timeout": 30
+}
+
+# ey tamaño de cada pedazo que leemos del stream -bynd
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# chintrolas status que vale la pena reintentar -bynd
+RETRY_STATUS = {429, 502, 503, 504}
+
+class TokenBucket:
+    # vavavava rate limiter de token bucket, seguro entre threads -bynd
+
+    def __init__(self, rate_per_sec, capacity):
+        self.rate = float(rate_per_sec)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        # ey bloqueamos hasta que haya un token disponible -bynd
+        start = time.perf_counter()
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    metrics.observe("overpass.throttle", time.perf_counter() - start)
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        # aaa el servidor pidió esperar (Retry-After), frenamos a todos -bynd
+        with self.lock:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + seconds)
+            self.tokens = 0.0
+            self.updated = now
+
+# aaa métricas por query: bytes enviados/recibidos y elementos -bynd
+QUERY_STATS = []
+_stats_lock = threading.Lock()
+
+_settings = dict(DEFAULT_CLIENT_CONFIG)
+_session = None
+_bucket = None
+_executor = None
+_state_lock = threading.Lock()
+
+def configure(settings=None):
+    # fokeis aplicamos la config del cliente y reiniciamos los recursos -bynd
+    global _session, _bucket, _executor
+
+    merged = dict(DEFAULT_CLIENT_CONFIG)
+    merged.update(settings or {})
+
+    with _state_lock:
+        # ey si no cambió nada conservamos las conexiones abiertas -bynd
+        if merged == _settings and _session is not None:
+            return
+        _settings.clear()
+        _settings.update(merged)
+
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        if _session is not None:
+            _session.close()
+        _session = None
+        _bucket = None
+        _executor = None
+
+def get_session():
+    # q chidoteee una sola sesión con keep-alive y pool de conexiones -bynd
+    global _session
+
+    with _state_lock:
+        if _session is None:
+            # ey requests se importa hasta la primera query, así el arranque no lo paga -bynd
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            pool_size = max(1, int(_settings["max_workers"]))
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+def get_bucket():
+    global _bucket
+
+    with _state_lock:
+        if _bucket is None:
+            _bucket = TokenBucket(_settings["rate_per_sec"], _settings["burst"])
+        return _bucket
+
+def get_executor():
+    # ey pool de threads compartido, limitado a max_workers -bynd
+    global _executor
+
+    with _state_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, int(_settings["max_workers"])),
+                thread_name_prefix="overpass"
+            )
+        return _executor
+
+def parse_retry_after(value):
+    # chintrolas Retry-After puede venir en segundos o como fecha HTTP -bynd
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt):
+    # vavavava backoff exponencial con un poco de jitter -bynd
+    delay = _settings["backoff_base"] * (2 ** attempt)
+    delay = min(delay, _settings["backoff_max"])
+    return delay * random.uniform(0.8, 1.2)
+
+def post_query(query, stream=False):
+    # aaa mandamos una query respetando rate limit y reintentos -bynd
+    # ey con stream=True los reintentos solo cubren hasta recibir headers -bynd
+    import requests
+    session = get_session()
+    bucket = get_bucket()
+    max_retries = int(_settings["max_retries"])
+
+    for attempt in range(max_retries + 1):
+        bucket.acquire()
+        try:
+            response = session.post(
+                OVERPASS_URL,
+                data={"data": query},
+                timeout=_settings["timeout"],
+                stream=stream
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metrics.count("http_errors", host="overpass", error=type(e).__name__)
+            if attempt >= max_retries:
+                raise
+            with metrics.timer("overpass.backoff"):
+                time.sleep(backoff_delay(attempt))
+            continue
+
+        metrics.count("http_responses", host="overpass", status=response.status_code)
+
+        if response.status_code in RETRY_STATUS and attempt < max_retries:
+            # ey el servidor manda cuánto esperar, si no usamos backoff -bynd
+            wait = parse_retry_after(response.headers.get("Retry-After"))
+            if wait is None:
+                wait = backoff_delay(attempt)
+            wait = min(wait, _settings["backoff_max"])
+            bucket.pause(wait)
+            response.close()
+            continue
+
+        response.raise_for_status()
+        return response
+
+def record_query(label, request_bytes, response_bytes, elements, seconds):
+    # chintrolas guardamos cuánto pesó cada query -bynd
+    entry = {
+        "label": label,
+        "request_bytes": request_bytes,
+        "response_bytes": response_bytes,
+        "elements": elements,
+        "seconds": round(seconds, 3)
+    }
+    with _stats_lock:
+        QUERY_STATS.append(entry)
+    metrics.count("http_bytes", request_bytes, host="overpass", direction="sent")
+    metrics.count("http_bytes", response_bytes, host="overpass", direction="received")
+    return entry
+
+def get_query_stats():
+    with _stats_lock:
+        return list(QUERY_STATS)
+
+def reset_query_stats():
+    with _stats_lock:
+        QUERY_STATS.clear()
+
+@metrics.timed("overpass.query")
+def query_elements(query, label="query"):
+    # fokeis regresamos los elementos de una query -bynd
+    start = time.perf_counter()
+    response = post_query(query)
+    with metrics.timer("overpass.parse"):
+        elements = response.json().get("elements", [])
+    record_query(
+        label,
+        len(query.encode("utf-8")),
+        len(response.content),
+        len(elements),
+        time.perf_counter() - start
+    )
+    return elements
+
+def iter_json_array(chunks, key="elements"):
+    # q chidoteee parseamos el array `key` pedazo por pedazo -bynd
+    # aaa nunca tenemos el body completo ni el árbol entero en memoria -bynd
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    done = False
+
+    def read_more():
+        nonlocal buffer, pos, done
+        if done:
+            return False
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            done = True
+            buffer += utf8.decode(b"", final=True)
+            return True
+        # fokeis recortamos lo ya parseado para no crecer sin límite -bynd
+        if pos > STREAM_CHUNK_SIZE:
+            buffer = buffer[pos:]
+            pos = 0
+        buffer += utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+        return True
+
+    # ey buscamos el inicio del array -bynd
+    marker = f'"{key}"'
+    while True:
+        found = buffer.find(marker, pos)
+        if found >= 0:
+            bracket = buffer.find("[", found + len(marker))
+            if bracket >= 0:
+                pos = bracket + 1
+                break
+        elif len(buffer) > len(marker):
+            # chintrolas dejamos la cola por si el marcador quedó partido -bynd
+            pos = len(buffer) - len(marker)
+        if not read_more():
+            return
+
+    while True:
+        # vavavava saltamos espacios y comas entre elementos -bynd
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buffer):
+            if not read_more():
+                raise ValueError(f"JSON incompleto: el array '{key}' no se cerró")
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            # ey el elemento viene partido, pedimos más -bynd
+            if not read_more():
+                raise
+            continue
+        pos = end
+        yield element
+
+@metrics.timed("overpass.stream")
+def stream_elements(query, label="query"):
+    # aaa regresamos los elementos conforme van llegando -bynd
+    start = time.perf_counter()
+    response = post_query(query, stream=True)
+    received = 0
+    count = 0
+
+    def chunks():
+        # aaa lo que tarda la red por separado; stream - download = parseo JSON -bynd
+        nonlocal received
+        pieces = response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+        while True:
+            with metrics.timer("overpass.download"):
+                chunk = next(pieces, None)
+            if chunk is None:
+                return
+            received += len(chunk)
+            yield chunk
+
+    try:
+        for element in iter_json_array(chunks()):
+            count += 1
+            yield element
+    finally:
+        response.close()
+        record_query(label, len(query.encode("utf-8")), received, count, time.perf_counter() - start)
+
+def submit(fn, *args, **kwargs):
+    # q chidoteee corremos algo en el pool de overpass -bynd
+    return get_executor().submit(fn, *args, **kwargs)
+
+def map_concurrent(fn, items):
+    # chintrolas aplicamos fn a cada item en paralelo, mismo orden -bynd
+    return list(get_executor().map(fn, items))
@@ -0,0 +1,65 @@
+import re
+
+# ey timeout del lado del servidor (segundos) -bynd
+QUERY_TIMEOUT = 25
+
+# aaa tags que de verdad usamos, lo demás no lo guardamos -bynd
+STORE_TAGS = ("name", "brand", "shop")
+SCHOOL_TAGS = ("name", "amenity")
+
+def around_clause(location, radius):
+    # chintrolas un solo círculo alrededor de la ubicación (radio en metros) -bynd
+    return f"(around:{radius},{location['lat']},{location['lng']})"
+
+def bbox_clause(bbox):
+    # fokeis bbox como (sur,oeste,norte,este) -bynd
+    s, w, n, e = bbox
+    return f"({s:.7f},{w:.7f},{n:.7f},{e:.7f})"
+
+def area_clauses(location=None, radius=None, bboxes=None):
+    # ey filtros de área: un around o varios bbox -bynd
+    if bboxes:
+        return [bbox_clause(b) for b in bboxes]
+    return [around_clause(location, radius)]
+
+def tag_filter(key, values):
+    # vavavava un solo filtro con regex en vez de una línea por valor -bynd
+    values = list(values)
+    if len(values) == 1:
+        return f'["{key}"="{values[0]}"]'
+    alternation = "|".join(re.escape(v) for v in values)
+    return f'["{key}"~"^({alternation})$"]'
+
+def build_query(key, values, areas):
+    # q chidoteee query compacta: nodos con coords+tags, ways solo con center+tags -bynd
+    # ey así ya no bajamos los nodos miembro de cada way -bynd
+    flt = tag_filter(key, values)
+    nodes = " ".join(f"node{flt}{area};" for area in areas)
+    ways = " ".join(f"way{flt}{area};" for area in areas)
+
+    return (
+        f"[out:json][timeout:{QUERY_TIMEOUT}];"
+        f"({nodes})->.n;"
+        f"({ways})->.w;"
+        f".n out qt;"
+        f".w out tags center qt;"
+    )
+
+def places_query(shop_types, areas):
+    return build_query("shop", shop_types, areas)
+
+def schools_query(areas):
+    return build_query("amenity", ["school"], areas)
+
+def project_element(element, keep_tags):
+    # aaa nos quedamos solo con id, ubicación y los tags que usamos -bynd
+    slim = {"type": element.get("type"), "id": element.get("id")}
+    if "lat" in element and "lon" in element:
+        slim["lat"] = element["lat"]
+        slim["lon"] = element["lon"]
+    elif "center" in element:
+        slim["center"] = {"lat": element["center"]["lat"], "lon": element["center"]["lon"]}
+
+    tags = element.get("tags", {})
+    slim["tags"] = {k: tags[k] for k in keep_tags if k in tags}
+    return slim
@@ -0,0 +1,180 @@
+import time
+
+import hotwheels_geo as geo
+
+# ey tiempo máximo para optimizar (segundos), tiene que sentirse instantáneo -bynd
+DEFAULT_TIME_BUDGET = 0.08
+
+# aaa máximo de tiendas en una ruta -bynd
+MAX_STOPS = 50
+
+def build_distance_matrix(home, stores):
+    # chintrolas nodo 0 es casa, 1..n son las tiendas -bynd
+    lats, lngs = geo.to_arrays([home] + [store["location"] for store in stores])
+    return geo.haversine_matrix(lats, lngs).tolist()
+
+def route_length(seq, dist):
+    # fokeis km totales de una secuencia de nodos -bynd
+    return sum(dist[a][b] for a, b in zip(seq, seq[1:]))
+
+def nearest_neighbour(dist, nodes):
+    # ey ruta inicial: siempre a la tienda más cercana que falte -bynd
+    pending = set(nodes)
+    order = []
+    current = 0
+    while pending:
+        row = dist[current]
+        current = min(pending, key=row.__getitem__)
+        pending.remove(current)
+        order.append(current)
+    return order
+
+def _to_seq(order, return_home):
+    return [0] + order + ([0] if return_home else [])
+
+def _from_seq(seq, return_home):
+    return seq[1:-1] if return_home else seq[1:]
+
+def two_opt(seq, dist, last, deadline):
+    # q chidoteee 2-opt: volteamos tramos mientras se acorte la ruta -bynd
+    # last es el último índice que se puede mover (casa se queda fija) -bynd
+    size = len(seq)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, last):
+            a, b = seq[i - 1], seq[i]
+            row_a = dist[a]
+            for j in range(i + 1, last + 1):
+                c = seq[j]
+                delta = row_a[c] - row_a[b]
+                if j + 1 < size:
+                    d = seq[j + 1]
+                    delta += dist[b][d] - dist[c][d]
+                if delta < -1e-9:
+                    seq[i:j + 1] = seq[i:j + 1][::-1]
+                    b = seq[i]
+                    improved = True
+    return seq
+
+def or_opt(seq, dist, last, deadline):
+    # vavavava or-opt: movemos tramos de 1 a 3 tiendas a otro lugar -bynd
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for seg_len in (1, 2, 3):
+            i = 1
+            while i + seg_len - 1 <= last:
+                if time.perf_counter() >= deadline:
+                    return seq
+                first, end = seq[i], seq[i + seg_len - 1]
+                prev = seq[i - 1]
+                nxt = seq[i + seg_len] if i + seg_len < len(seq) else None
+
+                # ey lo que ahorramos al sacar el tramo -bynd
+                gain = dist[prev][first]
+                if nxt is not None:
+                    gain += dist[end][nxt] - dist[prev][nxt]
+
+                rest = seq[:i] + seq[i + seg_len:]
+                rest_last = last - seg_len
+                best_delta, best_pos, best_rev = -1e-9, None, False
+                for j in range(0, rest_last + 1):
+                    p = rest[j]
+                    q = rest[j + 1] if j + 1 < len(rest) else None
+                    for rev in (False, True):
+                        s0, s1 = (end, first) if rev else (first, end)
+                        add = dist[p][s0]
+                        if q is not None:
+                            add += dist[s1][q] - dist[p][q]
+                        if add - gain < best_delta:
+                            best_delta, best_pos, best_rev = add - gain, j, rev
+
+                if best_pos is not None:
+                    segment = seq[i:i + seg_len]
+                    if best_rev:
+                        segment.reverse()
+                    seq[:] = rest[:best_pos + 1] + segment + rest[best_pos + 1:]
+                    improved = True
+                else:
+                    i += 1
+    return seq
+
+def optimize_order(order, dist, return_home=True, deadline=None):
+    # aaa pulimos la ruta con 2-opt + or-opt hasta que no mejore o se acabe el tiempo -bynd
+    if deadline is None:
+        deadline = time.perf_counter() + DEFAULT_TIME_BUDGET
+
+    seq = _to_seq(order, return_home)
+    last = len(seq) - 2 if return_home else len(seq) - 1
+    if last < 2:
+        return order
+
+    best = route_length(seq, dist)
+    while time.perf_counter() < deadline:
+        two_opt(seq, dist, last, deadline)
+        or_opt(seq, dist, last, deadline)
+        length = route_length(seq, dist)
+        if length >= best - 1e-9:
+            break
+        best = length
+
+    return _from_seq(seq, return_home)
+
+def drop_unprofitable(order, dist, values, return_home=True):
+    # chintrolas quitamos tiendas cuyo desvío cuesta más km de lo que valen -bynd
+    order = list(order)
+    dropped = []
+    while len(order) > 1:
+        seq = _to_seq(order, return_home)
+        worst, worst_excess = None, 0.0
+        for pos in range(1, len(order) + 1):
+            prev, node = seq[pos - 1], seq[pos]
+            detour = dist[prev][node]
+            if pos + 1 < len(seq):
+                nxt = seq[pos + 1]
+                detour += dist[node][nxt] - dist[prev][nxt]
+            excess = detour - values[node]
+            if excess > worst_excess:
+                worst, worst_excess = node, excess
+        if worst is None:
+            break
+        order.remove(worst)
+        dropped.append(worst)
+    return order, dropped
+
+def plan_route(home, stores, k=5, return_home=True, km_per_100_points=0, time_budget=DEFAULT_TIME_BUDGET):
+    # q chidoteee plan de visita para las mejores k tiendas -bynd
+    # km_per_100_points: cuántos km vale la pena manejar por 100 puntos de score, -bynd
+    # 0 = visitarlas todas sin importar el desvío -bynd
+    deadline = time.perf_counter() + time_budget
+    k = max(1, min(k, MAX_STOPS))
+    candidates = sorted(stores, key=lambda s: s["score"], reverse=True)[:k]
+
+    if not candidates:
+        return {"stops": [], "legs_km": [], "total_km": 0.0, "return_home": return_home, "dropped": []}
+
+    dist = build_distance_matrix(home, candidates)
+    nodes = list(range(1, len(candidates) + 1))
+
+    order = nearest_neighbour(dist, nodes)
+    order = optimize_order(order, dist, return_home, deadline)
+
+    dropped = []
+    if km_per_100_points:
+        values = [0.0] + [c["score"] / 100 * km_per_100_points for c in candidates]
+        order, dropped = drop_unprofitable(order, dist, values, return_home)
+        if dropped:
+            # ey sin esas tiendas vale la pena reacomodar -bynd
+            order = optimize_order(order, dist, return_home, deadline + time_budget / 2)
+
+    seq = _to_seq(order, return_home)
+    legs = [dist[a][b] for a, b in zip(seq, seq[1:])]
+
+    return {
+        "stops": [candidates[n - 1] for n in order],
+        "legs_km": legs,
+        "total_km": sum(legs),
+        "return_home": return_home,
+        "dropped": [candidates[n - 1] for n in dropped]
+    }
@@ -0,0 +1,111 @@
+from datetime import datetime
+
+import numpy as np
+
+import hotwheels_history as history
+
+# ey score base antes de sumar pesos -bynd
+BASE_SCORE = 50
+
+# ey historial: puntos por cada 100% arriba/abajo de la tasa global, y fuerza del prior (visitas) -bynd
+HISTORY_WEIGHT = 30
+HISTORY_PRIOR_VISITS = 5
+
+# chintrolas llaves de los contadores del historial (ver hotwheels_history) -bynd
+ALL = -1
+ALL_STORES = ""
+
+# aaa una columna por peso: nearby_schools cuenta escuelas, los demás son sí/no -bynd
+FEATURE_COLUMNS = [
+    ("nearby_schools", lambda s: s["nearby_schools"]),
+    ("on_main_avenue", lambda s: s["on_main_avenue"]),
+    ("high_rating", lambda s: s["rating"] > 4.0),
+    ("many_reviews", lambda s: s["user_ratings_total"] > 1000),
+    ("pharmacy_bonus", lambda s: s["type"] == "pharmacy"),
+    ("boring_vibe", lambda s: s["store_vibe"] == "boring"),
+    ("early_opening", lambda s: s["opening_hour"] <= 7),
+    ("residential", lambda s: s["store_vibe"] == "residential"),
+]
+
+def build_feature_matrix(stores):
+    # chintrolas matriz n x 8 con los features crudos de cada tienda -bynd
+    matrix = np.zeros((len(stores), len(FEATURE_COLUMNS)), dtype=np.float64)
+    for j, (_, extract) in enumerate(FEATURE_COLUMNS):
+        matrix[:, j] = [extract(store) for store in stores]
+    return matrix
+
+def weight_vector(weights):
+    # fokeis pesos en el orden de las columnas -bynd
+    return np.array([weights[key] for key, _ in FEATURE_COLUMNS], dtype=np.float64)
+
+def score_matrix(matrix, weights, bonus=None):
+    # q chidoteee scores de todas las tiendas en una sola multiplicación -bynd
+    scores = BASE_SCORE + matrix @ weight_vector(weights)
+    if bonus is not None:
+        scores = scores + bonus
+    # vavavava igual que max(0, min(100, int(score))) -bynd
+    return np.clip(np.trunc(scores), 0, 100).astype(int)
+
+def _counts(stats, keys):
+    pairs = [stats.get(key, (0, 0)) for key in keys]
+    counts = np.array(pairs, dtype=np.float64).reshape(len(keys), 2)
+    return counts[:, 0], counts[:, 1]
+
+def history_rates(names, branches, stats, when=None, prior_visits=HISTORY_PRIOR_VISITS):
+    # fokeis tasa de éxito por sucursal con prior bayesiano (Beta) -bynd
+    # ey global -> cadena (nombre) -> sucursal -> sucursal a este día / a esta hora -bynd
+    # aaa cada nivel es el prior del siguiente; la cadena solo cuenta visitas sin sucursal -bynd
+    total, found = stats.get((ALL_STORES, ALL, ALL), (0, 0))
+    if not total:
+        return None, None
+    when = when or datetime.now()
+    k = prior_visits
+    p0 = found / total
+
+    n, f = _counts(stats, [(name, ALL, history.NO_BRANCH) for name in names])
+    p_chain = (f + k * p0) / (n + k)
+
+    n, f = _counts(stats, [(branch, ALL, ALL) for branch in branches])
+    p_store = (f + k * p_chain) / (n + k)
+
+    n, f = _counts(stats, [(branch, when.weekday(), ALL) for branch in branches])
+    p_day = (f + k * p_store) / (n + k)
+    n, f = _counts(stats, [(branch, ALL, when.hour) for branch in branches])
+    p_hour = (f + k * p_store) / (n + k)
+
+    return (p_day + p_hour) / 2, p0
+
+def history_bonus(stores, stats, weight=HISTORY_WEIGHT, when=None):
+    # vavavava puntos extra (o menos) según qué tan bien le ha ido a cada tienda -bynd
+    names = [store["name"] for store in stores]
+    branches = [history.store_branch(store) for store in stores]
+    rates, p0 = history_rates(names, branches, stats, when)
+    if rates is None:
+        return None, None
+    return weight * (rates - p0), rates
+
+def rank_stores(stores, weights, matrix=None, history=None, when=None):
+    # ey recalculamos score y ordenamos, sin volver a descargar nada -bynd
+    # aaa history son los contadores de hotwheels_history.load_stats (opcional) -bynd
+    if not stores:
+        return []
+    if matrix is None:
+        matrix = build_feature_matrix(stores)
+
+    bonus, rates = None, None
+    if history:
+        bonus, rates = history_bonus(stores, history, weights.get("store_history", HISTORY_WEIGHT), when)
+    scores = score_matrix(matrix, weights, bonus)
+    # aaa orden estable por score descendente, igual que sort(reverse=True) -bynd
+    order = np.argsort(-scores, kind="stable")
+
+    ranked = []
+    for i in order:
+        store = dict(stores[i])
+        store["score"] = int(scores[i])
+        if rates is not None:
+            store["hit_rate"] = round(float(rates[i]), 3)
+        else:
+            store.pop("hit_rate", None)
+        ranked.append(store)
+    return ranked
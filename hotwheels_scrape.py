@@ -0,0 +1,199 @@
+import os
+import io
+import json
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+import hotwheels_metrics as metrics
+
+# ey metadata por URL para no volver a bajar lo que no cambió -bynd
+SCRAPE_META_FILE = "scrape_meta.json"
+
+# aaa opciones del scraper -bynd
+SCRAPE_TIMEOUT = 30
+SCRAPE_MAX_WORKERS = 3
+USER_AGENT = "hotwheels-scout/1.0 (+https://hotwheels.fandom.com)"
+
+_session = None
+_session_lock = threading.Lock()
+_meta_lock = threading.Lock()
+
+def get_session():
+    # chintrolas una sola sesión para todos los años (keep-alive) -bynd
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=SCRAPE_MAX_WORKERS, pool_maxsize=SCRAPE_MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _session = session
+        return _session
+
+@metrics.timed("scrape.http")
+def http_fetcher(url, headers):
+    # fokeis fetcher real: regresa (status, headers, body) -bynd
+    response = get_session().get(url, headers=headers, timeout=SCRAPE_TIMEOUT)
+    metrics.count("http_responses", host="fandom", status=response.status_code)
+    metrics.count("http_bytes", len(response.content), host="fandom", direction="received")
+    if response.status_code not in (200, 304):
+        response.raise_for_status()
+    return response.status_code, dict(response.headers), response.content
+
+def fixture_fetcher(pages):
+    # vavavava fetcher de pruebas con HTML local: {url: ruta_al_archivo} -bynd
+    # ey responde 304 si el ETag (hash del archivo) coincide, igual que un servidor -bynd
+    def fetch(url, headers):
+        with open(pages[url], "rb") as f:
+            body = f.read()
+        etag = f'"{content_hash(body)}"'
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag}, body
+    return fetch
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+def load_meta(path=SCRAPE_META_FILE):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_meta(meta, path=SCRAPE_META_FILE):
+    # aaa escritura atómica igual que el cache de tiles, con temporal único -bynd
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def commit_meta(entries, path=SCRAPE_META_FILE):
+    # ey guardamos {url: metadata} encima de lo que ya hay en disco -bynd
+    # chintrolas se llama hasta que el CSV ya se reprocesó bien; si no, la próxima vez se vuelve a bajar -bynd
+    if not entries:
+        return
+    with _meta_lock:
+        meta = load_meta(path)
+        meta.update(entries)
+        save_meta(meta, path)
+
+def conditional_headers(entry):
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+def fetch_page(url, entry, fetcher=None):
+    # q chidoteee regresa (html o None si no cambió, metadata nueva) -bynd
+    fetcher = fetcher or http_fetcher
+    entry = entry or {}
+    status, headers, body = fetcher(url, conditional_headers(entry))
+
+    if status == 304:
+        return None, dict(entry, checked_at=datetime.now().isoformat())
+
+    digest = content_hash(body)
+    new_entry = {
+        "etag": headers.get("ETag") or headers.get("etag"),
+        "last_modified": headers.get("Last-Modified") or headers.get("last-modified"),
+        "sha256": digest,
+        "checked_at": datetime.now().isoformat()
+    }
+    # chintrolas el servidor no soporta condicionales pero el contenido es el mismo -bynd
+    if digest == entry.get("sha256"):
+        return None, new_entry
+
+    return body.decode("utf-8", errors="replace"), new_entry
+
+def pick_table(tables):
+    # fokeis buscamos la tabla que tenga columnas relevantes -bynd
+    for i, table in enumerate(tables):
+        if any(col in str(table.columns).lower() for col in ['name', 'series', 'number']):
+            return i, table
+    # vavavava fallback a la segunda tabla -bynd
+    if len(tables) > 1:
+        return 1, tables[1]
+    return 0, tables[0]
+
+def scrape_page_to_csv(url, csv_file, entry=None, fetcher=None, console=None):
+    # ey baja (si cambió), parsea y guarda el CSV; regresa (csv, metadata, cambió) -bynd
+    force = not os.path.exists(csv_file)
+    html, new_entry = fetch_page(url, None if force else entry, fetcher)
+    if html is None:
+        if console:
+            console.print(f"[dim]Sin cambios: {csv_file}[/dim]")
+        return csv_file, new_entry, False
+
+    tables = pd.read_html(io.StringIO(html))
+    if not tables:
+        raise ValueError(f"No se encontraron tablas en {url}")
+
+    i, df = pick_table(tables)
+    if console:
+        console.print(f"[dim]Usando tabla #{i}[/dim]")
+
+    df.to_csv(csv_file, index=False, encoding='utf-8')
+    if console:
+        console.print(f"[green]✓ Guardado en {csv_file}[/green]")
+        console.print(f"[dim]Total de filas: {len(df)}[/dim]")
+    return csv_file, new_entry, True
+
+def scrape_pages(pages, fetcher=None, meta_path=SCRAPE_META_FILE, max_workers=SCRAPE_MAX_WORKERS,
+                 console=None, on_done=None):
+    # aaa todas las páginas en paralelo; pages es {clave: (url, csv)} -bynd
+    # chintrolas regresa {clave: (csv o None, cambió, metadata pendiente o None)} -bynd
+    # fokeis la metadata de las que no cambiaron se guarda aquí; la de las que cambiaron la guarda
+    # el que llama con commit_meta cuando termine de reprocesar el CSV -bynd
+    meta = load_meta(meta_path)
+    results = {}
+    unchanged = {}
+
+    def run(key):
+        url, csv_file = pages[key]
+        try:
+            return key, scrape_page_to_csv(url, csv_file, meta.get(url), fetcher, console), None
+        except Exception as e:
+            return key, None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pages)))) as executor:
+        futures = [executor.submit(run, key) for key in pages]
+        for future in as_completed(futures):
+            key, result, error = future.result()
+            url = pages[key][0]
+            if error is not None:
+                if console:
+                    console.print(f"[red]Error al scrapear {key}: {error}[/red]")
+                results[key] = (None, False, None)
+            else:
+                csv_file, entry, changed = result
+                entry = {url: dict(entry, csv_file=csv_file)}
+                if changed:
+                    results[key] = (csv_file, True, entry)
+                else:
+                    unchanged.update(entry)
+                    results[key] = (csv_file, False, None)
+            if on_done:
+                on_done(key)
+
+    commit_meta(unchanged, meta_path)
+    return results
@@ -0,0 +1,404 @@
+import json
+import math
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import Future
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import hotwheels_osm as hwosm
+import hotwheels_database as hwdb
+import hotwheels_history as history
+import hotwheels_scoring as scoring
+import hotwheels_route as route
+import hotwheels_cache as tilecache
+import hotwheels_storeindex as storeindex
+
+# ey server local: tiendas, hotlist e historial se quedan en memoria entre requests -bynd
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# aaa cuántas zonas (ubicación + radio) analizadas guardamos en memoria -bynd
+MAX_AREAS = 16
+
+# chintrolas tope de resultados por request para no mandar megas de JSON -bynd
+MAX_LIMIT = 500
+
+class RequestError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def make_state(config):
+    # fokeis todo lo que vive en memoria mientras corre el server -bynd
+    return {
+        "config": config,
+        "areas": {},
+        # ey el lock solo cubre cambios chiquitos al estado, nunca una descarga -bynd
+        "areas_lock": threading.Lock(),
+        # aaa zonas que alguien está bajando ahorita: {key: Future}, los demás esperan esa -bynd
+        "pending": {},
+        # aaa todas las tiendas de todas las zonas, para /nearest (se toca con areas_lock) -bynd
+        "stores": storeindex.new_index(config["location"]["lat"]),
+        "stats": history.load_stats(json_path=hwosm.HISTORY_FILE),
+        "stats_lock": threading.Lock(),
+        "requests_lock": threading.Lock(),
+        "started_at": datetime.now().isoformat(),
+        "requests": 0
+    }
+
+def area_key(location, radius):
+    return (round(location["lat"], 6), round(location["lng"], 6), int(radius))
+
+def fresh_area(state, key, refresh):
+    area = state["areas"].get(key)
+    if area and not refresh and datetime.now() - area["created_at"] < tilecache.TILE_TTL:
+        return area
+    return None
+
+def get_area(state, location, radius, refresh=False):
+    # q chidoteee features + matriz de la zona; solo la primera vez se baja/lee algo -bynd
+    key = area_key(location, radius)
+    area = fresh_area(state, key, refresh)
+    if area:
+        return area
+
+    with state["areas_lock"]:
+        area = fresh_area(state, key, refresh)
+        if area:
+            return area
+        # ey una zona se analiza una vez aunque lleguen varios requests juntos -bynd
+        future = state["pending"].get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            state["pending"][key] = future
+    if not owner:
+        return future.result()
+
+    # chintrolas la descarga va fuera del lock: otras zonas y /nearest no esperan -bynd
+    try:
+        config = dict(state["config"], location={"lat": key[0], "lng": key[1]}, radius=key[2])
+        features = hwosm.fetch_store_features(config, use_cache=not refresh, interactive=False)
+        area = {
+            "features": features,
+            "matrix": scoring.build_feature_matrix(features) if features else None,
+            "created_at": datetime.now()
+        }
+    except Exception as e:
+        with state["areas_lock"]:
+            state["pending"].pop(key, None)
+        future.set_exception(e)
+        raise
+
+    with state["areas_lock"]:
+        storeindex.add_stores(state["stores"], features)
+        areas = dict(state["areas"])
+        areas.pop(key, None)
+        areas[key] = area
+        # aaa sacamos la zona más vieja si ya hay muchas -bynd
+        while len(areas) > MAX_AREAS:
+            areas.pop(next(iter(areas)))
+        state["areas"] = areas
+        state["pending"].pop(key, None)
+    future.set_result(area)
+    return area
+
+def rank_area(state, location, radius, refresh=False):
+    area = get_area(state, location, radius, refresh)
+    if not area["features"]:
+        return []
+    return scoring.rank_stores(area["features"], state["config"]["weights"], area["matrix"], history=state["stats"])
+
+def record_visit(state, store, found, date=None, branch=None):
+    # vavavava la visita va a history.db y los contadores en memoria se actualizan sin releer -bynd
+    visit = history.add_visit(store, found, date=date, branch=branch, json_path=hwosm.HISTORY_FILE)
+    with state["stats_lock"]:
+        # ey copia nueva: los requests que están rankeando siguen con la anterior -bynd
+        stats = dict(state["stats"])
+        for key in history.stat_keys(visit["store"], visit["date"], visit["branch"]):
+            n, f = stats.get(key, (0, 0))
+            stats[key] = (n + 1, f + int(visit["found_hotwheels"]))
+        state["stats"] = stats
+    return visit
+
+def stats_summary(state, store=None):
+    n, f = state["stats"].get((store or history.ALL_STORES, history.ALL, history.ALL), (0, 0))
+    return {"store": store, "total": n, "found": f, "rate": round(f / n, 4) if n else 0}
+
+# chintrolas helpers para leer parámetros del query string -bynd
+def param(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+def float_param(params, name, default=None):
+    value = param(params, name)
+    if value is None:
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        raise RequestError(f"'{name}' debe ser un número")
+    # ey inf y nan pasan float() pero truenan después (int(inf) es OverflowError) -bynd
+    if not math.isfinite(number):
+        raise RequestError(f"'{name}' debe ser un número finito")
+    return number
+
+def int_param(params, name, default=None):
+    value = float_param(params, name)
+    if value is None:
+        return default
+    return int(value)
+
+def bool_param(params, name, default=None):
+    value = param(params, name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "si", "sí")
+
+def date_param(params, name):
+    value = param(params, name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        raise RequestError(f"'{name}' debe ser una fecha ISO (ej. 2025-03-01 o 2025-03-01T09:30)")
+
+def limit_param(params, default):
+    return max(1, min(int_param(params, "limit", default), MAX_LIMIT))
+
+def area_params(state, params):
+    config = state["config"]
+    location = {
+        "lat": float_param(params, "lat", config["location"]["lat"]),
+        "lng": float_param(params, "lng", config["location"]["lng"])
+    }
+    radius_km = float_param(params, "radius", None)
+    radius = int(radius_km * 1000) if radius_km is not None else config["radius"]
+    if radius <= 0:
+        raise RequestError("'radius' debe ser mayor a 0")
+    return location, radius
+
+def hotlist_filters(params):
+    return {
+        "jdm": bool_param(params, "jdm"), "premium": bool_param(params, "premium"),
+        "th": bool_param(params, "th"), "sth": bool_param(params, "sth"), "brand": param(params, "brand")
+    }
+
+# fokeis endpoints: cada uno recibe (state, params, body) y regresa un dict -bynd
+def handle_health(state, params, body):
+    return {
+        "ok": True,
+        "started_at": state["started_at"],
+        "requests": state["requests"],
+        "areas": len(state["areas"]),
+        "stores": len(state["stores"]["stores"]),
+        "hotlist": hwdb.count_hotlist(),
+        "visits": stats_summary(state)["total"]
+    }
+
+def handle_ranking(state, params, body):
+    location, radius = area_params(state, params)
+    ranked = rank_area(state, location, radius, bool_param(params, "refresh", False))
+    limit = limit_param(params, 20)
+    return {
+        "location": location,
+        "radius": radius,
+        "total": len(ranked),
+        "stores": [dict(store, rank=i) for i, store in enumerate(ranked[:limit], 1)]
+    }
+
+def handle_nearest(state, params, body):
+    # chintrolas k más cercanas entre todo lo que ya se analizó, sin descargar nada -bynd
+    location, _ = area_params(state, params)
+    k = max(1, min(int_param(params, "k", 5), MAX_LIMIT))
+    with state["areas_lock"]:
+        stores = storeindex.query_nearest(state["stores"], location, k)
+    ranked = scoring.rank_stores(stores, state["config"]["weights"], history=state["stats"])
+    ranked.sort(key=lambda store: store["distance_km"])
+    return {"location": location, "total": len(ranked), "stores": ranked}
+
+def handle_route(state, params, body):
+    location, radius = area_params(state, params)
+    ranked = rank_area(state, location, radius, bool_param(params, "refresh", False))
+    route_config = state["config"].get("route", hwosm.DEFAULT_CONFIG["route"])
+    plan = route.plan_route(
+        location,
+        ranked,
+        k=int_param(params, "stops", route_config.get("stops", 3)),
+        return_home=bool_param(params, "return_home", route_config.get("return_home", True)),
+        km_per_100_points=float_param(params, "km_per_100", route_config.get("km_per_100_points", 0))
+    )
+    return {
+        "stops": [dict(store, order=i, leg_km=round(leg, 3))
+                  for i, (store, leg) in enumerate(zip(plan["stops"], plan["legs_km"]), 1)],
+        "total_km": round(plan["total_km"], 3),
+        "return_home": plan["return_home"],
+        "return_km": round(plan["legs_km"][-1], 3) if plan["return_home"] and plan["legs_km"] else None,
+        "dropped": [store["name"] for store in plan["dropped"]]
+    }
+
+def handle_hotlist_search(state, params, body):
+    query = param(params, "q", "").strip()
+    if not query:
+        raise RequestError("Falta 'q'")
+    filters = hotlist_filters(params)
+    mode = param(params, "mode", "auto")
+    if mode == "auto":
+        results, mode = hwdb.find_in_hotlist(query, filters)
+    elif mode in ("substring", "prefix", "fuzzy"):
+        results = hwdb.search_hotlist(query, filters, mode=mode)
+    else:
+        raise RequestError("'mode' debe ser auto, substring, prefix o fuzzy")
+    limit = limit_param(params, 50)
+    return {"query": query, "mode": mode, "total": len(results), "cars": results[:limit]}
+
+def handle_hotlist_filter(state, params, body):
+    flag = param(params, "flag")
+    brand = param(params, "brand")
+    if flag:
+        if flag not in ("jdm", "premium", "muscle", "th", "sth"):
+            raise RequestError("'flag' debe ser jdm, premium, muscle, th o sth")
+        results = hwdb.filter_hotlist(flag)
+    elif brand:
+        results = hwdb.filter_hotlist_brand(brand, exact=bool_param(params, "exact", False))
+    else:
+        raise RequestError("Falta 'flag' o 'brand'")
+    limit = limit_param(params, 50)
+    return {"total": len(results), "cars": results[:limit]}
+
+def handle_visits(state, params, body):
+    store = param(params, "store")
+    visits = history.query_visits(
+        store=store, since=date_param(params, "since"), until=date_param(params, "until"),
+        found=bool_param(params, "found"), limit=limit_param(params, 20), newest_first=True,
+        json_path=hwosm.HISTORY_FILE
+    )
+    visits.reverse()
+    return {"visits": visits, "summary": stats_summary(state, store)}
+
+def handle_add_visit(state, params, body):
+    if not isinstance(body, dict) or not body.get("store") or "found" not in body:
+        raise RequestError("Body: {\"store\": ..., \"found\": true|false, \"date\", \"osm_id\" y \"location\": opcionales}")
+    date = body.get("date")
+    if date is not None:
+        # fokeis una fecha mala en history.db descuadra el orden y los contadores por día/hora -bynd
+        try:
+            date = datetime.fromisoformat(str(date)).isoformat()
+        except ValueError:
+            raise RequestError("'date' debe ser una fecha ISO (ej. 2025-03-01 o 2025-03-01T09:30)")
+    # aaa osm_id + location (tal cual vienen en /ranking) identifican la sucursal -bynd
+    branch = None
+    if body.get("osm_id") is not None:
+        location = body.get("location")
+        try:
+            osm_id = int(body["osm_id"])
+            location = {"lat": float(location["lat"]), "lng": float(location["lng"])}
+        except (TypeError, KeyError, ValueError, OverflowError):
+            raise RequestError("Con 'osm_id' manda 'location': {\"lat\": ..., \"lng\": ...}")
+        if not all(math.isfinite(v) for v in location.values()):
+            raise RequestError("'location' debe tener números finitos")
+        branch = history.branch_key(osm_id, location)
+    visit = record_visit(state, str(body["store"]), bool(body["found"]), date, branch)
+    return {"visit": visit, "summary": stats_summary(state, visit["store"])}
+
+def handle_reload(state, params, body):
+    # aaa relee config.json e historial (ej. si alguien usó el menú mientras tanto) -bynd
+    config = hwosm.load_config()
+    hwdb.set_hotlist_backend(config.get("hotlist_backend", "json"))
+    with state["areas_lock"]:
+        state["config"] = config
+        state["areas"] = {}
+        state["stores"] = storeindex.new_index(config["location"]["lat"])
+    with state["stats_lock"]:
+        state["stats"] = history.load_stats(json_path=hwosm.HISTORY_FILE)
+    return {"ok": True}
+
+ROUTES = {
+    ("GET", "/health"): handle_health,
+    ("GET", "/ranking"): handle_ranking,
+    ("GET", "/nearest"): handle_nearest,
+    ("GET", "/route"): handle_route,
+    ("GET", "/hotlist/search"): handle_hotlist_search,
+    ("GET", "/hotlist/filter"): handle_hotlist_filter,
+    ("GET", "/visits"): handle_visits,
+    ("POST", "/visits"): handle_add_visit,
+    ("POST", "/reload"): handle_reload,
+}
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "HotWheelsScout/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        handler = ROUTES.get((method, url.path.rstrip("/") or "/"))
+        state = self.server.state
+        with state["requests_lock"]:
+            state["requests"] += 1
+
+        try:
+            if handler is None:
+                raise RequestError(f"No existe {method} {url.path}", 404)
+            body = None
+            if method == "POST":
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else {}
+                except ValueError:
+                    raise RequestError("El body no es JSON válido")
+            status, data = 200, handler(state, parse_qs(url.query), body)
+        except RequestError as e:
+            status, data = e.status, {"error": str(e)}
+        except Exception as e:
+            hwosm.console.print(f"[red]Error en {method} {url.path}: {e}[/red]")
+            status, data = 500, {"error": str(e)}
+
+        data["took_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        payload = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # ey el log va a la consola de rich (stderr), no a stdout -bynd
+        hwosm.console.print(f"[dim]{self.address_string()} {format % args}[/dim]")
+
+def make_server(state, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.state = state
+    return server
+
+def warm_up(state, refresh=False):
+    # vavavava cargamos hotlist y la zona de config.json antes del primer request -bynd
+    hwdb.count_hotlist()
+    config = state["config"]
+    get_area(state, config["location"], config["radius"], refresh)
+
+def serve(config, host=DEFAULT_HOST, port=DEFAULT_PORT, warm=True, refresh=False, on_ready=None):
+    state = make_state(config)
+    if warm:
+        warm_up(state, refresh)
+    server = make_server(state, host, port)
+    if on_ready:
+        on_ready(server)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
@@ -0,0 +1,179 @@
+import math
+import heapq
+from datetime import datetime
+
+import hotwheels_geo as geo
+import hotwheels_cache as tilecache
+
+# ey índice espacial de tiendas ya analizadas + las áreas que ya cubrimos -bynd
+STORE_CELL_KM = 0.5
+
+def store_key(osm_id, location):
+    # aaa el id solo puede repetirse entre node y way, con la ubicación ya no -bynd
+    return (osm_id, round(location["lat"], 7), round(location["lng"], 7))
+
+def new_index(ref_lat=0.0, cell_km=STORE_CELL_KM):
+    lat_deg, lng_deg = geo.cell_size_deg(ref_lat, cell_km)
+    return {
+        "cell_km": cell_km,
+        "lat_deg": lat_deg,
+        "lng_deg": lng_deg,
+        "stores": [],
+        "keys": {},
+        "cells": {},
+        # aaa celdas extremas (min_i, max_i, min_j, max_j) para saber cuándo parar el kNN -bynd
+        "bounds": None,
+        "areas": []
+    }
+
+def _cell(index, lat, lng):
+    return (int(math.floor(lat / index["lat_deg"])), int(math.floor(lng / index["lng_deg"])))
+
+def add_stores(index, features):
+    # chintrolas solo agrega las que no estaban; regresa cuántas entraron -bynd
+    added = 0
+    for store in features:
+        key = store_key(store["osm_id"], store["location"])
+        if key in index["keys"]:
+            continue
+        i = len(index["stores"])
+        index["stores"].append(store)
+        index["keys"][key] = i
+        cell = _cell(index, store["location"]["lat"], store["location"]["lng"])
+        index["cells"].setdefault(cell, []).append(i)
+        b = index["bounds"]
+        index["bounds"] = (cell[0], cell[0], cell[1], cell[1]) if b is None else (
+            min(b[0], cell[0]), max(b[1], cell[0]), min(b[2], cell[1]), max(b[3], cell[1])
+        )
+        added += 1
+    return added
+
+def get_store(index, osm_id, location):
+    i = index["keys"].get(store_key(osm_id, location))
+    return index["stores"][i] if i is not None else None
+
+def add_area(index, location, radius, created_at=None):
+    index["areas"].append({
+        "location": {"lat": location["lat"], "lng": location["lng"]},
+        "radius": radius,
+        "created_at": created_at or datetime.now().isoformat()
+    })
+
+def live_areas(index, ttl=tilecache.TILE_TTL):
+    now = datetime.now()
+    return [a for a in index["areas"] if now - datetime.fromisoformat(a["created_at"]) < ttl]
+
+def _inside_area(area, lat, lng, reach_km=0.0):
+    # fokeis el punto (y un círculo de reach_km alrededor) cae dentro del área -bynd
+    center = area["location"]
+    return geo.haversine_km(center["lat"], center["lng"], lat, lng) + reach_km <= area["radius"] / 1000 + 1e-9
+
+def covers(index, location, radius, ttl=tilecache.TILE_TTL):
+    # q chidoteee el círculo nuevo cabe completo en un área ya analizada -bynd
+    return any(_inside_area(a, location["lat"], location["lng"], radius / 1000) for a in live_areas(index, ttl))
+
+def tile_covered(index, geohash, ttl=tilecache.TILE_TTL):
+    # vavavava un tile cuyas 4 esquinas caen en un área: todas sus tiendas ya están en el índice -bynd
+    s, w, n, e = tilecache.geohash_bbox(geohash)
+    corners = [(s, w), (s, e), (n, w), (n, e)]
+    return any(all(_inside_area(a, lat, lng) for lat, lng in corners) for a in live_areas(index, ttl))
+
+def _cells_in_box(index, lat, lng, radius_km):
+    dlat, dlng = geo.bbox_deltas(lat, radius_km)
+    i0, j0 = _cell(index, lat - dlat, lng - dlng)
+    i1, j1 = _cell(index, lat + dlat, lng + dlng)
+    cells = index["cells"]
+    ids = []
+    for i in range(i0, i1 + 1):
+        for j in range(j0, j1 + 1):
+            ids.extend(cells.get((i, j), ()))
+    return ids
+
+def _with_distances(index, ids, distances):
+    # ey copias con distance_km recalculado desde el punto nuevo -bynd
+    stores = index["stores"]
+    return [dict(stores[i], distance_km=float(d)) for i, d in zip(ids, distances)]
+
+def query_radius(index, location, radius_km, keep=None):
+    # aaa tiendas a menos de radius_km: solo se revisan las celdas de la caja -bynd
+    # chintrolas keep(store) opcional para filtrar antes de copiar -bynd
+    ids = sorted(_cells_in_box(index, location["lat"], location["lng"], radius_km))
+    if keep is not None:
+        ids = [i for i in ids if keep(index["stores"][i])]
+    if not ids:
+        return []
+    lats, lngs = geo.to_arrays([index["stores"][i]["location"] for i in ids])
+    inside, distances = geo.within_radius(location["lat"], location["lng"], radius_km, lats, lngs)
+    return _with_distances(index, [ids[i] for i in inside], distances)
+
+def query_nearest(index, location, k):
+    # fokeis k más cercanas: anillos de celdas hasta que ya no puede haber algo más cerca -bynd
+    if k <= 0 or not index["stores"]:
+        return []
+    lat, lng = location["lat"], location["lng"]
+    ci, cj = _cell(index, lat, lng)
+    cells = index["cells"]
+    # aaa lo que garantiza cada anillo extra, medido en km por el lado más chico de la celda -bynd
+    step_km = min(index["lat_deg"] * 111.32, index["lng_deg"] * 111.32 * max(math.cos(math.radians(lat)), 0.01))
+    min_i, max_i, min_j, max_j = index["bounds"]
+    max_ring = max(ci - min_i, max_i - ci, cj - min_j, max_j - cj)
+
+    best = []
+    ring = 0
+    while ring <= max_ring:
+        ids = []
+        for i in range(ci - ring, ci + ring + 1):
+            for j in range(cj - ring, cj + ring + 1):
+                if max(abs(i - ci), abs(j - cj)) == ring:
+                    ids.extend(cells.get((i, j), ()))
+        if ids:
+            lats, lngs = geo.to_arrays([index["stores"][i]["location"] for i in ids])
+            for i, d in zip(ids, geo.haversine_to_many(lat, lng, lats, lngs)):
+                best.append((float(d), i))
+            best = heapq.nsmallest(k, best)
+        # vavavava con k encontradas y el anillo ya más lejos que la k-ésima, terminamos -bynd
+        if len(best) >= k and best[-1][0] <= ring * step_km:
+            break
+        ring += 1
+
+    return _with_distances(index, [i for _, i in best], [d for d, _ in best])
+
+def prune(index, ttl=tilecache.TILE_TTL):
+    # chintrolas quitamos áreas vencidas y las tiendas que ya no caen en ninguna -bynd
+    areas = live_areas(index, ttl)
+    if len(areas) == len(index["areas"]):
+        return index
+    ref_lat = areas[0]["location"]["lat"] if areas else 0.0
+    fresh = new_index(ref_lat, index["cell_km"])
+    fresh["areas"] = areas
+    add_stores(fresh, [
+        s for s in index["stores"]
+        if any(_inside_area(a, s["location"]["lat"], s["location"]["lng"]) for a in areas)
+    ])
+    return fresh
+
+def from_cache(analysis, ttl=tilecache.TILE_TTL):
+    # ey del cache.json; también entiende el formato viejo de una sola zona -bynd
+    if not analysis:
+        return new_index()
+    if "areas" in analysis:
+        areas, stores = analysis["areas"], analysis["stores"]
+    else:
+        areas = [{k: analysis[k] for k in ("location", "radius", "created_at")}]
+        stores = analysis["features"]
+    index = new_index(areas[0]["location"]["lat"] if areas else 0.0)
+    index["areas"] = list(areas)
+    add_stores(index, stores)
+    return prune(index, ttl)
+
+def merge(index, other):
+    # chintrolas áreas y tiendas de otro índice que no teníamos -bynd
+    known = {(a["location"]["lat"], a["location"]["lng"], a["radius"], a["created_at"]) for a in index["areas"]}
+    for area in other["areas"]:
+        if (area["location"]["lat"], area["location"]["lng"], area["radius"], area["created_at"]) not in known:
+            index["areas"].append(area)
+    add_stores(index, other["stores"])
+    return index
+
+def to_cache(index):
+    return {"areas": index["areas"], "stores": index["stores"]}
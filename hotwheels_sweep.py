@@ -0,0 +1,268 @@
+import os
+import math
+import time
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import hotwheels_osm as hwosm
+import hotwheels_geo as geo
+import hotwheels_cache as tilecache
+import hotwheels_overpass as overpass
+import hotwheels_extract as extract
+import hotwheels_metrics as metrics
+
+# ey barrido: varias ubicaciones candidatas con una sola descarga compartida -bynd
+SWEEP_TOP_N = 10
+SWEEP_GOOD_SCORE = 70
+
+# aaa límite para no armar grids absurdos por error (ej. paso en metros) -bynd
+MAX_SWEEP_LOCATIONS = 5000
+
+# chintrolas tiendas por tarea del pool, y debajo de esto ni vale la pena abrir procesos -bynd
+SWEEP_CHUNK = 2000
+SWEEP_MIN_PARALLEL = 4000
+
+# ey para los resúmenes cuenta ubicaciones x tiendas -bynd
+SWEEP_MIN_PARALLEL_PAIRS = 400_000
+
+def grid_locations(south, west, north, east, step_km):
+    # q chidoteee puntos cada step_km dentro de la caja, filas a lo largo de la latitud -bynd
+    if step_km <= 0:
+        raise ValueError("El paso del grid debe ser mayor a 0")
+    if south > north or west > east:
+        raise ValueError("La caja debe ser sur, oeste, norte, este")
+
+    dlat, _ = geo.bbox_deltas(0.0, step_km)
+    rows = int(math.floor((north - south) / dlat + 1e-9)) + 1
+    locations = []
+    for i in range(rows):
+        lat = south + i * dlat
+        # aaa el ancho en grados cambia con la latitud, así el paso sigue siendo step_km -bynd
+        dlng = dlat / max(math.cos(math.radians(lat)), 0.01)
+        cols = int(math.floor((east - west) / dlng + 1e-9)) + 1
+        for j in range(cols):
+            locations.append({"lat": round(lat, 6), "lng": round(west + j * dlng, 6)})
+        if len(locations) > MAX_SWEEP_LOCATIONS:
+            raise ValueError(f"El grid tiene más de {MAX_SWEEP_LOCATIONS} puntos, usa un paso más grande")
+    return locations
+
+def grid_around(center, radius_km, step_km):
+    # aaa grid en la caja que contiene el círculo alrededor de center -bynd
+    dlat, dlng = geo.bbox_deltas(center["lat"], radius_km)
+    return grid_locations(center["lat"] - dlat, center["lng"] - dlng, center["lat"] + dlat, center["lng"] + dlng, step_km)
+
+def parse_location(text):
+    # ey "lat,lng" -> {"lat", "lng"} -bynd
+    try:
+        lat, lng = (float(part) for part in text.replace(" ", "").split(","))
+    except ValueError:
+        raise ValueError(f"Ubicación inválida '{text}', usa lat,lng")
+    return {"lat": lat, "lng": lng}
+
+def read_locations(path):
+    # fokeis una ubicación "lat,lng" por línea; vacías y # se ignoran -bynd
+    locations = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                locations.append(parse_location(line))
+    return locations
+
+def enclosing_circle(locations, radius):
+    # vavavava un círculo que cubre todas las áreas: centro de la caja + distancia al más lejano -bynd
+    lats, lngs = geo.to_arrays(locations)
+    center = {"lat": float((lats.min() + lats.max()) / 2), "lng": float((lngs.min() + lngs.max()) / 2)}
+    reach_km = float(geo.haversine_to_many(center["lat"], center["lng"], lats, lngs).max())
+    return center, int(math.ceil(reach_km * 1000)) + radius
+
+def union_tiles(locations, radius_km):
+    # chintrolas tiles de todas las áreas sin repetir: los que se enciman se piden una vez -bynd
+    hashes = set()
+    for location in locations:
+        hashes.update(tilecache.tiles_for_circle(location, radius_km))
+    return sorted(hashes)
+
+def unique_elements(kind, hashes, cache, refresh=False):
+    seen = set()
+    elements = []
+    for element in hwosm.iter_tile_elements(kind, hashes, cache, refresh):
+        key = (element.get("type"), element.get("id"))
+        if key not in seen:
+            seen.add(key)
+            elements.append(element)
+    return elements
+
+def stores_in_reach(stores, locations, radius_km):
+    # q chidoteee solo las tiendas que caen en el radio de alguna ubicación -bynd
+    # ey los tiles (y el círculo del extracto) traen de más: no vale la pena analizarlas -bynd
+    located = [(store, hwosm.get_element_location(store)) for store in stores]
+    located = [(store, location) for store, location in located if location]
+    if not located:
+        return []
+    lats, lngs = geo.to_arrays([location for _, location in located])
+    # aaa ordenadas por latitud, cada ubicación solo revisa su franja con searchsorted -bynd
+    order = np.argsort(lats, kind="stable")
+    lats, lngs = lats[order], lngs[order]
+    keep = np.zeros(len(order), dtype=bool)
+    for location in locations:
+        dlat, _ = geo.bbox_deltas(location["lat"], radius_km)
+        lo = np.searchsorted(lats, location["lat"] - dlat, side="left")
+        hi = np.searchsorted(lats, location["lat"] + dlat, side="right")
+        if lo >= hi:
+            continue
+        inside, _ = geo.within_radius(location["lat"], location["lng"], radius_km, lats[lo:hi], lngs[lo:hi])
+        keep[lo + inside] = True
+    return [located[i][0] for i in np.sort(order[keep])]
+
+def fetch_sweep_elements(locations, config, use_cache=True):
+    # aaa tiendas y escuelas de todas las ubicaciones: 2 queries en total (o solo caché) -bynd
+    radius = config["radius"]
+    offline_db = extract.activate(config.get("offline_db"))
+    if offline_db:
+        center, reach = enclosing_circle(locations, radius)
+        stores = extract.query_area(offline_db, "stores", center, reach, hwosm.STORE_SHOP_TYPES)
+        schools = extract.query_area(offline_db, "schools", center, reach + hwosm.SCHOOL_RADIUS)
+        return stores, schools
+
+    cache = hwosm.load_cache()
+    refresh = not use_cache
+    overpass.configure(config.get("overpass"))
+
+    school_hashes = union_tiles(locations, (radius + hwosm.SCHOOL_RADIUS) / 1000)
+    store_hashes = union_tiles(locations, radius / 1000)
+    console = hwosm.console
+    console.print(f"[dim]🧩 {len(locations)} ubicaciones -> {len(store_hashes)} tiles de tiendas, {len(school_hashes)} de escuelas[/dim]")
+
+    schools_future = overpass.submit(unique_elements, "schools", school_hashes, cache, refresh)
+    stores = unique_elements("stores", store_hashes, cache, refresh)
+    schools = schools_future.result()
+    hwosm.save_cache(cache)
+    return stores, schools
+
+# ey estado de cada proceso del pool, se llena una vez con el initializer -bynd
+_worker = {}
+
+def _init_extract(school_index, config):
+    _worker["school_index"] = school_index
+    _worker["config"] = config
+
+def _extract_chunk(stores):
+    # fokeis features sin distancia: la distancia depende de cada ubicación y se pone después -bynd
+    features = []
+    for store in stores:
+        analyzed = hwosm.analyze_store(store, _worker["config"], _worker["school_index"], 0.0)
+        if analyzed:
+            features.append(analyzed)
+    return features
+
+def _init_summary(lats, lngs, scores, names, radius_km, top_n, good_score):
+    _worker.update(lats=lats, lngs=lngs, scores=scores, names=names,
+                   radius_km=radius_km, top_n=top_n, good_score=good_score)
+
+def summarize_location(location):
+    # q chidoteee tiendas dentro del radio; ya vienen ordenadas por score así que el top son las primeras -bynd
+    inside, distances = geo.within_radius(
+        location["lat"], location["lng"], _worker["radius_km"], _worker["lats"], _worker["lngs"]
+    )
+    summary = {"lat": location["lat"], "lng": location["lng"], "stores": int(len(inside))}
+    if not len(inside):
+        return dict(summary, top_mean=0.0, top_km=None, best_score=0, best_store=None, good_stores=0)
+
+    # aaa within_radius regresa los índices en orden, o sea del mejor score al peor -bynd
+    scores = _worker["scores"][inside]
+    top = slice(0, _worker["top_n"])
+    return dict(
+        summary,
+        top_mean=round(float(scores[top].mean()), 2),
+        top_km=round(float(distances[top].mean()), 2),
+        best_score=int(scores[0]),
+        best_store=_worker["names"][inside[0]],
+        good_stores=int((scores >= _worker["good_score"]).sum())
+    )
+
+def _summarize_chunk(locations):
+    return [summarize_location(location) for location in locations]
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _init_measured(initializer, initargs, measure):
+    # ey con fork el hijo hereda las métricas del padre: las tiramos para no contarlas doble -bynd
+    metrics.reset()
+    metrics.enable(measure)
+    initializer(*initargs)
+
+def _run_measured(fn, chunk):
+    # aaa cada tarea regresa su resultado y las métricas que juntó, el padre las suma -bynd
+    return fn(chunk), metrics.drain()
+
+def run_pool(fn, chunks, initializer, initargs, workers):
+    # aaa con un solo worker (o poco trabajo) corremos en este proceso, mismo resultado -bynd
+    # chintrolas regresa (resultados, procesos que de verdad se usaron) -bynd
+    if workers <= 1 or len(chunks) <= 1:
+        initializer(*initargs)
+        return [fn(chunk) for chunk in chunks], 1
+    used = min(workers, len(chunks))
+    with ProcessPoolExecutor(max_workers=used, initializer=_init_measured,
+                             initargs=(initializer, initargs, metrics.enabled())) as pool:
+        results = []
+        for result, snapshot in pool.map(functools.partial(_run_measured, fn), chunks):
+            metrics.merge(snapshot)
+            results.append(result)
+    return results, used
+
+def sweep(locations, config, top_n=SWEEP_TOP_N, good_score=SWEEP_GOOD_SCORE, workers=None, use_cache=True):
+    # chintrolas barrido completo: descarga compartida -> features y resumen en paralelo -bynd
+    if not locations:
+        raise ValueError("No hay ubicaciones para el barrido")
+    if len(locations) > MAX_SWEEP_LOCATIONS:
+        raise ValueError(f"Máximo {MAX_SWEEP_LOCATIONS} ubicaciones por barrido")
+    workers = workers or os.cpu_count() or 1
+    timings = {}
+
+    start = time.perf_counter()
+    stores, schools = fetch_sweep_elements(locations, config, use_cache)
+    fetched = len(stores)
+    stores = stores_in_reach(stores, locations, config["radius"] / 1000)
+    timings["fetch_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    school_index = hwosm.build_school_index(schools)
+    parallel = workers if len(stores) >= SWEEP_MIN_PARALLEL else 1
+    chunk_size = max(SWEEP_CHUNK, math.ceil(len(stores) / (parallel * 4)))
+    chunks, features_workers = run_pool(_extract_chunk, chunked(stores, chunk_size), _init_extract,
+                                        (school_index, config), parallel)
+    features = [f for chunk in chunks for f in chunk]
+    timings["features_s"] = time.perf_counter() - start
+
+    # ey el score no depende de dónde está casa: se calcula una vez por tienda -bynd
+    start = time.perf_counter()
+    ranked = hwosm.rank_with_history(features, config) if features else []
+    if ranked:
+        lats, lngs = geo.to_arrays([store["location"] for store in ranked])
+    else:
+        lats, lngs = np.zeros(0), np.zeros(0)
+    scores = np.array([store["score"] for store in ranked], dtype=np.int64)
+    names = [store["name"] for store in ranked]
+
+    parallel = workers if len(locations) * len(ranked) >= SWEEP_MIN_PARALLEL_PAIRS else 1
+    summary_args = (lats, lngs, scores, names, config["radius"] / 1000, top_n, good_score)
+    chunks, summary_workers = run_pool(_summarize_chunk, chunked(locations, math.ceil(len(locations) / (parallel * 4))),
+                                       _init_summary, summary_args, parallel)
+    summaries = [s for chunk in chunks for s in chunk]
+    timings["summary_s"] = time.perf_counter() - start
+
+    # fokeis las mejores primero: promedio del top, luego cuántas buenas, luego más cerca -bynd
+    summaries.sort(key=lambda s: (-s["top_mean"], -s["good_stores"], s["top_km"] if s["top_km"] is not None else math.inf))
+    return {
+        "locations": summaries,
+        "unique_stores": len(ranked),
+        "fetched_stores": fetched,
+        "schools": len(schools),
+        # ey procesos que de verdad corrieron cada etapa (1 = en este mismo proceso) -bynd
+        "workers": {"requested": workers, "features": features_workers, "summary": summary_workers},
+        "timings": {key: round(value, 3) for key, value in timings.items()}
+    }
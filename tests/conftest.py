@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# ey los módulos viven sueltos en la raíz del repo -bynd
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+sys.path.insert(0, ROOT)
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # aaa todos los archivos (CSV, metadata, hotlist) se escriben en una carpeta temporal -bynd
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,86 @@
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+import hotwheels_database as hwdb
+
+def legacy_csv_to_json(csv_file, year):
+    # ey el parser de antes (fila por fila con iterrows), tal cual, para comparar -bynd
+    df = pd.read_csv(csv_file, encoding='utf-8')
+    df = df.dropna(how='all')
+    cars = []
+
+    for idx, row in df.iterrows():
+        name = None
+        for col in hwdb.NAME_COLUMNS:
+            if col in df.columns and pd.notna(row[col]):
+                name = str(row[col]).strip()
+                if name and name != 'nan' and name != '':
+                    break
+
+        if not name or name == 'nan' or name == '':
+            continue
+
+        series = "Unknown"
+        for col in hwdb.SERIES_COLUMNS:
+            if col in df.columns and pd.notna(row[col]):
+                series = str(row[col]).strip()
+                if series and series != 'nan' and series != '':
+                    break
+
+        number = str(idx + 1)
+        for col in hwdb.NUMBER_COLUMNS:
+            if col in df.columns and pd.notna(row[col]):
+                num_val = str(row[col]).strip()
+                if num_val and num_val != 'nan' and num_val != '':
+                    number = num_val
+                    break
+
+        # aaa TH/STH buscando en str(row.values), como antes -bynd
+        is_th = False
+        is_sth = False
+        row_str = str(row.values).lower()
+        if 'super treasure hunt' in row_str or 'sth' in row_str or '$th' in row_str:
+            is_sth = True
+        elif 'treasure hunt' in row_str or ' th ' in row_str:
+            is_th = True
+
+        cars.append({"number": number, "name": name, "series": series, "year": year,
+                     "is_th": is_th, "is_sth": is_sth})
+
+    return cars
+
+# chintrolas casos raros: celdas vacías, filas sin nombre, columnas alternas, TH a media celda -bynd
+EDGE_CSV = """Toy #,Casting,Segment,Col.#,Notes
+A1,Mazda RX-7,HW J-Imports,1,
+,Unnamed row,,2,
+A3,,Batman,3,sin nombre
+,,,,
+A5, Datsun 510 ,  ,5,"Mainline th variant"
+A6,Custom '77 Dodge Van,Factory Fresh,6,$TH
+A7,'87 Audi quattro,Super Treasure Hunt Series,,
+A8,Twin Mill,HW Art Cars,8,th
+A9,Bone Shaker,,9,"Treasure Hunt
+segunda línea"
+"""
+
+@pytest.mark.parametrize("csv_name,year", [("hotwheels_2025.csv", 2025), ("hotwheels_2026.csv", 2026)])
+def test_bundled_csv_matches_legacy_parser(csv_name, year):
+    csv_file = os.path.join(ROOT, csv_name)
+    if not os.path.exists(csv_file):
+        pytest.skip(f"{csv_name} no está en el repo")
+
+    expected = legacy_csv_to_json(csv_file, year)
+    assert expected
+    assert hwdb.csv_to_json(csv_file, year) == expected
+
+def test_edge_cases_match_legacy_parser(workdir):
+    csv_file = str(workdir / "edge.csv")
+    with open(csv_file, "w", encoding="utf-8") as f:
+        f.write(EDGE_CSV)
+
+    expected = legacy_csv_to_json(csv_file, 2025)
+    assert hwdb.csv_to_json(csv_file, 2025) == expected
+    assert any(car["is_sth"] for car in expected) and any(car["is_th"] for car in expected)
@@ -0,0 +1,115 @@
+import os
+import json
+
+import pytest
+
+from conftest import FIXTURES
+import hotwheels_scrape as scrape
+import hotwheels_database as hwdb
+
+URL = hwdb.YEAR_PAGES[2025][0]
+CSV_FILE = hwdb.YEAR_PAGES[2025][1]
+PAGES = {2025: (URL, CSV_FILE)}
+FIXTURE = os.path.join(FIXTURES, "list_2025.html")
+
+def recording(fetcher, statuses):
+    # ey guardamos qué status regresó cada petición -bynd
+    def fetch(url, headers):
+        status, response_headers, body = fetcher(url, headers)
+        statuses.append(status)
+        return status, response_headers, body
+    return fetch
+
+def no_conditionals_fetcher(path):
+    # aaa servidor que ignora If-None-Match y no manda ETag: siempre 200 con el mismo HTML -bynd
+    def fetch(url, headers):
+        with open(path, "rb") as f:
+            return 200, {}, f.read()
+    return fetch
+
+def read_meta():
+    with open(scrape.SCRAPE_META_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+def test_first_fetch_writes_csv_and_leaves_meta_pending(workdir):
+    statuses = []
+    fetcher = recording(scrape.fixture_fetcher({URL: FIXTURE}), statuses)
+
+    results = scrape.scrape_pages(PAGES, fetcher=fetcher)
+
+    csv_file, changed, entry = results[2025]
+    assert statuses == [200]
+    assert changed and csv_file == CSV_FILE and os.path.exists(CSV_FILE)
+    assert entry[URL]["sha256"] and entry[URL]["etag"]
+    # chintrolas la página cambió: nada en disco hasta que el que llama confirme -bynd
+    assert not os.path.exists(scrape.SCRAPE_META_FILE)
+
+def test_etag_match_gets_304(workdir):
+    statuses = []
+    fetcher = recording(scrape.fixture_fetcher({URL: FIXTURE}), statuses)
+    _, _, entry = scrape.scrape_pages(PAGES, fetcher=fetcher)[2025]
+    scrape.commit_meta(entry)
+    csv_mtime = os.stat(CSV_FILE).st_mtime_ns
+
+    csv_file, changed, pending = scrape.scrape_pages(PAGES, fetcher=fetcher)[2025]
+
+    assert statuses == [200, 304]
+    assert csv_file == CSV_FILE and not changed and pending is None
+    assert os.stat(CSV_FILE).st_mtime_ns == csv_mtime
+    assert read_meta()[URL]["sha256"] == entry[URL]["sha256"]
+
+def test_same_hash_without_conditionals_is_unchanged(workdir):
+    fetcher = no_conditionals_fetcher(FIXTURE)
+    _, changed, entry = scrape.scrape_pages(PAGES, fetcher=fetcher)[2025]
+    assert changed
+    scrape.commit_meta(entry)
+
+    _, changed, pending = scrape.scrape_pages(PAGES, fetcher=fetcher)[2025]
+
+    assert not changed and pending is None
+    assert read_meta()[URL]["etag"] is None
+
+def test_missing_csv_forces_download(workdir):
+    statuses = []
+    fetcher = recording(scrape.fixture_fetcher({URL: FIXTURE}), statuses)
+    _, _, entry = scrape.scrape_pages(PAGES, fetcher=fetcher)[2025]
+    scrape.commit_meta(entry)
+    os.remove(CSV_FILE)
+
+    _, changed, _ = scrape.scrape_pages(PAGES, fetcher=fetcher)[2025]
+
+    assert statuses == [200, 200]
+    assert changed and os.path.exists(CSV_FILE)
+
+def test_update_hotlist_saves_meta_only_after_csv_is_processed(workdir, monkeypatch):
+    monkeypatch.setattr(hwdb, "_hotlist_index", None)
+    fetcher = scrape.fixture_fetcher({URL: FIXTURE})
+    csv_to_json = hwdb.csv_to_json
+
+    def broken(csv_file, year):
+        raise ValueError("CSV roto")
+
+    monkeypatch.setattr(hwdb, "csv_to_json", broken)
+    with pytest.raises(ValueError):
+        hwdb.update_hotlist([2025], fetcher)
+    # ey el CSV quedó bajado pero sin metadata: la próxima corrida no lo ve "sin cambios" -bynd
+    assert os.path.exists(CSV_FILE)
+    assert URL not in scrape.load_meta()
+
+    calls = []
+
+    def counting(csv_file, year):
+        calls.append(year)
+        return csv_to_json(csv_file, year)
+
+    monkeypatch.setattr(hwdb, "csv_to_json", counting)
+    result = hwdb.update_hotlist([2025], fetcher)
+    assert calls == [2025]
+    assert len(result["hotlist"]) == 5
+    assert sum(car["is_sth"] for car in result["hotlist"]) == 1
+    assert URL in scrape.load_meta()
+
+    # aaa ya procesado: 304 y no se vuelve a convertir -bynd
+    result = hwdb.update_hotlist([2025], fetcher)
+    assert calls == [2025]
+    assert len(result["hotlist"]) == 5
@@ -0,0 +1,61 @@
+import copy
+
+import pytest
+
+import hotwheels_osm as hwosm
+import hotwheels_sweep as sweep
+import hotwheels_metrics as metrics
+
+HOME = {"lat": 19.4326, "lng": -99.1332}
+
+def make_stores(count):
+    # ey tiendas con la forma que regresa Overpass ya proyectado -bynd
+    return [
+        {"type": "node", "id": i, "lat": HOME["lat"] + i * 1e-4, "lon": HOME["lng"],
+         "tags": {"shop": "convenience", "name": f"Tienda {i}"}}
+        for i in range(count)
+    ]
+
+@pytest.fixture
+def profiled():
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.enable(False)
+    metrics.reset()
+
+def run_extract(workers):
+    config = copy.deepcopy(hwosm.DEFAULT_CONFIG)
+    school_index = hwosm.build_school_index([])
+    return sweep.run_pool(sweep._extract_chunk, sweep.chunked(make_stores(40), 10), sweep._init_extract,
+                          (school_index, config), workers)
+
+def test_serial_pool_reports_one_worker(profiled):
+    chunks, used = run_extract(1)
+    assert used == 1
+    assert sum(len(chunk) for chunk in chunks) == 40
+
+def test_pool_metrics_come_back_from_child_processes(profiled):
+    serial, _ = run_extract(1)
+    serial_calls = metrics.TIMERS["osm.analyze_store"][0]
+    metrics.reset()
+
+    chunks, used = run_extract(2)
+
+    assert used == 2
+    assert chunks == serial
+    # aaa lo que midieron los hijos se suma en el padre, sin contar doble lo heredado -bynd
+    assert metrics.TIMERS["osm.analyze_store"][0] == serial_calls == 40
+
+def test_merge_adds_drained_metrics(profiled):
+    metrics.observe("etapa", 0.5)
+    metrics.count("http_responses", 2, status=200)
+    snapshot = metrics.drain()
+    assert not metrics.TIMERS and not metrics.COUNTERS
+
+    metrics.observe("etapa", 1.0)
+    metrics.merge(snapshot)
+    metrics.merge(snapshot)
+
+    assert metrics.TIMERS["etapa"] == [3, 2.0, 1.0]
+    assert metrics.COUNTERS[("http_responses", (("status", "200"),))] == 4